@@ -1,19 +1,73 @@
 """Beem Integration - Init file."""
 
+from functools import partial
 import logging
+import voluptuous as vol
 from homeassistant.config_entries import ConfigEntry
-from homeassistant.core import HomeAssistant
+from homeassistant.const import EVENT_HOMEASSISTANT_STOP
+from homeassistant.core import HomeAssistant, ServiceCall, ServiceResponse, SupportsResponse, callback
+from homeassistant.helpers import config_validation as cv
+from homeassistant.util import dt as dt_util
 from homeassistant.exceptions import ConfigEntryNotReady
+from homeassistant.helpers import device_registry as dr, entity_registry as er
+from homeassistant.helpers.event import async_track_time_interval
+from datetime import timedelta
 
-from .const import DOMAIN
-from .coordinator import BeemCoordinator
+from .const import (
+    DOMAIN,
+    CONF_MAX_REQUESTS_PER_HOUR,
+    DEFAULT_MAX_REQUESTS_PER_HOUR,
+    CONF_PROFILING,
+    DEFAULT_PROFILING,
+    CONF_LIVE_STREAM,
+    DEFAULT_LIVE_STREAM,
+    CONF_IMPORT_PRICE,
+    DEFAULT_IMPORT_PRICE,
+    CONF_OFFPEAK_PRICE,
+    DEFAULT_OFFPEAK_PRICE,
+    CONF_OFFPEAK_HOURS,
+    DEFAULT_OFFPEAK_HOURS,
+    CONF_EXPORT_PRICE,
+    DEFAULT_EXPORT_PRICE,
+    DEVICE_REMOVAL_DELAY,
+    SERVICE_BACKFILL_SUMMARY,
+    SERVICE_IMPORT_STATISTICS,
+    SERVICE_QUERY_ANALYTICS,
+    SERVICE_QUERY_HISTORY,
+    STATISTICS_BACKFILL_DAYS,
+    STATISTICS_IMPORT_INTERVAL,
+    TIMESERIES_FLUSH_INTERVAL,
+)
+from .analytics import PERIODS, BeemTariff
+from .coordinator import BeemCoordinator, device_identifier
 from .config_flow import BeemOptionsFlowHandler
-from .storage import BeemSecureStorage
+from .storage import get_secure_storage
 from .api import BeemApiClient
+from .exceptions import BeemApiError
 
-PLATFORMS = ["sensor"]
+PLATFORMS = ["sensor", "select", "number", "button"]
 _LOGGER = logging.getLogger(__name__)
 
+BACKFILL_SCHEMA = vol.Schema({
+    vol.Optional("months", default=12): vol.All(vol.Coerce(int), vol.Range(min=1, max=120)),
+})
+
+QUERY_HISTORY_SCHEMA = vol.Schema({
+    vol.Required("series"): cv.string,
+    vol.Optional("start"): cv.datetime,
+    vol.Optional("end"): cv.datetime,
+    vol.Optional("resolution"): vol.All(vol.Coerce(int), vol.In([0, 300, 3600, 86400])),
+})
+
+IMPORT_STATISTICS_SCHEMA = vol.Schema({
+    vol.Optional("days", default=STATISTICS_BACKFILL_DAYS): vol.All(vol.Coerce(int), vol.Range(min=1, max=366)),
+})
+
+QUERY_ANALYTICS_SCHEMA = vol.Schema({
+    vol.Required("period"): vol.In(list(PERIODS)),
+    vol.Optional("battery_id"): vol.Coerce(int),
+})
+
 
 async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
     """Set up Beem Integration from a config entry."""
@@ -21,14 +75,13 @@ async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
         hass.data[DOMAIN] = {}
 
     email = entry.data.get("email")
-    battery_id = entry.data.get("battery_id")  # Optional, can be None
 
     if not email:
         _LOGGER.error("L'adresse e-mail est manquante dans l'entrée de configuration.")
         return False
 
     # Retrieve password securely from storage
-    storage = BeemSecureStorage(hass)
+    storage = get_secure_storage(hass)
     password = await storage.get_password(email)
 
     if not password:
@@ -45,9 +98,51 @@ async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
         hass=hass,
         entry=entry,
     )
+    # Session et renouvellement planifié du token libérés au déchargement, y compris après un échec de configuration
+    entry.async_on_unload(api_client.async_close)
+
+    # Anciennes entrées (une batterie par entrée) : préfixer les unique_id solaires par la batterie
+    legacy_battery_id = entry.data.get("battery_id")
+    if legacy_battery_id is not None:
+        await _async_migrate_solar_unique_ids(hass, entry, legacy_battery_id)
+
+    # Create and refresh coordinator (un seul par compte, toutes batteries confondues)
+    coordinator = BeemCoordinator(
+        hass=hass,
+        api=api_client,
+        max_requests_per_hour=entry.options.get(CONF_MAX_REQUESTS_PER_HOUR, DEFAULT_MAX_REQUESTS_PER_HOUR),
+        profiling=entry.options.get(CONF_PROFILING, DEFAULT_PROFILING),
+        tariff=_tariff_from_options(entry.options),
+    )
+
+    # Historique local : chargé avant le premier cycle, sauvegardé périodiquement
+    await coordinator.timeseries.async_load()
+    await coordinator.analytics.async_load()
+    await coordinator.forecaster.async_load()
+    entry.async_on_unload(
+        async_track_time_interval(hass, coordinator.timeseries.async_flush, timedelta(seconds=TIMESERIES_FLUSH_INTERVAL))
+    )
+    remove_stop_listener = None
+
+    async def _async_flush_on_stop(_event) -> None:
+        nonlocal remove_stop_listener
+        # Écoute unique : le bus a déjà retiré le listener
+        remove_stop_listener = None
+        await coordinator.timeseries.async_flush()
+
+    @callback
+    def _async_remove_stop_listener() -> None:
+        if remove_stop_listener is not None:
+            remove_stop_listener()
+
+    remove_stop_listener = hass.bus.async_listen_once(EVENT_HOMEASSISTANT_STOP, _async_flush_on_stop)
+    entry.async_on_unload(_async_remove_stop_listener)
+
+    # Dernier état connu : entités créées tout de suite (données périmées), le cloud est interrogé en arrière-plan
+    restored = await coordinator.async_restore_cache()
 
     # Attempt login if no token is present
-    if not token:
+    if not token and not restored:
         try:
             login_ok = await api_client.login()
         except Exception as err:
@@ -56,25 +151,52 @@ async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
 
         if not login_ok:
             _LOGGER.error("Connexion API Beem échouée pour l'utilisateur %s", email)
+            # Home Assistant ne traite pas les callbacks de déchargement pour un échec sans exception
+            await api_client.async_close()
             return False
 
         token = api_client.token
         _LOGGER.info("Token obtenu avec succès depuis l'API.")
 
-    # Create and refresh coordinator
-    coordinator = BeemCoordinator(
-        hass=hass,
-        api=api_client,
-        battery_id=battery_id,
-    )
-
-    try:
-        await coordinator.async_config_entry_first_refresh()
-    except Exception as err:
-        _LOGGER.error("Erreur lors du premier rafraîchissement des données : %s", err)
-        raise ConfigEntryNotReady from err
+    if restored:
+        _LOGGER.info("Démarrage Beem depuis le cache (%s), premier rafraîchissement en arrière-plan", email)
+        entry.async_create_background_task(hass, coordinator.async_refresh(), f"{DOMAIN} first refresh {email}")
+    else:
+        try:
+            await coordinator.async_config_entry_first_refresh()
+        except Exception as err:
+            _LOGGER.error("Erreur lors du premier rafraîchissement des données : %s", err)
+            raise ConfigEntryNotReady from err
 
     hass.data[DOMAIN][entry.entry_id] = coordinator
+    entry.async_on_unload(entry.add_update_listener(_async_options_updated))
+    entry.async_on_unload(_async_track_removed_devices(hass, entry, coordinator))
+
+    if not hass.services.has_service(DOMAIN, SERVICE_BACKFILL_SUMMARY):
+        hass.services.async_register(DOMAIN, SERVICE_BACKFILL_SUMMARY, partial(_async_handle_backfill, hass), schema=BACKFILL_SCHEMA)
+    if not hass.services.has_service(DOMAIN, SERVICE_QUERY_HISTORY):
+        hass.services.async_register(
+            DOMAIN,
+            SERVICE_QUERY_HISTORY,
+            partial(_async_handle_query_history, hass),
+            schema=QUERY_HISTORY_SCHEMA,
+            supports_response=SupportsResponse.ONLY,
+        )
+    if not hass.services.has_service(DOMAIN, SERVICE_IMPORT_STATISTICS):
+        hass.services.async_register(
+            DOMAIN,
+            SERVICE_IMPORT_STATISTICS,
+            partial(_async_handle_import_statistics, hass),
+            schema=IMPORT_STATISTICS_SCHEMA,
+        )
+    if not hass.services.has_service(DOMAIN, SERVICE_QUERY_ANALYTICS):
+        hass.services.async_register(
+            DOMAIN,
+            SERVICE_QUERY_ANALYTICS,
+            partial(_async_handle_query_analytics, hass),
+            schema=QUERY_ANALYTICS_SCHEMA,
+            supports_response=SupportsResponse.ONLY,
+        )
 
     try:
         await hass.config_entries.async_forward_entry_setups(entry, PLATFORMS)
@@ -82,16 +204,199 @@ async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
         _LOGGER.error("Erreur lors du chargement des plateformes : %s", err)
         raise ConfigEntryNotReady from err
 
+    # Statistiques long terme : heures manquantes importées au démarrage, puis toutes les heures
+    async def _async_import_statistics(_now=None) -> None:
+        try:
+            await coordinator.statistics.async_import()
+        except BeemApiError as err:
+            _LOGGER.warning("Import des statistiques Beem reporté : %s", err)
+
+    entry.async_create_background_task(hass, _async_import_statistics(), f"{DOMAIN} statistics import {email}")
+    entry.async_on_unload(
+        async_track_time_interval(hass, _async_import_statistics, timedelta(seconds=STATISTICS_IMPORT_INTERVAL))
+    )
+
+    # Flux push des données live, le polling prend le relais quand il est indisponible
+    if entry.options.get(CONF_LIVE_STREAM, DEFAULT_LIVE_STREAM):
+        coordinator.live_stream.async_start(entry)
+    entry.async_on_unload(coordinator.live_stream.async_stop)
+
+    # Pilotage : paramètres actuels lus au démarrage, puis pour chaque batterie découverte
+    @callback
+    def _async_load_control_parameters():
+        if coordinator.devices_changed:
+            entry.async_create_background_task(
+                hass, coordinator.controller.async_load(coordinator.battery_ids), f"{DOMAIN} control parameters {email}"
+            )
+
+    entry.async_create_background_task(
+        hass, coordinator.controller.async_load(coordinator.battery_ids), f"{DOMAIN} control parameters {email}"
+    )
+    entry.async_on_unload(coordinator.async_add_listener(_async_load_control_parameters))
+    entry.async_on_unload(coordinator.controller.async_shutdown)
+
     _LOGGER.info("Intégration Beem configurée avec succès (%s)", email)
     return True
 
 
+async def _async_handle_backfill(hass: HomeAssistant, call: ServiceCall) -> None:
+    """Service : récupère l'historique mensuel BeemBox des N derniers mois."""
+    months = call.data["months"]
+    for coordinator in list(hass.data.get(DOMAIN, {}).values()):
+        await coordinator.history.async_backfill(months)
+
+
+async def _async_handle_import_statistics(hass: HomeAssistant, call: ServiceCall) -> None:
+    """Service : importe dans les statistiques long terme les heures manquantes."""
+    for coordinator in list(hass.data.get(DOMAIN, {}).values()):
+        await coordinator.statistics.async_import(call.data["days"])
+
+
+async def _async_handle_query_history(hass: HomeAssistant, call: ServiceCall) -> ServiceResponse:
+    """Service : interroge l'historique local (moyenne/min/max par palier)."""
+    end = dt_util.as_utc(call.data["end"]) if "end" in call.data else dt_util.utcnow()
+    start = dt_util.as_utc(call.data["start"]) if "start" in call.data else end - timedelta(days=1)
+    resolution = call.data.get("resolution")
+
+    points = []
+    for coordinator in list(hass.data.get(DOMAIN, {}).values()):
+        points.extend(coordinator.timeseries.query(call.data["series"], start, end, resolution))
+
+    return {
+        "series": call.data["series"],
+        "points": [
+            {"time": dt_util.utc_from_timestamp(ts).isoformat(), "mean": mean, "min": low, "max": high}
+            for ts, mean, low, high in sorted(points)
+        ],
+    }
+
+
+async def _async_handle_query_analytics(hass: HomeAssistant, call: ServiceCall) -> ServiceResponse:
+    """Service : bilan énergétique tarifé par heure, jour ou mois (flux en kWh, taux en %)."""
+    period = call.data["period"]
+    batteries = {}
+    for coordinator in list(hass.data.get(DOMAIN, {}).values()):
+        for battery_id in coordinator.battery_ids:
+            if call.data.get("battery_id", battery_id) == battery_id:
+                batteries[str(battery_id)] = coordinator.analytics.report(battery_id, period)
+    return {"period": period, "batteries": batteries}
+
+
+def _tariff_from_options(options) -> BeemTariff:
+    return BeemTariff(
+        import_price=options.get(CONF_IMPORT_PRICE, DEFAULT_IMPORT_PRICE),
+        export_price=options.get(CONF_EXPORT_PRICE, DEFAULT_EXPORT_PRICE),
+        offpeak_price=options.get(CONF_OFFPEAK_PRICE, DEFAULT_OFFPEAK_PRICE),
+        offpeak_hours=options.get(CONF_OFFPEAK_HOURS, DEFAULT_OFFPEAK_HOURS),
+    )
+
+
+async def _async_options_updated(hass: HomeAssistant, entry: ConfigEntry) -> None:
+    """Applique les options modifiées sans recharger l'entrée."""
+    coordinator = hass.data[DOMAIN].get(entry.entry_id)
+    if coordinator is None:
+        return
+    coordinator.scheduler.max_requests_per_hour = entry.options.get(
+        CONF_MAX_REQUESTS_PER_HOUR, DEFAULT_MAX_REQUESTS_PER_HOUR
+    )
+    coordinator.metrics.profiling = entry.options.get(CONF_PROFILING, DEFAULT_PROFILING)
+    # Nouveaux tarifs appliqués aux intervalles suivants, sans recalcul du passé
+    coordinator.analytics.tariff = _tariff_from_options(entry.options)
+    if entry.options.get(CONF_LIVE_STREAM, DEFAULT_LIVE_STREAM):
+        coordinator.live_stream.async_start(entry)
+    else:
+        push_active = coordinator.push_active
+        coordinator.live_stream.async_stop()
+        if push_active:
+            # Le cycle de contrôle planifié est espacé : reprise immédiate du polling
+            await coordinator.async_request_refresh()
+
+
+def _present_identifiers(coordinator: BeemCoordinator) -> set:
+    identifiers = {device_identifier(key) for key in coordinator.device_keys}
+    identifiers.add(f"account_{coordinator.api_client.email}")
+    return identifiers
+
+
+@callback
+def _async_track_removed_devices(hass: HomeAssistant, entry: ConfigEntry, coordinator: BeemCoordinator):
+    """Supprime les appareils absents de /devices depuis plus de `DEVICE_REMOVAL_DELAY`.
+
+    Leurs entités sont indisponibles entre-temps ; un appareil qui réapparaît avant le
+    délai retrouve ses entités.
+    """
+    missing_since = {}
+
+    @callback
+    def _async_check_devices(force: bool = False):
+        if not coordinator.last_update_success or not (force or coordinator.devices_changed or missing_since):
+            return
+
+        registry = dr.async_get(hass)
+        present = _present_identifiers(coordinator)
+        now = dt_util.utcnow()
+        for device in dr.async_entries_for_config_entry(registry, entry.entry_id):
+            identifier = next((value for domain, value in device.identifiers if domain == DOMAIN), None)
+            if identifier is None or identifier in present:
+                missing_since.pop(device.id, None)
+                continue
+
+            since = missing_since.setdefault(device.id, now)
+            if now - since < timedelta(seconds=DEVICE_REMOVAL_DELAY):
+                continue
+
+            _LOGGER.info("Appareil Beem %s absent depuis %s, suppression", identifier, since)
+            registry.async_update_device(device.id, remove_config_entry_id=entry.entry_id)
+            coordinator.entity_devices.pop(identifier, None)
+            del missing_since[device.id]
+
+    # Premier passage : appareils déjà absents au démarrage
+    _async_check_devices(force=True)
+    return coordinator.async_add_listener(_async_check_devices)
+
+
+async def async_remove_config_entry_device(hass: HomeAssistant, entry: ConfigEntry, device_entry: dr.DeviceEntry) -> bool:
+    """Autorise la suppression manuelle d'un appareil qui n'est plus déclaré par l'API Beem."""
+    coordinator = hass.data[DOMAIN].get(entry.entry_id)
+    if coordinator is None:
+        return True
+    present = _present_identifiers(coordinator)
+    if any(domain == DOMAIN and value in present for domain, value in device_entry.identifiers):
+        return False
+    for domain, value in device_entry.identifiers:
+        if domain == DOMAIN:
+            coordinator.entity_devices.pop(value, None)
+    return True
+
+
+async def _async_migrate_solar_unique_ids(hass: HomeAssistant, entry: ConfigEntry, battery_id) -> None:
+    """Migre les unique_id `solar_<mppt>_<clé>` vers `solar_<batterie>_<mppt>_<clé>`."""
+    prefix = f"solar_{battery_id}_"
+
+    @callback
+    def _migrate(entity_entry: er.RegistryEntry):
+        unique_id = entity_entry.unique_id
+        if not unique_id.startswith("solar_") or unique_id.startswith(prefix):
+            return None
+        return {"new_unique_id": prefix + unique_id[len("solar_"):]}
+
+    await er.async_migrate_entries(hass, entry.entry_id, _migrate)
+
+
 async def async_unload_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
     """Unload a config entry."""
     unload_ok = await hass.config_entries.async_unload_platforms(entry, PLATFORMS)
 
     if unload_ok:
-        hass.data[DOMAIN].pop(entry.entry_id, None)
+        coordinator = hass.data[DOMAIN].pop(entry.entry_id, None)
+        if coordinator is not None:
+            await coordinator.timeseries.async_flush()
+
+        if not hass.data[DOMAIN]:
+            hass.services.async_remove(DOMAIN, SERVICE_BACKFILL_SUMMARY)
+            hass.services.async_remove(DOMAIN, SERVICE_QUERY_HISTORY)
+            hass.services.async_remove(DOMAIN, SERVICE_QUERY_ANALYTICS)
+            hass.services.async_remove(DOMAIN, SERVICE_IMPORT_STATISTICS)
         _LOGGER.info("Entrée Beem %s déchargée avec succès.", entry.entry_id)
     else:
         _LOGGER.warning("Impossible de décharger l'entrée Beem %s.", entry.entry_id)
@@ -0,0 +1,234 @@
+"""Bilan énergétique tarifé : autoconsommation, autarcie, rendement batterie, coûts."""
+
+from datetime import datetime
+import logging
+
+from homeassistant.core import HomeAssistant
+from homeassistant.helpers.storage import Store
+from homeassistant.util import dt as dt_util, slugify
+
+from .const import DOMAIN, ENERGY_MAX_GAP
+
+_LOGGER = logging.getLogger(__name__)
+
+STORAGE_VERSION = 1
+SAVE_DELAY = 300
+
+# Flux (kWh) et montants cumulés par période
+FLOWS = ("solar", "import", "export", "charge", "discharge", "consumption", "import_cost", "export_revenue")
+
+# Découpage des intervalles (secondes) : tout décalage horaire est un multiple du quart d'heure
+SPLIT_STEP = 900
+
+# Période -> (format de la clé en heure locale, nombre de périodes conservées)
+PERIODS = {
+    "hour": ("%Y-%m-%dT%H", 48),
+    "day": ("%Y-%m-%d", 62),
+    "month": ("%Y-%m", 24),
+}
+
+
+def parse_offpeak_hours(text: str | None) -> list[tuple[int, int]]:
+    """Ex. '22:00-06:00, 12:30-14:00' -> plages en minutes depuis minuit. Lève ValueError si invalide."""
+    ranges = []
+    for part in (text or "").replace(";", ",").split(","):
+        part = part.strip()
+        if not part:
+            continue
+        start, end = (_parse_minutes(bound) for bound in part.split("-"))
+        ranges.append((start, end))
+    return ranges
+
+
+def _parse_minutes(value: str) -> int:
+    hours, minutes = value.strip().split(":")
+    hours, minutes = int(hours), int(minutes)
+    if not 0 <= hours <= 24 or not 0 <= minutes < 60 or hours * 60 + minutes > 1440:
+        raise ValueError(f"Heure invalide : {value}")
+    return hours * 60 + minutes
+
+
+class BeemTariff:
+    """Prix d'achat (heures pleines / heures creuses) et de revente, par kWh."""
+
+    def __init__(self, import_price: float, export_price: float, offpeak_price: float | None = None, offpeak_hours: str | None = None):
+        self.import_price = import_price
+        self.export_price = export_price
+        self.offpeak_price = import_price if offpeak_price is None else offpeak_price
+        self.offpeak_ranges = parse_offpeak_hours(offpeak_hours)
+
+    def import_price_at(self, moment: datetime) -> float:
+        minute = moment.hour * 60 + moment.minute
+        for start, end in self.offpeak_ranges:
+            if start <= end:
+                offpeak = start <= minute < end
+            else:
+                # Plage passant minuit (22:00-06:00)
+                offpeak = minute >= start or minute < end
+            if offpeak:
+                return self.offpeak_price
+        return self.import_price
+
+
+def ratios(balance: dict) -> dict:
+    """Taux d'autoconsommation et d'autarcie, rendement aller-retour de la batterie (%)."""
+    solar = balance["solar"]
+    consumption = balance["consumption"]
+    charge = balance["charge"]
+    return {
+        "self_consumption": 100 * (solar - balance["export"]) / solar if solar > 0 else None,
+        "autarky": 100 * (consumption - balance["import"]) / consumption if consumption > 0 else None,
+        "round_trip_efficiency": 100 * balance["discharge"] / charge if charge > 0 else None,
+        "net_cost": balance["import_cost"] - balance["export_revenue"],
+    }
+
+
+def interval_energy(start: tuple, end: tuple) -> dict:
+    """Énergies (kWh) entre deux échantillons (horodatage, solaire, batterie, compteur), par trapèzes.
+
+    Convention Beem : `batteryPower` > 0 en charge, `meterPower` > 0 en import ; la
+    consommation du logement en est déduite. Un trou plus long que `ENERGY_MAX_GAP`
+    est plafonné et intégré à la dernière puissance connue.
+    """
+    t0, solar0, battery0, meter0 = start
+    t1, solar1, battery1, meter1 = end
+    elapsed = t1 - t0
+    if elapsed > ENERGY_MAX_GAP:
+        elapsed = ENERGY_MAX_GAP
+        solar1, battery1, meter1 = solar0, battery0, meter0
+    # W × s -> kWh
+    to_kwh = elapsed / 3600 / 1000
+
+    def energy(power0: float, power1: float) -> float:
+        return (max(power0, 0.0) + max(power1, 0.0)) / 2 * to_kwh
+
+    return {
+        "solar": energy(solar0, solar1),
+        "import": energy(meter0, meter1),
+        "export": energy(-meter0, -meter1),
+        "charge": energy(battery0, battery1),
+        "discharge": energy(-battery0, -battery1),
+        "consumption": energy(solar0 + meter0 - battery0, solar1 + meter1 - battery1),
+    }
+
+
+def split_interval_energy(start: tuple, end: tuple) -> list[tuple[float, dict]]:
+    """`interval_energy` réparti par quart d'heure UTC, au prorata du temps : [(début du morceau, flux)].
+
+    La durée répartie est celle réellement intégrée (plafonnée à `ENERGY_MAX_GAP`) ; chaque
+    morceau tient dans une seule heure, locale comme UTC.
+    """
+    t0 = start[0]
+    t1 = min(end[0], t0 + ENERGY_MAX_GAP)
+    if t1 <= t0:
+        return []
+    flows = interval_energy(start, end)
+    pieces = []
+    moment = t0
+    while moment < t1:
+        piece_end = min(moment - moment % SPLIT_STEP + SPLIT_STEP, t1)
+        share = (piece_end - moment) / (t1 - t0)
+        pieces.append((moment, {flow: value * share for flow, value in flows.items()}))
+        moment = piece_end
+    return pieces
+
+
+class BeemAnalytics:
+    """Bilan par batterie et par heure, jour et mois, alimenté par les échantillons de la série locale.
+
+    Chaque cycle ne parcourt que les échantillons reçus depuis le précédent (un seul passage
+    sur `solarPower`, `batteryPower` et `meterPower`), intégrés par `split_interval_energy` :
+    un intervalle à cheval sur une heure ou minuit est réparti entre les périodes.
+    """
+
+    def __init__(self, hass: HomeAssistant, name: str, tariff: BeemTariff):
+        self.tariff = tariff
+        self._store = Store(hass, STORAGE_VERSION, f"{DOMAIN}_analytics_{slugify(name)}")
+        # Par batterie : dernier échantillon intégré (horodatage, solaire, batterie, compteur)
+        self._last = {}
+        # Par batterie : période -> clé -> flux
+        self._buckets = {}
+
+    async def async_load(self) -> None:
+        data = await self._store.async_load()
+        if not data:
+            return
+        self._last = {battery_id: tuple(last) for battery_id, last in data.get("last", [])}
+        self._buckets = {battery_id: buckets for battery_id, buckets in data.get("buckets", [])}
+
+    def _data_to_save(self) -> dict:
+        return {
+            "last": [[battery_id, list(last)] for battery_id, last in self._last.items()],
+            "buckets": [[battery_id, buckets] for battery_id, buckets in self._buckets.items()],
+        }
+
+    def update(self, timeseries, battery_ids) -> set:
+        """Intègre les nouveaux échantillons ; retourne les batteries dont le bilan a changé."""
+        changed = set()
+        for battery_id in battery_ids:
+            if self._update_battery(timeseries, battery_id):
+                changed.add(battery_id)
+        if changed:
+            self._store.async_delay_save(self._data_to_save, SAVE_DELAY)
+        return changed
+
+    def _update_battery(self, timeseries, battery_id) -> bool:
+        meter = timeseries.series.get(f"battery_{battery_id}_meterPower")
+        if meter is None:
+            return False
+        last = self._last.get(battery_id)
+        after = last[0] if last else float("-inf")
+        rows = meter.raw.rows_after(after)
+        if not rows:
+            return False
+
+        solar = self._values_after(timeseries, f"battery_{battery_id}_solarPower", after)
+        battery = self._values_after(timeseries, f"battery_{battery_id}_batteryPower", after)
+        buckets = self._buckets.setdefault(battery_id, {period: {} for period in PERIODS})
+        previous = last
+        for timestamp, meter_power in rows:
+            sample = (
+                timestamp,
+                solar.get(timestamp, previous[1] if previous else 0.0),
+                battery.get(timestamp, previous[2] if previous else 0.0),
+                meter_power,
+            )
+            if previous is not None:
+                self._integrate(buckets, previous, sample)
+            previous = sample
+        self._last[battery_id] = previous
+        return last is not None or len(rows) > 1
+
+    @staticmethod
+    def _values_after(timeseries, key: str, after: float) -> dict:
+        series = timeseries.series.get(key)
+        return dict(series.raw.rows_after(after)) if series is not None else {}
+
+    def _integrate(self, buckets: dict, start: tuple, end: tuple) -> None:
+        for timestamp, flows in split_interval_energy(start, end):
+            moment = dt_util.as_local(dt_util.utc_from_timestamp(timestamp))
+            flows["import_cost"] = flows["import"] * self.tariff.import_price_at(moment)
+            flows["export_revenue"] = flows["export"] * self.tariff.export_price
+
+            for period, (key_format, kept) in PERIODS.items():
+                by_key = buckets[period]
+                key = moment.strftime(key_format)
+                balance = by_key.get(key)
+                if balance is None:
+                    balance = by_key[key] = dict.fromkeys(FLOWS, 0.0)
+                    for old_key in sorted(by_key)[:-kept]:
+                        del by_key[old_key]
+                for flow, value in flows.items():
+                    balance[flow] += value
+
+    def balance(self, battery_id, period: str, moment: datetime | None = None) -> dict | None:
+        """Bilan de la période (heure, jour ou mois) contenant `moment` (maintenant par défaut)."""
+        key = dt_util.as_local(moment or dt_util.utcnow()).strftime(PERIODS[period][0])
+        return self._buckets.get(battery_id, {}).get(period, {}).get(key)
+
+    def report(self, battery_id, period: str) -> list[dict]:
+        """Toutes les périodes conservées, flux et taux compris."""
+        return [
+            {"period": key, **balance, **ratios(balance)}
+            for key, balance in sorted(self._buckets.get(battery_id, {}).get(period, {}).items())
+        ]
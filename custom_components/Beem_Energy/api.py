@@ -1,215 +1,399 @@
 import aiohttp
+import asyncio
+import hashlib
 import logging
+import os
+import time
 from datetime import datetime
+from json import loads as json_loads
+
+from .auth import BeemTokenManager
+from .exceptions import (
+    BeemApiError,
+    BeemAuthError,
+    BeemCircuitOpenError,
+    BeemConnectionError,
+    BeemRateLimitError,
+    BeemResponseError,
+    BeemServerError,
+)
+from .metrics import BeemMetrics
+from .resilience import MAX_ATTEMPTS, BeemCircuitBreaker, backoff_delay, parse_retry_after
 
 _LOGGER = logging.getLogger(__name__)
 
-BEEM_API_BASE = "https://api-x.beem.energy/beemapp"
+# Surchargeable (ex. serveur Beem simulé local) via la variable d'environnement BEEM_API_BASE
+BEEM_API_BASE = os.environ.get("BEEM_API_BASE", "https://api-x.beem.energy/beemapp").rstrip("/")
+
+# Flux push des données live (Server-Sent Events). Chemin non documenté par Beem :
+# s'il n'existe pas (404), l'intégration reste en polling
+LIVE_STREAM_PATH = "/live-data/stream"
+# Silence maximal sur le flux (événements et keepalive) avant de le considérer comme mort (secondes)
+STREAM_READ_TIMEOUT = 90
+
+# Pool de connexions utilisé quand la session partagée de Home Assistant n'est pas disponible
+CONNECTOR_LIMIT_PER_HOST = 4
+DNS_CACHE_TTL = 300
+KEEPALIVE_TIMEOUT = 75
+
 
 class BeemApiClient:
-    def __init__(self, email: str, password: str = None, token: str = None, hass=None, entry=None):
+    def __init__(self, email: str, password: str = None, token: str = None, hass=None, entry=None, session: aiohttp.ClientSession = None, base_url: str = None):
         self.email = email
+        self.base_url = (base_url or BEEM_API_BASE).rstrip("/")
         self.password = password
-        self.token = token
         self.hass = hass
         self.entry = entry
         self._timeout = aiohttp.ClientTimeout(total=10)
+        self._session = session
+        self._owns_session = False
+        self._tokens = BeemTokenManager(
+            self._async_request_token,
+            token=token,
+            on_refresh=self._async_store_token,
+            hass=hass,
+        )
+        self._breaker = BeemCircuitBreaker()
+        self.metrics = BeemMetrics()
+        # Dernière réponse GET par chemin : (ETag, empreinte du corps, données décodées)
+        self._payload_cache = {}
+        self._devices_cache = None
+
+    @property
+    def token(self) -> str | None:
+        return self._tokens.token
+
+    @property
+    def token_manager(self) -> BeemTokenManager:
+        return self._tokens
 
     def set_password(self, password: str):
         self.password = password
 
+    def _get_session(self) -> aiohttp.ClientSession:
+        """Retourne la session HTTP longue durée du client (créée à la demande)."""
+        if self._session is not None and not self._session.closed:
+            return self._session
+
+        if self.hass is not None:
+            from homeassistant.helpers.aiohttp_client import async_get_clientsession
+
+            # Session partagée de Home Assistant : ne jamais la fermer nous-mêmes
+            self._session = async_get_clientsession(self.hass)
+            self._owns_session = False
+        else:
+            connector = aiohttp.TCPConnector(
+                limit_per_host=CONNECTOR_LIMIT_PER_HOST,
+                ttl_dns_cache=DNS_CACHE_TTL,
+                keepalive_timeout=KEEPALIVE_TIMEOUT,
+            )
+            self._session = aiohttp.ClientSession(connector=connector, timeout=self._timeout)
+            self._owns_session = True
+
+        return self._session
+
+    async def async_close(self):
+        """Ferme la session HTTP si elle appartient au client."""
+        self._tokens.async_shutdown()
+        if self._session is not None and self._owns_session and not self._session.closed:
+            await self._session.close()
+            _LOGGER.debug("Session HTTP Beem fermée pour %s", self.email)
+        self._session = None
+        self._owns_session = False
+
     async def login(self) -> bool:
+        """Se connecte (une seule connexion en vol, partagée par les appelants concurrents)."""
+        return await self._tokens.async_refresh() is not None
+
+    def _async_store_token(self, token: str):
+        """Enregistre le nouveau token dans les options de l'entrée (une écriture par renouvellement)."""
+        if self.hass and self.entry:
+            new_options = {**self.entry.options, "token": token}
+            self.hass.config_entries.async_update_entry(self.entry, options=new_options)
+
+    async def _async_request_token(self) -> str | None:
         if not self.password:
             _LOGGER.error("Mot de passe manquant pour %s", self.email)
-            return False
+            return None
 
-        url = f"{BEEM_API_BASE}/user/login"
         payload = {"email": self.email, "password": self.password}
-        headers = {"Content-Type": "application/json"}
-
         try:
-            async with aiohttp.ClientSession(timeout=self._timeout) as session:
-                async with session.post(url, json=payload, headers=headers) as resp:
-                    text = await resp.text()
-
-                    if resp.status not in (200, 201):
-                        _LOGGER.error("Échec de la connexion à Beem (%s): %s", resp.status, text)
-                        return False
-
-                    try:
-                        data = await resp.json()
-                    except Exception:
-                        _LOGGER.error("Réponse non JSON: %s", text)
-                        return False
-
-                    token = data.get("accessToken")
-                    if token:
-                        self.token = token
-                        _LOGGER.info("Token récupéré avec succès pour %s", self.email)
-
-                        if self.hass and self.entry:
-                            new_options = {**self.entry.options, "token": token}
-                            await self.hass.config_entries.async_update_entry(self.entry, options=new_options)
-
-                        return True
-                    else:
-                        _LOGGER.error("Token absent dans la réponse: %s", data)
-                        return False
-        except aiohttp.ClientError as e:
-            _LOGGER.exception("Erreur de connexion à l'API Beem : %s", e)
-            return False
-        except Exception as e:
-            _LOGGER.exception("Erreur inattendue lors du login Beem : %s", e)
-            return False
-
-    async def _ensure_token(self):
-        if not self.token:
-            _LOGGER.warning("Token manquant, tentative de reconnexion...")
-            return await self.login()
-        return True
-
-    async def get_live_data(self, battery_id: int) -> dict | None:
-        if not await self._ensure_token():
+            data = await self._request("POST", "/user/login", json=payload, auth=False)
+        except BeemAuthError as e:
+            _LOGGER.error("Échec de la connexion à Beem (%s): %s", e.status, e)
+            return None
+        except BeemApiError as e:
+            _LOGGER.error("Erreur de connexion à l'API Beem : %s", e)
             return None
 
-        url = f"{BEEM_API_BASE}/batteries/{battery_id}/live-data"
-        headers = {
-            "Authorization": f"Bearer {self.token}",
-            "Content-Type": "application/json"
-        }
+        token = data.get("accessToken") if isinstance(data, dict) else None
+        if token:
+            _LOGGER.info("Token récupéré avec succès pour %s", self.email)
+            return token
 
+        _LOGGER.error("Token absent dans la réponse de connexion Beem")
+        return None
+
+    async def _ensure_token(self) -> str:
+        if not self._tokens.is_valid():
+            _LOGGER.debug("Token absent ou expiré, connexion à l'API Beem...")
+        token = await self._tokens.async_get_token()
+        if not token:
+            raise BeemAuthError("Impossible d'obtenir un token Beem")
+        return token
+
+    @property
+    def circuit_breaker(self) -> BeemCircuitBreaker:
+        return self._breaker
+
+    async def _request(self, method: str, path: str, json=None, auth: bool = True):
+        """Pipeline commun à tous les appels : token, nouvelles tentatives bornées, disjoncteur.
+
+        Lève une sous-classe de `BeemApiError` en cas d'échec définitif.
+        """
+        reauthenticated = False
+        attempt = 0
+
+        while True:
+            if self._breaker.is_open:
+                raise BeemCircuitOpenError("API Beem indisponible, disjoncteur ouvert")
+
+            headers = {"Content-Type": "application/json"}
+            token = None
+            if auth:
+                token = await self._ensure_token()
+                headers["Authorization"] = f"Bearer {token}"
+
+            # Après l'obtention du token : une éventuelle connexion sert elle-même d'essai de reprise
+            trial = self._breaker.before_request()
+
+            try:
+                result = await self._send(method, path, headers, json)
+            except BeemAuthError as e:
+                # Un 401 n'est pas une panne du cloud : une seule reconnexion, sans toucher au disjoncteur
+                self._breaker.record_success()
+                self.metrics.record_error(method, path, e)
+                if not auth or reauthenticated:
+                    raise
+                _LOGGER.warning("Token expiré, tentative de reconnexion...")
+                reauthenticated = True
+                if not await self._tokens.async_handle_unauthorized(token):
+                    raise
+                continue
+            except BeemResponseError as e:
+                self._breaker.record_success()
+                self.metrics.record_error(method, path, e)
+                raise
+            except (BeemConnectionError, BeemServerError, BeemRateLimitError) as e:
+                self._breaker.record_failure()
+                self.metrics.record_error(method, path, e)
+                attempt += 1
+                if attempt >= MAX_ATTEMPTS or self._breaker.is_open:
+                    raise
+                self.metrics.record_retry(method, path)
+                delay = backoff_delay(attempt, getattr(e, "retry_after", None))
+                _LOGGER.debug("%s %s : %s, nouvelle tentative dans %.1f s", method, path, e, delay)
+                await asyncio.sleep(delay)
+            else:
+                self._breaker.record_success()
+                return result
+            finally:
+                # Essai annulé ou erreur non classée : issue neutre, l'essai suivant peut partir
+                if trial:
+                    self._breaker.release_trial()
+
+    async def _send(self, method: str, path: str, headers: dict, json=None):
+        """Envoie une requête unique et convertit la réponse (ou l'erreur) en résultat typé."""
+        start = time.perf_counter()
+        status = None
+        size = 0
+        cached = self._payload_cache.get(path) if method == "GET" else None
+        if cached is not None and cached[0]:
+            headers = {**headers, "If-None-Match": cached[0]}
         try:
-            async with aiohttp.ClientSession(timeout=self._timeout) as session:
-                async with session.get(url, headers=headers) as resp:
+            session = self._get_session()
+            async with session.request(method, f"{self.base_url}{path}", headers=headers, json=json, timeout=self._timeout) as resp:
+                status = resp.status
+                if status == 304 and cached is not None:
+                    self.metrics.record_unchanged(method, path)
+                    return cached[2]
+
+                body = await resp.read()
+                size = len(body)
+
+                if resp.status in (401, 403):
+                    raise BeemAuthError(f"Accès refusé ({resp.status})", resp.status)
+                if resp.status == 429:
+                    raise BeemRateLimitError(
+                        "Trop de requêtes vers l'API Beem",
+                        retry_after=parse_retry_after(resp.headers.get("Retry-After")),
+                    )
+                if resp.status >= 500:
+                    raise BeemServerError(
+                        f"Erreur serveur Beem ({resp.status})",
+                        resp.status,
+                        retry_after=parse_retry_after(resp.headers.get("Retry-After")),
+                    )
+                if resp.status == 204:
+                    return None
+                if resp.status not in (200, 201):
                     text = await resp.text()
+                    raise BeemResponseError(f"Erreur API Beem ({resp.status}): {text[:200]}", resp.status)
 
-                    if resp.status == 401:
-                        _LOGGER.warning("Token expiré, tentative de reconnexion...")
-                        if await self.login():
-                            return await self.get_live_data(battery_id)
-                        return None
-
-                    if resp.status != 200:
-                        _LOGGER.error("Erreur API Beem (%s): %s", resp.status, text)
-                        return None
-
-                    try:
-                        return await resp.json()
-                    except Exception:
-                        _LOGGER.error("Réponse non JSON: %s", text)
-                        return None
-        except aiohttp.ClientError as e:
-            _LOGGER.exception("Erreur HTTP lors de la récupération des données : %s", e)
-        except Exception as e:
-            _LOGGER.exception("Erreur inattendue dans get_live_data : %s", e)
-
-        return None
-
-    async def get_batteries(self) -> list | None:
-        if not await self._ensure_token():
-            return None
+                # Corps identique au précédent (serveur sans ETag) : pas de décodage, même objet retourné
+                digest = hashlib.blake2b(body, digest_size=16).digest()
+                if cached is not None and cached[1] == digest:
+                    self.metrics.record_unchanged(method, path)
+                    return cached[2]
 
-        url = f"{BEEM_API_BASE}/devices"
-        headers = {
-            "Authorization": f"Bearer {self.token}",
-            "Content-Type": "application/json"
-        }
+                try:
+                    data = json_loads(body)
+                except ValueError as e:
+                    text = await resp.text()
+                    raise BeemResponseError(f"Réponse non JSON: {text[:200]}", resp.status) from e
 
+                if method == "GET":
+                    self._payload_cache[path] = (resp.headers.get("ETag"), digest, data)
+                return data
+        except aiohttp.ClientError as e:
+            raise BeemConnectionError(f"Erreur HTTP : {e}") from e
+        except asyncio.TimeoutError as e:
+            raise BeemConnectionError("Délai dépassé") from e
+        finally:
+            self.metrics.record_request(method, path, status, time.perf_counter() - start, size)
+
+    async def stream_live_data(self):
+        """Ouvre le flux SSE des données live et produit chaque événement décodé.
+
+        Lève une sous-classe de `BeemApiError` si le flux ne peut pas être ouvert ou s'interrompt.
+        """
+        if self._breaker.is_open:
+            raise BeemCircuitOpenError("API Beem indisponible, disjoncteur ouvert")
+        token = await self._ensure_token()
+        headers = {"Authorization": f"Bearer {token}", "Accept": "text/event-stream"}
+        timeout = aiohttp.ClientTimeout(total=None, sock_connect=10, sock_read=STREAM_READ_TIMEOUT)
+        start = time.perf_counter()
+        status = None
         try:
-            async with aiohttp.ClientSession(timeout=self._timeout) as session:
-                async with session.get(url, headers=headers) as resp:
-                    if resp.status == 401:
-                        _LOGGER.warning("Token expiré, tentative de reconnexion...")
-                        if await self.login():
-                            return await self.get_batteries()
-                        return None
-
-                    if resp.status != 200:
-                        text = await resp.text()
-                        _LOGGER.error("Erreur API lors de get_batteries (%s): %s", resp.status, text)
-                        return None
-
-                    data = await resp.json()
-                    _LOGGER.debug("Réponse batteries: %s", data)
-
-                    if isinstance(data, list):
-                        return data
-                    elif isinstance(data, dict) and "batteries" in data:
-                        return data["batteries"]
-                    else:
-                        _LOGGER.warning("Structure inattendue dans get_batteries: %s", data)
-                        return None
-        except Exception as e:
-            _LOGGER.exception("Erreur lors de la récupération des batteries: %s", e)
-            return None
+            try:
+                session = self._get_session()
+                async with session.get(f"{self.base_url}{LIVE_STREAM_PATH}", headers=headers, timeout=timeout) as resp:
+                    status = resp.status
+                    self.metrics.record_request("GET", LIVE_STREAM_PATH, status, time.perf_counter() - start)
+                    if status in (401, 403):
+                        await self._tokens.async_handle_unauthorized(token)
+                        raise BeemAuthError(f"Accès refusé au flux live ({status})", status)
+                    if status >= 500:
+                        raise BeemServerError(f"Erreur serveur Beem ({status})", status)
+                    if status != 200:
+                        raise BeemResponseError(f"Flux live indisponible ({status})", status)
+
+                    event = None
+                    data_lines = []
+                    async for raw_line in resp.content:
+                        line = raw_line.decode("utf-8").rstrip("\r\n")
+                        if line.startswith("event:"):
+                            event = line[6:].strip()
+                        elif line.startswith("data:"):
+                            data_lines.append(line[5:].lstrip())
+                        elif not line:
+                            # Fin d'événement ; les lignes ":" (keepalive) n'ont pas de données
+                            if data_lines:
+                                try:
+                                    payload = json_loads("\n".join(data_lines))
+                                except ValueError:
+                                    _LOGGER.debug("Événement du flux live illisible ignoré")
+                                else:
+                                    yield event, payload
+                            event = None
+                            data_lines = []
+                    raise BeemConnectionError("Flux live fermé par le serveur")
+            except aiohttp.ClientError as e:
+                raise BeemConnectionError(f"Erreur HTTP : {e}") from e
+            except asyncio.TimeoutError as e:
+                raise BeemConnectionError("Flux live silencieux") from e
+        except BeemApiError as e:
+            self.metrics.record_error("GET", LIVE_STREAM_PATH, e)
+            raise
+        finally:
+            if status is None:
+                self.metrics.record_request("GET", LIVE_STREAM_PATH, None, time.perf_counter() - start)
+
+    async def get_live_data(self, battery_id: int) -> dict:
+        return await self._request("GET", f"/batteries/{battery_id}/live-data")
+
+    async def get_battery_history(self, battery_id: int, start: datetime, end: datetime) -> list[dict]:
+        """Mesures passées d'une batterie sur [start, end[, au format live-data.
+
+        Chemin non documenté par Beem : lève `BeemResponseError` (404) s'il n'existe pas.
+        """
+        payload = {"from": start.isoformat(), "to": end.isoformat()}
+        data = await self._request("POST", f"/batteries/{battery_id}/history", json=payload)
+        return data if isinstance(data, list) else []
+
+    async def get_control_parameters(self, battery_id: int) -> dict:
+        """Paramètres de pilotage d'une batterie (mode de fonctionnement, limites de charge).
+
+        Chemin non documenté par Beem : lève `BeemResponseError` (404) s'il n'existe pas.
+        """
+        return await self._request("GET", f"/batteries/{battery_id}/control-parameters")
+
+    async def set_control_parameters(self, battery_id: int, parameters: dict) -> dict | None:
+        """Modifie les paramètres de pilotage donnés ; retourne l'état complet si l'API le renvoie."""
+        data = await self._request("PATCH", f"/batteries/{battery_id}/control-parameters", json=parameters)
+        return data if isinstance(data, dict) else None
+
+    async def get_devices(self) -> dict:
+        """Récupère en une seule requête /devices : batteries, équipements solaires et beemboxes."""
+        data = await self._request("GET", "/devices")
+        if self._devices_cache is not None and self._devices_cache[0] is data:
+            # Réponse inchangée : même découpage, les appelants peuvent comparer par identité
+            return self._devices_cache[1]
+        _LOGGER.debug("Réponse devices: %s", data)
+
+        devices = parse_devices(data)
+        if devices is None:
+            raise BeemResponseError("Structure inattendue dans /devices")
+        self._devices_cache = (data, devices)
+        return devices
+
+    async def get_batteries(self) -> list:
+        return (await self.get_devices())["batteries"]
 
     async def get_beemboxes(self) -> list[dict]:
         """Récupère les panneaux PnP (beemboxes)."""
-        if not await self._ensure_token():
-            return []
-
-        url = f"{BEEM_API_BASE}/devices"
-        headers = {
-            "Authorization": f"Bearer {self.token}",
-            "Content-Type": "application/json"
-        }
-
-        try:
-            async with aiohttp.ClientSession(timeout=self._timeout) as session:
-                async with session.get(url, headers=headers) as resp:
-                    text = await resp.text()
-                    if resp.status == 401:
-                        _LOGGER.warning("Token expiré, tentative de reconnexion...")
-                        if await self.login():
-                            return await self.get_beemboxes()
-                        return []
-
-                    if resp.status != 200:
-                        _LOGGER.error("Erreur API dans get_beemboxes (%s): %s", resp.status, text)
-                        return []
-
-                    data = await resp.json()
-                    return data.get("beemboxes", [])
-        except Exception as e:
-            _LOGGER.exception("Erreur dans get_beemboxes: %s", e)
-            return []
+        return (await self.get_devices())["beemboxes"]
 
     async def get_beembox_summary(self, month=None, year=None) -> list[dict]:
         """Récupère les données mensuelles (Wh, totalDay, totalMonth) des beemboxes."""
-        if not await self._ensure_token():
-            return []
-
         if not month or not year:
             now = datetime.now()
             month = now.month
             year = now.year
 
-        url = f"{BEEM_API_BASE}/box/summary"
-        headers = {
-            "Authorization": f"Bearer {self.token}",
-            "Content-Type": "application/json"
-        }
         payload = {"month": month, "year": year}
+        return await self._request("POST", "/box/summary", json=payload)
+
+
+def parse_devices(data) -> dict | None:
+    """Découpe la réponse /devices en batteries, équipements solaires (par batterie) et beemboxes."""
+    if isinstance(data, list):
+        batteries, beemboxes = data, []
+    elif isinstance(data, dict):
+        batteries = data.get("batteries") or []
+        beemboxes = data.get("beemboxes") or []
+    else:
+        _LOGGER.warning("Structure inattendue dans get_devices: %s", data)
+        return None
 
-        try:
-            async with aiohttp.ClientSession(timeout=self._timeout) as session:
-                async with session.post(url, headers=headers, json=payload) as resp:
-                    text = await resp.text()
-                    if resp.status == 401:
-                        _LOGGER.warning("Token expiré, tentative de reconnexion...")
-                        if await self.login():
-                            return await self.get_beembox_summary(month, year)
-                        return []
-
-                    if resp.status != 200:
-                        _LOGGER.error("Erreur API dans get_beembox_summary (%s): %s", resp.status, text)
-                        return []
-
-                    try:
-                        return await resp.json()
-                    except Exception:
-                        _LOGGER.error("Réponse non JSON: %s", text)
-                        return []
-        except Exception as e:
-            _LOGGER.exception("Erreur dans get_beembox_summary: %s", e)
-            return []
+    solar_equipments = {
+        battery.get("id"): battery.get("solarEquipments", [])
+        for battery in batteries
+        if isinstance(battery, dict)
+    }
+
+    return {
+        "batteries": batteries,
+        "solarEquipments": solar_equipments,
+        "beemboxes": beemboxes,
+    }
@@ -0,0 +1,132 @@
+"""Cycle de vie du token d'accès Beem (expiration JWT, rafraîchissement unique)."""
+
+import asyncio
+import base64
+import binascii
+import json
+import logging
+import time
+
+_LOGGER = logging.getLogger(__name__)
+
+# Rafraîchir le token un peu avant son expiration (secondes)
+REFRESH_MARGIN = 300
+
+
+def decode_token_expiry(token: str | None) -> float | None:
+    """Retourne l'expiration (`exp`, timestamp UNIX) d'un JWT, sans vérifier sa signature."""
+    if not token:
+        return None
+    try:
+        payload = token.split(".")[1]
+        payload += "=" * (-len(payload) % 4)
+        claims = json.loads(base64.urlsafe_b64decode(payload))
+        exp = claims.get("exp")
+        return float(exp) if exp is not None else None
+    except (IndexError, ValueError, TypeError, AttributeError, binascii.Error, UnicodeDecodeError):
+        return None
+
+
+class BeemTokenManager:
+    """Fournit un token valide et garantit une seule connexion en vol à la fois.
+
+    Les appelants concurrents qui trouvent le token expiré attendent tous la même
+    tâche de connexion. Le token est renouvelé en arrière-plan `REFRESH_MARGIN`
+    secondes avant l'expiration lue dans le JWT.
+    """
+
+    def __init__(self, login_func, token: str | None = None, on_refresh=None, hass=None):
+        self._login_func = login_func
+        self._on_refresh = on_refresh
+        self._hass = hass
+        self._token = None
+        self._expires_at = None
+        self._refresh_task = None
+        self._cancel_scheduled = None
+        self.refresh_count = 0
+        self._set_token(token)
+
+    @property
+    def token(self) -> str | None:
+        return self._token
+
+    @property
+    def expires_at(self) -> float | None:
+        return self._expires_at
+
+    def is_valid(self, margin: float = 0) -> bool:
+        if not self._token:
+            return False
+        return self._expires_at is None or time.time() + margin < self._expires_at
+
+    async def async_get_token(self) -> str | None:
+        """Retourne un token utilisable, en le renouvelant si nécessaire."""
+        if self.is_valid(REFRESH_MARGIN):
+            return self._token
+        if self.is_valid():
+            # Encore valide mais proche de l'expiration : renouvellement sans bloquer l'appelant
+            self._start_refresh()
+            return self._token
+        return await self.async_refresh()
+
+    async def async_refresh(self) -> str | None:
+        """Force une connexion ; les appels simultanés partagent la même tentative."""
+        return await asyncio.shield(self._start_refresh())
+
+    async def async_handle_unauthorized(self, rejected_token: str | None) -> str | None:
+        """Gère un 401 : ne se reconnecte que si le token refusé est toujours le token courant."""
+        if self._token and self._token != rejected_token:
+            return self._token
+        self._expires_at = 0
+        return await self.async_refresh()
+
+    def async_shutdown(self) -> None:
+        if self._cancel_scheduled is not None:
+            self._cancel_scheduled()
+            self._cancel_scheduled = None
+        if self._refresh_task is not None and not self._refresh_task.done():
+            self._refresh_task.cancel()
+
+    def _set_token(self, token: str | None) -> None:
+        self._token = token
+        self._expires_at = decode_token_expiry(token)
+        self._schedule_refresh()
+
+    def _start_refresh(self) -> asyncio.Task:
+        if self._refresh_task is None or self._refresh_task.done():
+            if self._hass is not None:
+                self._refresh_task = self._hass.async_create_task(self._async_do_refresh())
+            else:
+                self._refresh_task = asyncio.get_running_loop().create_task(self._async_do_refresh())
+        return self._refresh_task
+
+    async def _async_do_refresh(self) -> str | None:
+        token = await self._login_func()
+        if not token:
+            return None
+
+        self.refresh_count += 1
+        self._set_token(token)
+        if self._on_refresh is not None:
+            self._on_refresh(token)
+        return token
+
+    def _schedule_refresh(self) -> None:
+        if self._cancel_scheduled is not None:
+            self._cancel_scheduled()
+            self._cancel_scheduled = None
+        if self._expires_at is None or self._hass is None:
+            return
+
+        from homeassistant.core import callback
+        from homeassistant.helpers.event import async_call_later
+
+        delay = max(self._expires_at - REFRESH_MARGIN - time.time(), 0)
+
+        @callback
+        def _refresh_later(_now) -> None:
+            self._cancel_scheduled = None
+            _LOGGER.debug("Renouvellement anticipé du token Beem")
+            self._start_refresh()
+
+        self._cancel_scheduled = async_call_later(self._hass, delay, _refresh_later)
@@ -0,0 +1,240 @@
+"""Import de l'historique Beem dans les statistiques long terme de Home Assistant."""
+
+from datetime import datetime, timedelta
+import asyncio
+import logging
+
+from homeassistant.components.recorder import get_instance
+from homeassistant.components.recorder.models import StatisticData, StatisticMetaData
+from homeassistant.components.recorder.statistics import async_add_external_statistics, get_last_statistics
+from homeassistant.core import HomeAssistant
+from homeassistant.util import dt as dt_util, slugify
+
+from .analytics import split_interval_energy
+from .const import (
+    DOMAIN,
+    ENERGY_MAX_GAP,
+    MAX_CONCURRENT_REQUESTS,
+    STATISTICS_BACKFILL_DAYS,
+    STATISTICS_HISTORY_CHUNK_DAYS,
+    SUMMARY_BACKFILL_REQUESTS_PER_SECOND,
+)
+from .exceptions import BeemResponseError
+from .history import BeemRateLimiter
+from .models import LiveData
+
+_LOGGER = logging.getLogger(__name__)
+
+# Source des statistiques externes (le recorder exige un identifiant en minuscules)
+STATISTICS_SOURCE = DOMAIN.lower()
+
+# Énergies horaires importées pour chaque batterie (kWh)
+BATTERY_FLOWS = ("solar", "import", "export", "charge", "discharge", "consumption")
+
+# Statuts indiquant que l'API ne fournit pas d'historique
+UNSUPPORTED_STATUSES = (404, 405, 501)
+
+
+def battery_statistic_id(battery_id, flow: str) -> str:
+    return f"{STATISTICS_SOURCE}:battery_{battery_id}_{flow}"
+
+
+def beembox_statistic_id(box_id) -> str:
+    return f"{STATISTICS_SOURCE}:beembox_{slugify(str(box_id))}_energy"
+
+
+def history_samples(chunks: list[list]) -> list[tuple]:
+    """Réponses de l'historique -> échantillons (horodatage, solaire, batterie, compteur) triés."""
+    samples = []
+    for chunk in chunks:
+        for entry in chunk:
+            if not isinstance(entry, dict):
+                continue
+            live = LiveData.from_dict(entry)
+            if live.measured_at is None or live.meter_power is None:
+                continue
+            samples.append((live.measured_at.timestamp(), live.solar_power or 0.0, live.battery_power or 0.0, live.meter_power))
+    samples.sort()
+    return samples
+
+
+def hourly_energy(samples: list[tuple]) -> dict[float, dict]:
+    """Énergies par heure : début d'heure (horodatage UTC) -> flux en kWh.
+
+    Un intervalle à cheval sur plusieurs heures est réparti comme dans le bilan énergétique
+    (`split_interval_energy`), pour que capteurs et statistiques importées concordent.
+    """
+    hours = {}
+    previous = None
+    for sample in samples:
+        if previous is not None:
+            for moment, flows in split_interval_energy(previous, sample):
+                bucket = hours.setdefault(moment - moment % 3600, dict.fromkeys(flows, 0.0))
+                for flow, value in flows.items():
+                    bucket[flow] += value
+        previous = sample
+    return hours
+
+
+class BeemStatisticsImporter:
+    """Importe par lots des énergies horaires dans les statistiques long terme (statistiques externes).
+
+    Chaque import reprend après la dernière heure importée ; seules les heures entièrement
+    couvertes par les mesures sont importées, les autres le seront à l'import suivant.
+    Les mesures viennent de l'historique Beem s'il existe, sinon de la série locale (les trous
+    ne sont alors pas comblés). Les BeemBox n'ont que des totaux mensuels (/box/summary) :
+    chaque mois terminé, mis en cache au changement de mois, est importé au début du mois. Décodage et agrégation se font hors de la boucle ;
+    chaque statistique est écrite en un seul appel au recorder.
+    """
+
+    def __init__(self, hass: HomeAssistant, coordinator):
+        self.hass = hass
+        self.coordinator = coordinator
+        self.history_supported = None
+        self._lock = asyncio.Lock()
+        self._semaphore = asyncio.Semaphore(MAX_CONCURRENT_REQUESTS)
+        self._rate_limiter = BeemRateLimiter(SUMMARY_BACKFILL_REQUESTS_PER_SECOND)
+
+    async def async_import(self, days: int = STATISTICS_BACKFILL_DAYS) -> int:
+        """Importe les heures manquantes (sur `days` jours au premier import) ; retourne le nombre d'heures."""
+        async with self._lock:
+            end = dt_util.utcnow().replace(minute=0, second=0, microsecond=0)
+            imported = 0
+            for battery_id in list(self.coordinator.battery_ids):
+                imported += await self._async_import_battery(battery_id, end, days)
+            months = await self._async_import_beemboxes()
+        if imported or months:
+            _LOGGER.info(
+                "Statistiques Beem : %s heure(s) de batterie et %s mois de BeemBox importés pour %s",
+                imported,
+                months,
+                self.coordinator.api_client.email,
+            )
+        return imported
+
+    async def _async_last_statistic(self, statistic_id: str) -> tuple[datetime | None, float]:
+        last = await get_instance(self.hass).async_add_executor_job(
+            get_last_statistics, self.hass, 1, statistic_id, True, {"sum"}
+        )
+        rows = last.get(statistic_id)
+        if not rows:
+            return None, 0.0
+        return dt_util.utc_from_timestamp(rows[0]["start"]), rows[0]["sum"] or 0.0
+
+    async def _async_import_battery(self, battery_id, end: datetime, days: int) -> int:
+        last_start, _ = await self._async_last_statistic(battery_statistic_id(battery_id, BATTERY_FLOWS[0]))
+        start = last_start + timedelta(hours=1) if last_start else end - timedelta(days=days)
+        if start >= end:
+            return 0
+
+        # Depuis un peu avant la reprise (intervalle à cheval) jusqu'à maintenant (fin de la dernière heure)
+        samples = await self._async_fetch_samples(battery_id, start - timedelta(seconds=ENERGY_MAX_GAP), dt_util.utcnow())
+        if not samples:
+            return 0
+        hours = await self.hass.async_add_executor_job(hourly_energy, samples)
+        covered_until = min(samples[-1][0], end.timestamp())
+        hours = {hour: flows for hour, flows in hours.items() if start.timestamp() <= hour and hour + 3600 <= covered_until}
+        if not hours:
+            return 0
+
+        for flow in BATTERY_FLOWS:
+            statistic_id = battery_statistic_id(battery_id, flow)
+            _, total = await self._async_last_statistic(statistic_id)
+            statistics = []
+            for hour in sorted(hours):
+                total += hours[hour][flow]
+                statistics.append(StatisticData(start=dt_util.utc_from_timestamp(hour), state=hours[hour][flow], sum=total))
+            async_add_external_statistics(
+                self.hass,
+                StatisticMetaData(
+                    has_mean=False,
+                    has_sum=True,
+                    name=f"Beem Battery {battery_id} {flow}",
+                    source=STATISTICS_SOURCE,
+                    statistic_id=statistic_id,
+                    unit_of_measurement="kWh",
+                ),
+                statistics,
+            )
+        return len(hours)
+
+    async def _async_fetch_samples(self, battery_id, start: datetime, end: datetime) -> list[tuple]:
+        if self.history_supported is not False:
+            chunk = timedelta(days=STATISTICS_HISTORY_CHUNK_DAYS)
+            ranges = []
+            chunk_start = start
+            while chunk_start < end:
+                ranges.append((chunk_start, min(chunk_start + chunk, end)))
+                chunk_start += chunk
+            try:
+                chunks = await asyncio.gather(
+                    *(self._async_fetch_history(battery_id, chunk_start, chunk_end) for chunk_start, chunk_end in ranges)
+                )
+            except BeemResponseError as err:
+                if err.status not in UNSUPPORTED_STATUSES:
+                    raise
+                # Journalisé une seule fois : la série locale est ensuite utilisée directement
+                _LOGGER.info(
+                    "Pas d'historique de batterie fourni par l'API Beem (%s) : import depuis la série locale, "
+                    "les périodes sans données reçues par Home Assistant (coupures) ne seront pas comblées",
+                    err,
+                )
+                self.history_supported = False
+            else:
+                self.history_supported = True
+                return await self.hass.async_add_executor_job(history_samples, chunks)
+        return self._local_samples(battery_id, start, end)
+
+    async def _async_fetch_history(self, battery_id, start: datetime, end: datetime) -> list:
+        async with self._semaphore, self._rate_limiter:
+            return await self.coordinator.api_client.get_battery_history(battery_id, start, end)
+
+    def _local_samples(self, battery_id, start: datetime, end: datetime) -> list[tuple]:
+        """Échantillons bruts de la série locale (quelques jours au plus)."""
+        timeseries = self.coordinator.timeseries
+        meter = timeseries.query(f"battery_{battery_id}_meterPower", start, end, 0)
+        solar = {t: v for t, v, _, _ in timeseries.query(f"battery_{battery_id}_solarPower", start, end, 0)}
+        battery = {t: v for t, v, _, _ in timeseries.query(f"battery_{battery_id}_batteryPower", start, end, 0)}
+        return [(t, solar.get(t, 0.0), battery.get(t, 0.0), v) for t, v, _, _ in meter]
+
+    async def _async_import_beemboxes(self) -> int:
+        history = self.coordinator.history
+        await history.async_load()
+        by_box = {}
+        for month_key, summary in history.months.items():
+            for entry in summary if isinstance(summary, list) else []:
+                box_id = entry.get("macAddress") if isinstance(entry, dict) else None
+                if box_id and entry.get("totalMonth") is not None:
+                    by_box.setdefault(box_id, {})[month_key] = entry["totalMonth"]
+
+        imported = 0
+        for box_id, months in by_box.items():
+            statistic_id = beembox_statistic_id(box_id)
+            last_start, total = await self._async_last_statistic(statistic_id)
+            statistics = []
+            for month_key in sorted(months):
+                year, month = (int(part) for part in month_key.split("-"))
+                # Le recorder n'accepte que des débuts d'heure (fuseaux à décalage non entier)
+                start = dt_util.as_utc(datetime(year, month, 1, tzinfo=dt_util.DEFAULT_TIME_ZONE))
+                start = start.replace(minute=0, second=0, microsecond=0)
+                if last_start is not None and start <= last_start:
+                    continue
+                value = months[month_key] / 1000
+                total += value
+                statistics.append(StatisticData(start=start, state=value, sum=total))
+            if not statistics:
+                continue
+            async_add_external_statistics(
+                self.hass,
+                StatisticMetaData(
+                    has_mean=False,
+                    has_sum=True,
+                    name=f"BeemBox {box_id} energy",
+                    source=STATISTICS_SOURCE,
+                    statistic_id=statistic_id,
+                    unit_of_measurement="kWh",
+                ),
+                statistics,
+            )
+            imported += len(statistics)
+        return imported
@@ -0,0 +1,61 @@
+from homeassistant.components.button import ButtonEntity
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.core import HomeAssistant
+from homeassistant.helpers.entity_platform import AddEntitiesCallback
+
+from .const import DOMAIN
+from .control import async_setup_battery_entities
+from .coordinator import device_identifier
+from .sensor import BeemChangeAwareMixin
+
+# clé -> (icône, paramètres écrits)
+BUTTON_DEFINITIONS = {
+    "resume_auto_mode": ("mdi:autorenew", {"mode": "auto"}),
+}
+
+
+async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry, async_add_entities: AddEntitiesCallback):
+    coordinator = hass.data[DOMAIN][entry.entry_id]
+    async_setup_battery_entities(
+        coordinator,
+        entry,
+        async_add_entities,
+        "button",
+        lambda coordinator, battery_id: [BeemControlButton(coordinator, battery_id, key) for key in BUTTON_DEFINITIONS],
+    )
+
+
+class BeemControlButton(BeemChangeAwareMixin, ButtonEntity):
+    """Action de pilotage prédéfinie (ex. retour au mode automatique)."""
+
+    def __init__(self, coordinator, battery_id, key):
+        icon, parameters = BUTTON_DEFINITIONS[key]
+        self.coordinator = coordinator
+        self._battery_id = battery_id
+        self._parameters = parameters
+        self._change_keys = (("battery", battery_id, "control"),)
+        self._attr_icon = icon
+        self._attr_unique_id = f"{battery_id}_{key}"
+        self._attr_name = key
+        self._attr_has_entity_name = True
+
+    @property
+    def available(self):
+        return (
+            self.coordinator.last_update_success
+            and self._battery_id in self.coordinator.battery_index
+            and self.coordinator.controller.supported(self._battery_id)
+        )
+
+    async def async_press(self) -> None:
+        await self.coordinator.controller.async_set(self._battery_id, dict(self._parameters))
+
+    @property
+    def device_info(self):
+        return {
+            "identifiers": {(DOMAIN, device_identifier(("battery", self._battery_id)))},
+            "name": "Beem Battery",
+            "manufacturer": "Beem",
+            "model": "Beem Battery",
+            "configuration_url": "https://beem.energy/",
+        }
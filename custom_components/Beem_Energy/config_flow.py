@@ -1,11 +1,29 @@
 from homeassistant import config_entries
 import voluptuous as vol
-from .const import DOMAIN
+from .const import (
+    DOMAIN,
+    CONF_MAX_REQUESTS_PER_HOUR,
+    DEFAULT_MAX_REQUESTS_PER_HOUR,
+    CONF_PROFILING,
+    DEFAULT_PROFILING,
+    CONF_LIVE_STREAM,
+    DEFAULT_LIVE_STREAM,
+    CONF_IMPORT_PRICE,
+    DEFAULT_IMPORT_PRICE,
+    CONF_OFFPEAK_PRICE,
+    DEFAULT_OFFPEAK_PRICE,
+    CONF_OFFPEAK_HOURS,
+    DEFAULT_OFFPEAK_HOURS,
+    CONF_EXPORT_PRICE,
+    DEFAULT_EXPORT_PRICE,
+)
 import logging
+from .analytics import parse_offpeak_hours
 from .api import BeemApiClient
 from homeassistant.core import callback
+from homeassistant.data_entry_flow import AbortFlow
 import re  # Pour valider l'email
-from .storage import BeemSecureStorage  # Import du storage sécurisé
+from .storage import get_secure_storage  # Import du storage sécurisé
 
 _LOGGER = logging.getLogger(__name__)
 
@@ -35,37 +53,45 @@ class BeemConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
             elif not password:
                 errors["password"] = "empty_password"
             else:
-                api_client = BeemApiClient(email=email, password=password, token=None)
-
-                login_success = await api_client.login()
-                if login_success:
-                    try:
-                        batteries = await api_client.get_batteries()
-                        if batteries and isinstance(batteries, list) and "id" in batteries[0]:
-                            battery_id = batteries[0]["id"]
-                            token = api_client.token
-
-                            # Stockage sécurisé du mot de passe
-                            storage = BeemSecureStorage(self.hass)
-                            await storage.save_password(email, password)
-
-                            return self.async_create_entry(
-                                title=email,
-                                data={
-                                    "email": email,
-                                    "battery_id": battery_id
-                                },
-                                options={
-                                    "token": token
-                                }
-                            )
-                        else:
-                            errors["base"] = "no_battery_found"
-                    except Exception as e:
-                        _LOGGER.exception("Erreur lors de la récupération des batteries : %s", e)
-                        errors["base"] = "api_error"
-                else:
-                    errors["base"] = "auth_failed"
+                api_client = BeemApiClient(email=email, password=password, token=None, hass=self.hass)
+
+                try:
+                    login_success = await api_client.login()
+                    if login_success:
+                        try:
+                            devices = await api_client.get_devices()
+                            if devices and (devices["batteries"] or devices["beemboxes"]):
+                                # Une seule entrée par compte : toutes ses batteries et BeemBox sont découvertes
+                                await self.async_set_unique_id(email.lower())
+                                self._abort_if_unique_id_configured()
+
+                                token = api_client.token
+
+                                # Stockage sécurisé du mot de passe
+                                storage = get_secure_storage(self.hass)
+                                await storage.save_password(email, password)
+
+                                return self.async_create_entry(
+                                    title=email,
+                                    data={
+                                        "email": email,
+                                    },
+                                    options={
+                                        "token": token
+                                    }
+                                )
+                            else:
+                                errors["base"] = "no_battery_found"
+                        except AbortFlow:
+                            raise
+                        except Exception as e:
+                            _LOGGER.exception("Erreur lors de la récupération des équipements : %s", e)
+                            errors["base"] = "api_error"
+                    else:
+                        errors["base"] = "auth_failed"
+                finally:
+                    # Le client temporaire du flow ne doit pas garder de renouvellement planifié
+                    await api_client.async_close()
 
         return self.async_show_form(
             step_id="user",
@@ -82,13 +108,51 @@ class BeemOptionsFlowHandler(config_entries.OptionsFlow):
         self.config_entry = config_entry
 
     async def async_step_init(self, user_input=None):
+        errors = {}
         if user_input is not None:
-            return self.async_create_entry(title="", data=self.config_entry.options)
+            try:
+                parse_offpeak_hours(user_input.get(CONF_OFFPEAK_HOURS))
+            except ValueError:
+                errors[CONF_OFFPEAK_HOURS] = "invalid_offpeak_hours"
+            else:
+                return self.async_create_entry(title="", data={**self.config_entry.options, **user_input})
+
+        options = self.config_entry.options
 
         return self.async_show_form(
             step_id="init",
-            data_schema=vol.Schema({}),
+            data_schema=vol.Schema({
+                vol.Optional(
+                    CONF_MAX_REQUESTS_PER_HOUR,
+                    default=self.config_entry.options.get(CONF_MAX_REQUESTS_PER_HOUR, DEFAULT_MAX_REQUESTS_PER_HOUR),
+                ): vol.All(vol.Coerce(int), vol.Range(min=10, max=3600)),
+                vol.Optional(
+                    CONF_PROFILING,
+                    default=self.config_entry.options.get(CONF_PROFILING, DEFAULT_PROFILING),
+                ): bool,
+                vol.Optional(
+                    CONF_LIVE_STREAM,
+                    default=self.config_entry.options.get(CONF_LIVE_STREAM, DEFAULT_LIVE_STREAM),
+                ): bool,
+                vol.Optional(
+                    CONF_IMPORT_PRICE,
+                    default=options.get(CONF_IMPORT_PRICE, DEFAULT_IMPORT_PRICE),
+                ): vol.All(vol.Coerce(float), vol.Range(min=0)),
+                vol.Optional(
+                    CONF_OFFPEAK_PRICE,
+                    default=options.get(CONF_OFFPEAK_PRICE, DEFAULT_OFFPEAK_PRICE),
+                ): vol.All(vol.Coerce(float), vol.Range(min=0)),
+                vol.Optional(
+                    CONF_OFFPEAK_HOURS,
+                    default=options.get(CONF_OFFPEAK_HOURS, DEFAULT_OFFPEAK_HOURS),
+                ): str,
+                vol.Optional(
+                    CONF_EXPORT_PRICE,
+                    default=options.get(CONF_EXPORT_PRICE, DEFAULT_EXPORT_PRICE),
+                ): vol.All(vol.Coerce(float), vol.Range(min=0)),
+            }),
             description_placeholders={"info": "Générer le dashboard Power Flow"},
+            errors=errors,
         )
 
     @staticmethod
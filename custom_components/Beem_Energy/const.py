@@ -1 +1,76 @@
-DOMAIN = "Beem_Energy"
\ No newline at end of file
+DOMAIN = "Beem_Energy"
+
+# Intervalle de rafraîchissement par défaut (secondes)
+DEFAULT_SCAN_INTERVAL = 60
+
+# Rafraîchissement de /devices quand aucune BeemBox n'y publie ses mesures (secondes)
+DEVICES_SCAN_INTERVAL = 3600
+
+# Délai avant suppression d'un appareil disparu de /devices (secondes)
+DEVICE_REMOVAL_DELAY = 86400
+
+# Nombre maximal de requêtes simultanées vers l'API Beem pour un même compte
+MAX_CONCURRENT_REQUESTS = 4
+
+# Planification adaptative des rafraîchissements (secondes)
+MIN_SCAN_INTERVAL = 20
+MAX_SCAN_INTERVAL = 900
+ACTIVE_SCAN_INTERVAL = 30
+IDLE_SCAN_INTERVAL = 300
+
+# Flux push des données live : polling de contrôle quand il est actif, nouvel essai si le serveur n'en fournit pas (secondes)
+STREAM_POLL_INTERVAL = 900
+STREAM_UNSUPPORTED_RETRY = 3600
+
+# Budget de requêtes par heure (option de l'entrée)
+CONF_MAX_REQUESTS_PER_HOUR = "max_requests_per_hour"
+DEFAULT_MAX_REQUESTS_PER_HOUR = 240
+
+# Flux push des données live (option de l'entrée)
+CONF_LIVE_STREAM = "live_stream"
+DEFAULT_LIVE_STREAM = True
+
+# Bilan énergétique tarifé (options de l'entrée ; prix par kWh, plages « HH:MM-HH:MM » séparées par des virgules)
+CONF_IMPORT_PRICE = "import_price"
+CONF_OFFPEAK_PRICE = "offpeak_price"
+CONF_OFFPEAK_HOURS = "offpeak_hours"
+CONF_EXPORT_PRICE = "export_price"
+DEFAULT_IMPORT_PRICE = 0.25
+DEFAULT_OFFPEAK_PRICE = 0.2
+DEFAULT_OFFPEAK_HOURS = ""
+DEFAULT_EXPORT_PRICE = 0.04
+SERVICE_QUERY_ANALYTICS = "query_analytics"
+
+# Profilage des cycles les plus lents dans les logs (option de l'entrée)
+CONF_PROFILING = "profiling"
+DEFAULT_PROFILING = False
+
+# Intégration des compteurs d'énergie : un trou n'est plafonné qu'au-delà du plus long
+# intervalle planifié (polling espacé ou contrôle en mode push), plus une marge de latence
+ENERGY_INTEGRATION_METHOD = "trapezoidal"
+ENERGY_MAX_GAP = max(MAX_SCAN_INTERVAL, STREAM_POLL_INTERVAL) + 300
+
+# Résumés mensuels BeemBox (/box/summary)
+SUMMARY_SCAN_INTERVAL = 900
+SUMMARY_BACKFILL_REQUESTS_PER_SECOND = 2
+SERVICE_BACKFILL_SUMMARY = "backfill_summary"
+
+# Série temporelle locale (sauvegarde périodique, secondes)
+TIMESERIES_FLUSH_INTERVAL = 900
+TIMESERIES_BATTERY_FIELDS = ("batteryPower", "meterPower", "solarPower", "soc")
+SERVICE_QUERY_HISTORY = "query_history"
+
+# Import des énergies horaires dans les statistiques long terme
+STATISTICS_IMPORT_INTERVAL = 3600
+STATISTICS_BACKFILL_DAYS = 31
+STATISTICS_HISTORY_CHUNK_DAYS = 7
+SERVICE_IMPORT_STATISTICS = "import_statistics"
+
+# Pilotage des batteries : modes de fonctionnement et regroupement des écritures (secondes)
+BATTERY_WORKING_MODES = ("auto", "pause", "advanced")
+CONTROL_DEBOUNCE = 2.0
+
+# Prévision locale (horizon en heures, recalcul au plus toutes les N secondes, demi-vie de l'apprentissage)
+FORECAST_HOURS = 24
+FORECAST_INTERVAL = 300
+FORECAST_HALF_LIFE = 3 * 86400
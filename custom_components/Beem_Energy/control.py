@@ -0,0 +1,176 @@
+"""Pilotage des batteries : paramètres écrits via l'API Beem, regroupés puis confirmés par une lecture live-data."""
+
+from functools import partial
+import asyncio
+import logging
+
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.exceptions import HomeAssistantError
+from homeassistant.helpers.entity_platform import AddEntitiesCallback
+from homeassistant.helpers.event import async_call_later
+
+from .const import CONTROL_DEBOUNCE
+from .exceptions import BeemApiError, BeemResponseError
+
+_LOGGER = logging.getLogger(__name__)
+
+# Statuts indiquant que l'API ne fournit pas de paramètres de pilotage
+UNSUPPORTED_STATUSES = (404, 405, 501)
+
+
+class BeemBatteryController:
+    """Paramètres de pilotage des batteries d'un compte (mode de fonctionnement, limites de charge).
+
+    Les changements sont fusionnés en une seule écriture par batterie, envoyée
+    `CONTROL_DEBOUNCE` secondes après le dernier d'entre eux (la dernière valeur de chaque
+    paramètre l'emporte) ; tous les appelants attendent cette écriture. Elle est ensuite confirmée par une
+    lecture live-data ciblée, sans attendre le prochain cycle de polling.
+    """
+
+    def __init__(self, hass: HomeAssistant, coordinator):
+        self.hass = hass
+        self.coordinator = coordinator
+        # Dernier état connu côté API, par batterie ; False si l'API n'en fournit pas
+        self.parameters = {}
+        self.writes = 0
+        self._pending = {}
+        self._waiters = {}
+        self._timers = {}
+        self._locks = {}
+
+    async def async_load(self, battery_ids) -> None:
+        """Lit les paramètres actuels des batteries (une requête par batterie)."""
+        for battery_id in battery_ids:
+            if battery_id in self.parameters:
+                continue
+            try:
+                parameters = await self.coordinator.api_client.get_control_parameters(battery_id)
+            except BeemResponseError as err:
+                if err.status not in UNSUPPORTED_STATUSES:
+                    _LOGGER.warning("Paramètres de pilotage illisibles pour la batterie %s : %s", battery_id, err)
+                    continue
+                _LOGGER.info("Pilotage non proposé par l'API Beem pour la batterie %s (%s)", battery_id, err)
+                self.parameters[battery_id] = False
+            except BeemApiError as err:
+                _LOGGER.warning("Paramètres de pilotage illisibles pour la batterie %s : %s", battery_id, err)
+                continue
+            else:
+                self.parameters[battery_id] = parameters if isinstance(parameters, dict) else {}
+            self.coordinator.async_battery_updated((battery_id,), "control")
+
+    def supported(self, battery_id) -> bool:
+        return self.parameters.get(battery_id) is not False
+
+    def is_pending(self, battery_id, key: str) -> bool:
+        return key in self._pending.get(battery_id, {})
+
+    def value(self, battery_id, key: str):
+        """Valeur affichée : changement en attente d'écriture, sinon dernier état connu."""
+        pending = self._pending.get(battery_id)
+        if pending and key in pending:
+            return pending[key]
+        parameters = self.parameters.get(battery_id)
+        return parameters.get(key) if parameters else None
+
+    async def async_set(self, battery_id, changes: dict) -> None:
+        """Ajoute des changements à l'écriture groupée de la batterie et attend qu'elle soit faite.
+
+        Lève `HomeAssistantError` si les limites sont incohérentes ou si l'écriture échoue.
+        """
+        if not self.supported(battery_id):
+            raise HomeAssistantError(f"Pilotage non proposé par l'API Beem pour la batterie {battery_id}")
+        pending = {**self._pending.get(battery_id, {}), **changes}
+        min_soc = pending.get("minSoc", self.value(battery_id, "minSoc"))
+        max_soc = pending.get("maxSoc", self.value(battery_id, "maxSoc"))
+        if min_soc is not None and max_soc is not None and min_soc > max_soc:
+            raise HomeAssistantError(f"SOC minimal ({min_soc} %) supérieur au SOC maximal ({max_soc} %)")
+
+        self._pending[battery_id] = pending
+        waiter = self._waiters.get(battery_id)
+        if waiter is None:
+            waiter = self._waiters[battery_id] = self.hass.loop.create_future()
+            # Résultat consommé même si tous les appelants ont été annulés entre-temps
+            waiter.add_done_callback(_consume_result)
+        # Délai relancé à chaque changement : l'écriture part après le dernier
+        cancel = self._timers.pop(battery_id, None)
+        if cancel is not None:
+            cancel()
+        self._timers[battery_id] = async_call_later(self.hass, CONTROL_DEBOUNCE, partial(self._async_flush, battery_id))
+        # Affichage immédiat de la valeur demandée
+        self.coordinator.async_battery_updated((battery_id,), "control")
+        # Un appelant annulé n'annule pas l'écriture partagée
+        await asyncio.shield(waiter)
+
+    async def _async_flush(self, battery_id, _now=None) -> None:
+        self._timers.pop(battery_id, None)
+        lock = self._locks.setdefault(battery_id, asyncio.Lock())
+        async with lock:
+            changes = self._pending.pop(battery_id, None)
+            waiter = self._waiters.pop(battery_id, None)
+            if not changes:
+                return
+            try:
+                result = await self.coordinator.api_client.set_control_parameters(battery_id, changes)
+            except BeemApiError as err:
+                _LOGGER.warning("Écriture des paramètres de la batterie %s refusée : %s", battery_id, err)
+                waiter.set_exception(HomeAssistantError(f"Écriture refusée par l'API Beem : {err}"))
+                self.coordinator.async_battery_updated((battery_id,), "control")
+                return
+
+            self.writes += 1
+            parameters = self.parameters.get(battery_id) or {}
+            self.parameters[battery_id] = {**parameters, **changes, **(result if isinstance(result, dict) else {})}
+            waiter.set_result(None)
+            _LOGGER.debug("Paramètres de la batterie %s écrits : %s", battery_id, changes)
+            self.coordinator.async_battery_updated((battery_id,), "control")
+
+            # Confirmation : relecture immédiate des données live de cette batterie
+            await self.coordinator.async_refresh_battery(battery_id)
+
+    @callback
+    def async_shutdown(self) -> None:
+        for cancel in self._timers.values():
+            cancel()
+        self._timers.clear()
+        for waiter in self._waiters.values():
+            if not waiter.done():
+                waiter.set_exception(HomeAssistantError("Intégration Beem déchargée avant l'écriture"))
+        self._waiters.clear()
+        self._pending.clear()
+
+
+def _consume_result(future: asyncio.Future) -> None:
+    if not future.cancelled():
+        future.exception()
+
+
+@callback
+def async_setup_battery_entities(
+    coordinator, entry: ConfigEntry, async_add_entities: AddEntitiesCallback, platform: str, factory
+) -> None:
+    """Crée les entités de pilotage de chaque batterie, y compris celles découvertes après le démarrage.
+
+    Comme pour les capteurs, une batterie n'est oubliée (`coordinator.entity_devices`) qu'à
+    la suppression de son appareil : une batterie absente d'un seul /devices retrouve ses entités.
+    """
+    from .coordinator import device_identifier
+
+    @callback
+    def _async_add_new_batteries():
+        entities = []
+        for battery_id in coordinator.battery_ids:
+            platforms = coordinator.entity_devices.setdefault(device_identifier(("battery", battery_id)), set())
+            if platform not in platforms:
+                platforms.add(platform)
+                entities.extend(factory(coordinator, battery_id))
+        if entities:
+            async_add_entities(entities)
+
+    @callback
+    def _async_handle_coordinator_update():
+        if coordinator.devices_changed:
+            _async_add_new_batteries()
+
+    _async_add_new_batteries()
+    entry.async_on_unload(coordinator.async_add_listener(_async_handle_coordinator_update))
@@ -1,100 +1,524 @@
 from datetime import timedelta
+from functools import partial
+import asyncio
 import logging
+import time
 
 from homeassistant.helpers.update_coordinator import DataUpdateCoordinator, UpdateFailed
-from homeassistant.core import HomeAssistant
+from homeassistant.core import CALLBACK_TYPE, HomeAssistant, callback
+from homeassistant.helpers.storage import Store
 
-from .const import DOMAIN
+from homeassistant.util import dt as dt_util, slugify
+
+from .const import (
+    DOMAIN,
+    DEFAULT_SCAN_INTERVAL,
+    DEFAULT_MAX_REQUESTS_PER_HOUR,
+    DEFAULT_EXPORT_PRICE,
+    DEFAULT_IMPORT_PRICE,
+    DEVICES_SCAN_INTERVAL,
+    MAX_CONCURRENT_REQUESTS,
+    STREAM_POLL_INTERVAL,
+    TIMESERIES_BATTERY_FIELDS,
+)
+from .analytics import BeemAnalytics, BeemTariff
 from .api import BeemApiClient
+from .backfill import BeemStatisticsImporter
+from .control import BeemBatteryController
+from .forecast import BeemForecaster
+from .scheduler import BeemPollScheduler
+from .history import BeemSummaryHistory
+from .stream import BeemLiveStream
+from .exceptions import BeemApiError, BeemCircuitOpenError
+from .models import BeemBox, Battery, LiveData, parse_timestamp
+from .timeseries import BeemTimeSeriesStore
 
 _LOGGER = logging.getLogger(__name__)
 
+# Dernier état connu (devices, live-data, résumé), pour un démarrage sans attendre le cloud
+CACHE_STORAGE_VERSION = 1
+CACHE_SAVE_DELAY = 60
+
+
+def equipment_key(equipment: dict, index: int):
+    """Identifiant stable d'un équipement solaire (mpptId, à défaut sa position)."""
+    return equipment.get("mpptId", f"solar_{index}")
+
+
+def beembox_key(box: dict):
+    """Identifiant stable d'une BeemBox (adresse MAC, à défaut son id)."""
+    return box.get("macAddress") or box.get("id") or "unknown"
+
+
+def device_identifier(device_key: tuple) -> str:
+    """Identifiant de l'appareil Home Assistant correspondant à une clé d'appareil du coordinateur."""
+    kind, *ids = device_key
+    if kind == "battery":
+        return str(ids[0])
+    return "_".join(str(part) for part in (kind, *ids))
+
+
+def _is_older(battery: LiveData, reference: LiveData) -> bool:
+    return bool(battery.measured_at and reference.measured_at and battery.measured_at < reference.measured_at)
+
 
 class BeemCoordinator(DataUpdateCoordinator):
-    def __init__(self, hass: HomeAssistant, api: BeemApiClient, battery_id: int = None):
-        """Initialise le coordinateur Beem."""
+    def __init__(
+        self,
+        hass: HomeAssistant,
+        api: BeemApiClient,
+        max_requests_per_hour: int = DEFAULT_MAX_REQUESTS_PER_HOUR,
+        profiling: bool = False,
+        tariff: BeemTariff | None = None,
+    ):
+        """Initialise le coordinateur Beem (un par compte)."""
         self.hass = hass
         self.api_client = api
-        self.battery_id = battery_id
-        self.solar_equipments = []
+        self.metrics = api.metrics
+        self.metrics.profiling = profiling
+        self.battery_ids = []
+        self.solar_equipments = {}
         self.beemboxes = []
+        self.battery_index = {}
+        self.solar_index = {}
+        self.beembox_index = {}
+        self.scheduler = BeemPollScheduler(max_requests_per_hour)
+        self.history = BeemSummaryHistory(hass, api)
+        self.timeseries = BeemTimeSeriesStore(hass, api.email)
+        self.statistics = BeemStatisticsImporter(hass, self)
+        self.analytics = BeemAnalytics(hass, api.email, tariff or BeemTariff(DEFAULT_IMPORT_PRICE, DEFAULT_EXPORT_PRICE))
+        self.forecaster = BeemForecaster(hass, self)
+        self.controller = BeemBatteryController(hass, self)
+        self.changed_keys = set()
+        self.changed_devices = set()
+        # Appareils présents dans /devices et signalement des ajouts/retraits
+        self.device_keys = set()
+        self.devices_changed = False
+        # Appareils dont les entités existent : identifiant Home Assistant -> plateformes qui les ont créées
+        self.entity_devices = {}
+        self._previous_values = {}
+        # Abonnements des entités, regroupés par appareil (un listener du coordinateur par appareil)
+        self._device_listeners = {}
+        self._device_unsubscribes = {}
+        self._device_last_success = {}
+        # Abonnements notifiés à la fin de chaque cycle, même sans donnée nouvelle (mesures de performance)
+        self._cycle_listeners = []
+        self._semaphore = asyncio.Semaphore(MAX_CONCURRENT_REQUESTS)
+        self._devices = None
+        self._devices_fetched_at = None
+        # Réponse live-data brute et modèle associé, par batterie
+        self._live_cache = {}
+        self._cache_store = Store(hass, CACHE_STORAGE_VERSION, f"{DOMAIN}_cache_{slugify(api.email)}")
+        # Flux push : tant qu'il est actif, le polling ne sert plus que de contrôle
+        self.live_stream = BeemLiveStream(hass, self)
+        self.push_active = False
+        # Début de la période où les données servies sont périmées (cache, disjoncteur ouvert)
+        self.stale_since = None
 
         super().__init__(
             hass,
             _LOGGER,
-            name=f"{DOMAIN}_{battery_id if battery_id else 'pnp'}",
-            update_interval=timedelta(seconds=60),
+            name=f"{DOMAIN}_{api.email}",
+            update_interval=timedelta(seconds=DEFAULT_SCAN_INTERVAL),
+            # Les modèles inchangés sont réutilisés : un cycle sans nouveauté ne notifie pas les entités
+            always_update=False,
         )
 
     async def _async_update_data(self):
         """Tâche périodique : mise à jour des données."""
+        # Un cycle en échec ne doit pas rejouer les changements du cycle précédent
+        self.changed_keys = set()
+        self.changed_devices = set()
+        self.devices_changed = False
+        profile = self.metrics.start_cycle()
         try:
             data = {}
 
-            # 🔋 Partie batterie BeemSolid
-            if self.battery_id is not None:
-                # 1. Récupération des batteries
-                batteries = await self.api_client.get_batteries()
-                if not batteries:
-                    raise UpdateFailed("Erreur lors de la récupération des batteries")
-
-                # 2. Trouver la bonne batterie
-                battery_data = next((b for b in batteries if b.get("id") == self.battery_id), None)
-                if battery_data is None:
-                    raise UpdateFailed(f"Batterie {self.battery_id} non trouvée")
-
-                # 3. Équipements solaires
-                self.solar_equipments = battery_data.get("solarEquipments", [])
-
-                # 4. Données live
-                live_data = await self.api_client.get_live_data(self.battery_id)
-                if live_data is None:
-                    _LOGGER.warning("Token expiré. Tentative de reconnexion...")
-                    if not self.api_client.password:
-                        raise UpdateFailed("Mot de passe requis pour renouveler le token")
-
-                    login_successful = await self.api_client.login()
-                    if not login_successful:
-                        raise UpdateFailed("Échec du renouvellement du token")
-
-                    live_data = await self.api_client.get_live_data(self.battery_id)
-                    if live_data is None:
-                        raise UpdateFailed("Données live toujours indisponibles après reconnexion")
-
-                    await self._update_token_in_entry()
-                    self.async_update_listeners()
-
-                # 5. Injecter les équipements solaires dans les données live
-                live_data["solarEquipments"] = self.solar_equipments
-                data["battery"] = live_data
-
-            # ☀️ Partie BeemBox (PnP)
-            try:
-                self.beemboxes = await self.api_client.get_beemboxes()
-                data["beemboxes"] = self.beemboxes
-            except Exception as box_err:
-                _LOGGER.warning(f"Erreur lors de la récupération des BeemBox: {box_err}")
-                self.beemboxes = []
-                data["beemboxes"] = []
+            # 📦 Un seul appel /devices, partagé entre batteries et BeemBox (PnP)
+            with profile.stage("devices"):
+                devices = await self._async_get_devices()
+            devices_changed = devices is not self._devices
+            if devices_changed:
+                self._set_devices(devices)
+
+            # 🔋 Partie batteries BeemSolid : données live en parallèle
+            with profile.stage("live_data"):
+                live_data = await self._fetch_all_live_data(self.battery_ids)
+            batteries = self._parse_live_data(live_data)
+
+            if self.battery_ids and not batteries:
+                raise UpdateFailed("Données live indisponibles pour toutes les batteries")
+
+            data["batteries"] = batteries
+            data["beemboxes"] = self.beemboxes
+
+            # 📅 Résumé mensuel BeemBox, sur son propre rythme (plus lent)
+            with profile.stage("summary"):
+                data["summary"] = await self._refresh_summary()
+            data["stale"] = False
+
+            changed = (
+                devices_changed
+                or data["summary"] is not (self.data or {}).get("summary")
+                or batteries.keys() != self.battery_index.keys()
+                or any(model is not self.battery_index[battery_id] for battery_id, model in batteries.items())
+            )
+
+            # Rien de nouveau : index, détection des changements et historique déjà à jour
+            if changed:
+                with profile.stage("processing"):
+                    # 🗂️ Index des équipements (lecture en O(1) par les entités)
+                    self._build_indexes(batteries)
 
+                    # 🔍 Détection des valeurs modifiées depuis le cycle précédent
+                    self._detect_changes()
+
+                    # 📈 Historique local compact des mesures
+                    self._record_samples()
+
+                with profile.stage("analytics"):
+                    # 🧮 Bilan énergétique tarifé, à partir des échantillons reçus depuis le cycle précédent
+                    self._update_analytics(batteries)
+
+                # 🔮 Prévisions recalculées en arrière-plan, hors de la boucle
+                self.forecaster.async_schedule(batteries)
+
+                self._cache_store.async_delay_save(self._cache_data, CACHE_SAVE_DELAY)
+
+            # ⏱️ Prochain cycle calé sur la fraîcheur des mesures et l'activité
+            update_interval = self.scheduler.next_interval(
+                batteries,
+                self.beemboxes,
+                requests_per_cycle=(1 if self.beemboxes else 0) + len(self.battery_ids),
+            )
+            if self.push_active:
+                update_interval = max(update_interval, timedelta(seconds=STREAM_POLL_INTERVAL))
+            self.update_interval = update_interval
+
+            self._set_stale(False)
             return data
 
+        except BeemCircuitOpenError as err:
+            # Cloud Beem en incident : on sert les dernières données connues, marquées comme périmées
+            if not self.data:
+                raise UpdateFailed(f"API Beem indisponible : {err}")
+            _LOGGER.debug("Disjoncteur ouvert, données précédentes conservées : %s", err)
+            self.update_interval = timedelta(seconds=self.api_client.circuit_breaker.recovery_timeout)
+            self._set_stale(True)
+            return {**self.data, "stale": True}
+        except UpdateFailed:
+            raise
         except Exception as err:
             raise UpdateFailed(f"Erreur inattendue lors de l’update : {err}")
+        finally:
+            self.metrics.finish_cycle(profile)
+            for update_callback in list(self._cycle_listeners):
+                update_callback()
+
+    async def async_restore_cache(self) -> bool:
+        """Recharge le dernier état connu, marqué périmé, pour créer les entités sans attendre le cloud."""
+        cached = await self._cache_store.async_load()
+        if not cached or not isinstance(cached.get("devices"), dict):
+            return False
+
+        try:
+            self._set_devices(cached["devices"])
+            batteries = self._parse_live_data({battery_id: live for battery_id, live in cached.get("live_data", [])})
+            summary = cached.get("summary")
+            self._apply_summary(summary)
+            self._build_indexes(batteries)
+            self._detect_changes()
+        except (KeyError, TypeError, ValueError, AttributeError) as err:
+            _LOGGER.warning("Cache Beem illisible, démarrage sans cache : %s", err)
+            return False
+
+        self.data = {"batteries": batteries, "beemboxes": self.beemboxes, "summary": summary, "stale": True}
+        self.stale_since = dt_util.utcnow()
+        return True
+
+    def _cache_data(self) -> dict:
+        return {
+            "devices": self._devices,
+            "live_data": [
+                [battery_id, live]
+                for battery_id, (live, model) in self._live_cache.items()
+                if self.battery_index.get(battery_id) is model
+            ],
+            "summary": self.history.current,
+        }
+
+    def _set_devices(self, devices: dict) -> None:
+        self._devices = devices
+        battery_models = [Battery.from_dict(b) for b in devices["batteries"]]
+        self.battery_ids = [b.id for b in battery_models if b.id is not None]
+        self.solar_equipments = {b.id: b.solar_equipments for b in battery_models if b.id is not None}
+        self.beemboxes = [BeemBox.from_dict(box) for box in devices["beemboxes"] if isinstance(box, dict)]
 
-    async def _update_token_in_entry(self):
-        """Met à jour dynamiquement le token dans l'entrée de configuration."""
-        entry = next(
-            (
-                e for e in self.hass.config_entries.async_entries(DOMAIN)
-                if e.data.get("email") == self.api_client.email
-                and (self.battery_id is None or e.data.get("battery_id") == self.battery_id)
-            ),
-            None
+    def _parse_live_data(self, live_data: dict) -> dict:
+        batteries = {}
+        for battery_id in self.battery_ids:
+            battery_live = live_data.get(battery_id)
+            if battery_live is None:
+                _LOGGER.warning("Données live indisponibles pour la batterie %s", battery_id)
+                continue
+            # Réponse inchangée (même objet renvoyé par le client) : modèle précédent réutilisé
+            cached = self._live_cache.get(battery_id)
+            if cached is None or cached[0] is not battery_live:
+                battery = LiveData.from_dict(battery_live)
+                # Mesure plus ancienne que celle déjà reçue par le flux push : ignorée
+                if cached is None or not _is_older(battery, cached[1]):
+                    cached = self._live_cache[battery_id] = (battery_live, battery)
+            batteries[battery_id] = cached[1]
+        return batteries
+
+    async def _async_get_devices(self) -> dict:
+        """/devices à chaque cycle si des BeemBox y publient leurs mesures, sinon à intervalle long."""
+        now = time.monotonic()
+        if (
+            self._devices_fetched_at is None
+            or self.beemboxes
+            or now - self._devices_fetched_at >= DEVICES_SCAN_INTERVAL
+        ):
+            devices = await self.api_client.get_devices()
+            self._devices_fetched_at = now
+            return devices
+        return self._devices
+
+    async def _refresh_summary(self) -> list | None:
+        """Rafraîchit le résumé du mois courant et complète totalDay/totalMonth des BeemBox."""
+        if not self.beemboxes:
+            return None
+        try:
+            summary = await self.history.async_refresh_current()
+        except Exception as err:
+            _LOGGER.warning("Erreur lors de la récupération du résumé BeemBox : %s", err)
+            return self.history.current
+
+        self._apply_summary(summary)
+        return summary
+
+    def _apply_summary(self, summary: list | None) -> None:
+        if not isinstance(summary, list):
+            return
+        by_box = {beembox_key(entry): entry for entry in summary if isinstance(entry, dict)}
+        for box in self.beemboxes:
+            entry = by_box.get(beembox_key(box))
+            if entry is None:
+                continue
+            for field in ("totalDay", "totalMonth"):
+                if entry.get(field) is not None:
+                    box.set(field, entry[field])
+
+    @callback
+    def async_set_push_active(self, active: bool) -> None:
+        """Bascule entre le mode push (polling de contrôle espacé) et le polling normal."""
+        if active == self.push_active:
+            return
+        self.push_active = active
+        if not active:
+            # Reprise immédiate du polling, sans attendre le cycle de contrôle planifié
+            self.hass.async_create_task(self.async_request_refresh())
+
+    @callback
+    def async_push_live_data(self, battery_id, live: dict | None) -> None:
+        """Applique une mesure reçue par le flux push, sans attendre le prochain cycle."""
+        previous = self.battery_index.get(battery_id)
+        if previous is None or not isinstance(live, dict) or not self.data:
+            # Batterie inconnue : elle sera découverte par le prochain /devices
+            return
+        battery = LiveData.from_dict(live)
+        if _is_older(battery, previous):
+            return
+
+        old_values = {("battery", battery_id, field): value for field, value in previous.items()}
+        values = {("battery", battery_id, field): value for field, value in battery.items()}
+        self.changed_keys = {key for key, value in values.items() if key not in old_values or old_values[key] != value}
+        self.changed_keys.update(old_values.keys() - values.keys())
+        if not self.changed_keys:
+            return
+        self.changed_devices = {("battery", battery_id)}
+        self.devices_changed = False
+        for key in old_values.keys() - values.keys():
+            self._previous_values.pop(key, None)
+        self._previous_values.update(values)
+
+        self._live_cache[battery_id] = (live, battery)
+        self.battery_index = {**self.battery_index, battery_id: battery}
+        self._record_battery_samples(battery_id, battery, dt_util.utcnow())
+        self._update_analytics((battery_id,))
+        self.forecaster.async_schedule((battery_id,))
+        self._set_stale(False)
+        self.data = {**self.data, "batteries": self.battery_index, "stale": False}
+        self._cache_store.async_delay_save(self._cache_data, CACHE_SAVE_DELAY)
+        self.async_update_listeners()
+
+    def _update_analytics(self, battery_ids) -> None:
+        for battery_id in self.analytics.update(self.timeseries, battery_ids):
+            self.changed_keys.add(("battery", battery_id, "analytics"))
+            self.changed_devices.add(("battery", battery_id))
+
+    async def async_refresh_battery(self, battery_id) -> None:
+        """Relit les données live d'une seule batterie (confirmation d'une écriture), sans attendre le prochain cycle."""
+        try:
+            live = await self._fetch_live_data(battery_id)
+        except BeemApiError as err:
+            _LOGGER.warning("Confirmation impossible pour la batterie %s : %s", battery_id, err)
+            return
+        self.async_push_live_data(battery_id, live)
+
+    @callback
+    def async_battery_updated(self, battery_ids, key: str) -> None:
+        """Notifie les entités des batteries dont une valeur calculée hors cycle a changé (prévision, pilotage)."""
+        self.changed_keys = {("battery", battery_id, key) for battery_id in battery_ids}
+        self.changed_devices = {("battery", battery_id) for battery_id in battery_ids}
+        self.devices_changed = False
+        self.async_update_listeners()
+
+    def _record_samples(self) -> None:
+        now = dt_util.utcnow()
+        for battery_id, battery in self.battery_index.items():
+            self._record_battery_samples(battery_id, battery, now)
+        for box_id, box in self.beembox_index.items():
+            timestamp = parse_timestamp(box.last_production) or now
+            self.timeseries.record(f"beembox_{box_id}_power", timestamp, box.power)
+
+    def _record_battery_samples(self, battery_id, battery: LiveData, now) -> None:
+        timestamp = battery.measured_at or now
+        for field in TIMESERIES_BATTERY_FIELDS:
+            self.timeseries.record(f"battery_{battery_id}_{field}", timestamp, battery.get(field))
+
+    @property
+    def stale(self) -> bool:
+        """Indique si les données servies sont les dernières connues plutôt qu'une réponse fraîche."""
+        return bool((self.data or {}).get("stale"))
+
+    def _set_stale(self, stale: bool) -> None:
+        """Note le passage entre données fraîches et périmées ; tous les appareils sont alors notifiés."""
+        if stale == self.stale:
+            return
+        self.stale_since = dt_util.utcnow() if stale else None
+        self.changed_devices.update(self.device_keys)
+
+    def has_changed(self, key: tuple) -> bool:
+        """Indique si la valeur identifiée par `key` a changé lors du dernier cycle."""
+        return key in self.changed_keys
+
+    @callback
+    def async_add_cycle_listener(self, update_callback: CALLBACK_TYPE) -> CALLBACK_TYPE:
+        """Abonne une entité à la fin de chaque cycle, réussi ou non, que les données aient changé ou pas."""
+        self._cycle_listeners.append(update_callback)
+
+        @callback
+        def remove_listener() -> None:
+            self._cycle_listeners.remove(update_callback)
+
+        return remove_listener
+
+    @callback
+    def async_add_device_listener(self, device_key: tuple, update_callback: CALLBACK_TYPE) -> CALLBACK_TYPE:
+        """Abonne une entité aux mises à jour de son appareil.
+
+        Les entités d'un même appareil partagent un seul listener du coordinateur, qui
+        ne les appelle que si une valeur de l'appareil ou la disponibilité a changé.
+        """
+        callbacks = self._device_listeners.get(device_key)
+        if callbacks is None:
+            callbacks = self._device_listeners[device_key] = []
+            self._device_last_success[device_key] = self.last_update_success
+            self._device_unsubscribes[device_key] = self.async_add_listener(
+                partial(self._async_dispatch_device_update, device_key)
+            )
+        callbacks.append(update_callback)
+
+        @callback
+        def remove_listener() -> None:
+            callbacks.remove(update_callback)
+            if not callbacks:
+                del self._device_listeners[device_key]
+                del self._device_last_success[device_key]
+                self._device_unsubscribes.pop(device_key)()
+
+        return remove_listener
+
+    @callback
+    def _async_dispatch_device_update(self, device_key: tuple) -> None:
+        success_changed = self._device_last_success[device_key] != self.last_update_success
+        if not success_changed and device_key not in self.changed_devices:
+            return
+        self._device_last_success[device_key] = self.last_update_success
+        for update_callback in list(self._device_listeners[device_key]):
+            update_callback()
+
+    def _build_indexes(self, batteries: dict) -> None:
+        self.battery_index = batteries
+        self.solar_index = {
+            (battery_id, equipment_key(equipment, idx)): equipment
+            for battery_id, equipments in self.solar_equipments.items()
+            for idx, equipment in enumerate(equipments)
+        }
+        self.beembox_index = {beembox_key(box): box for box in self.beemboxes}
+
+        device_keys = {("battery", battery_id) for battery_id in self.battery_ids}
+        device_keys.update(("solar", battery_id, equipment_id) for battery_id, equipment_id in self.solar_index)
+        device_keys.update(("beembox", box_id) for box_id in self.beembox_index)
+        if device_keys != self.device_keys:
+            _LOGGER.debug(
+                "Appareils Beem : %d ajouté(s), %d retiré(s)",
+                len(device_keys - self.device_keys),
+                len(self.device_keys - device_keys),
+            )
+            self.devices_changed = True
+            self.device_keys = device_keys
+
+    def _detect_changes(self) -> None:
+        values = {}
+        for battery_id, battery in self.battery_index.items():
+            for field, value in battery.items():
+                values[("battery", battery_id, field)] = value
+        for (battery_id, equipment_id), equipment in self.solar_index.items():
+            for field, value in equipment.items():
+                values[("solar", battery_id, equipment_id, field)] = value
+        for box_id, box in self.beembox_index.items():
+            for field, value in box.items():
+                values[("beembox", box_id, field)] = value
+
+        previous = self._previous_values
+        self.changed_keys = {key for key, value in values.items() if key not in previous or previous[key] != value}
+        self.changed_keys.update(key for key in previous if key not in values)
+        self.changed_devices = {key[:-1] for key in self.changed_keys}
+        self._previous_values = values
+
+    async def _fetch_all_live_data(self, battery_ids: list) -> dict:
+        """Récupère les données live de plusieurs batteries en parallèle (concurrence bornée).
+
+        Lève `BeemCircuitOpenError` si le disjoncteur est ouvert avant l'envoi ou si aucune
+        batterie n'a répondu à cause de lui : le cycle sert alors les données précédentes.
+        """
+        breaker = self.api_client.circuit_breaker
+        if battery_ids and breaker.is_open:
+            raise BeemCircuitOpenError("API Beem indisponible, disjoncteur ouvert")
+        results = []
+        if battery_ids and breaker.state == breaker.HALF_OPEN:
+            # Essai de reprise : une seule batterie d'abord, les autres seulement si le cloud répond
+            results = await asyncio.gather(self._fetch_live_data(battery_ids[0]), return_exceptions=True)
+        results += await asyncio.gather(
+            *(self._fetch_live_data(battery_id) for battery_id in battery_ids[len(results):]),
+            return_exceptions=True,
         )
 
-        if entry:
-            new_options = dict(entry.options)
-            new_options["token"] = self.api_client.token
-            await self.hass.config_entries.async_update_entry(entry, options=new_options)
-            _LOGGER.info("Token mis à jour dans les options de configuration Beem.")
+        if results and all(isinstance(result, Exception) for result in results):
+            for result in results:
+                if isinstance(result, BeemCircuitOpenError):
+                    raise result
+
+        live_data = {}
+        for battery_id, result in zip(battery_ids, results):
+            if isinstance(result, Exception):
+                _LOGGER.warning("Erreur live-data pour la batterie %s : %s", battery_id, result)
+                result = None
+            live_data[battery_id] = result
+        return live_data
+
+    async def _fetch_live_data(self, battery_id: int) -> dict | None:
+        async with self._semaphore:
+            return await self.api_client.get_live_data(battery_id)
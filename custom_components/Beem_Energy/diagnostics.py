@@ -0,0 +1,49 @@
+"""Diagnostics Beem : état du client API, mesures de performance et équipements suivis."""
+
+from homeassistant.components.diagnostics import async_redact_data
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.core import HomeAssistant
+from homeassistant.util import dt as dt_util
+
+from .const import DOMAIN
+
+TO_REDACT = {"email", "token", "password", "macAddress", "serialNumber", "title", "unique_id"}
+
+
+async def async_get_config_entry_diagnostics(hass: HomeAssistant, entry: ConfigEntry) -> dict:
+    coordinator = hass.data[DOMAIN][entry.entry_id]
+    api = coordinator.api_client
+    tokens = api.token_manager
+
+    return {
+        "entry": async_redact_data(entry.as_dict(), TO_REDACT),
+        "api": {
+            "base_url": api.base_url,
+            "circuit_breaker": api.circuit_breaker.state,
+            "token_valid": tokens.is_valid(),
+            "token_expires_at": dt_util.utc_from_timestamp(tokens.expires_at).isoformat() if tokens.expires_at else None,
+            "token_refreshes": tokens.refresh_count,
+        },
+        "coordinator": {
+            "last_update_success": coordinator.last_update_success,
+            "update_interval": coordinator.update_interval.total_seconds() if coordinator.update_interval else None,
+            "stale": coordinator.stale,
+            "stale_since": coordinator.stale_since.isoformat() if coordinator.stale_since else None,
+            "batteries": len(coordinator.battery_ids),
+            "solar_equipments": len(coordinator.solar_index),
+            "beemboxes": len(coordinator.beembox_index),
+            "changed_keys": len(coordinator.changed_keys),
+            "timeseries": len(coordinator.timeseries.series),
+        },
+        "live_stream": {
+            "supported": coordinator.live_stream.supported,
+            "connected": coordinator.live_stream.connected,
+            "events": coordinator.live_stream.events,
+            "disconnects": coordinator.live_stream.disconnects,
+        },
+        "control": {
+            "writes": coordinator.controller.writes,
+            "unsupported_batteries": sum(1 for parameters in coordinator.controller.parameters.values() if parameters is False),
+        },
+        "metrics": coordinator.metrics.as_dict(),
+    }
@@ -0,0 +1,41 @@
+"""Erreurs de l'API Beem."""
+
+
+class BeemApiError(Exception):
+    """Erreur générique de l'API Beem."""
+
+    def __init__(self, message: str, status: int | None = None):
+        super().__init__(message)
+        self.status = status
+
+
+class BeemAuthError(BeemApiError):
+    """Identifiants ou token refusés."""
+
+
+class BeemConnectionError(BeemApiError):
+    """Erreur réseau ou délai dépassé."""
+
+
+class BeemServerError(BeemApiError):
+    """Erreur 5xx renvoyée par le cloud Beem."""
+
+    def __init__(self, message: str, status: int | None = None, retry_after: float | None = None):
+        super().__init__(message, status)
+        self.retry_after = retry_after
+
+
+class BeemRateLimitError(BeemApiError):
+    """Trop de requêtes (429)."""
+
+    def __init__(self, message: str, status: int | None = 429, retry_after: float | None = None):
+        super().__init__(message, status)
+        self.retry_after = retry_after
+
+
+class BeemResponseError(BeemApiError):
+    """Réponse inattendue (statut 4xx ou contenu non JSON)."""
+
+
+class BeemCircuitOpenError(BeemApiError):
+    """Le disjoncteur est ouvert : aucune requête n'est envoyée."""
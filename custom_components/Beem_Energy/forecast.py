@@ -0,0 +1,316 @@
+"""Prévision locale sur 24 h de la production solaire, de la consommation et du SOC des batteries."""
+
+from datetime import datetime, timezone
+import logging
+import math
+
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers.storage import Store
+from homeassistant.util import dt as dt_util, slugify
+
+from .const import DOMAIN, ENERGY_MAX_GAP, FORECAST_HALF_LIFE, FORECAST_HOURS, FORECAST_INTERVAL
+
+_LOGGER = logging.getLogger(__name__)
+
+STORAGE_VERSION = 1
+SAVE_DELAY = 300
+
+# Facteur de performance (production réelle / ciel clair) tant qu'aucune production n'a été observée
+DEFAULT_PV_FACTOR = 0.75
+# Poids minimal d'une heure avant de se fier à son propre facteur (W·s de ciel clair ≈ 1 kWh)
+MIN_PV_WEIGHT = 3.6e6
+# Poids minimal d'une heure du profil de consommation (secondes observées)
+MIN_LOAD_WEIGHT = 600
+# Rendement de la batterie dans chaque sens (charge, décharge)
+BATTERY_EFFICIENCY = 0.95
+# Points d'évaluation du ciel clair par heure de prévision
+STEPS_PER_HOUR = 4
+
+
+def solar_arrays(equipments: list) -> list[tuple[float, float, float]]:
+    """Équipements solaires -> (puissance crête en W, azimut en degrés, 180 = sud, inclinaison)."""
+    arrays = []
+    for equipment in equipments:
+        peak_power = equipment.peak_power
+        if not peak_power:
+            continue
+        panels = (equipment.solar_panels_in_series or 1) * (equipment.solar_panels_in_parallel or 1)
+        # Puissance crête d'un seul panneau (moins de 1 kWc) : multipliée par le nombre de panneaux
+        if peak_power < 1000:
+            peak_power *= panels
+        orientation = 180.0 if equipment.orientation is None else equipment.orientation
+        tilt = 30.0 if equipment.tilt is None else equipment.tilt
+        arrays.append((peak_power, orientation, tilt))
+    # Sans caractéristiques connues : 1 kWc plein sud incliné à 30°, l'échelle est corrigée par le facteur appris
+    return arrays or [(1000.0, 180.0, 30.0)]
+
+
+def clear_sky_power(timestamp: float, latitude: float, longitude: float, arrays: list) -> float:
+    """Production par ciel clair (W) des panneaux à cet instant (position du soleil NOAA, masse d'air Kasten-Young)."""
+    moment = datetime.fromtimestamp(timestamp, timezone.utc)
+    gamma = 2 * math.pi / 365 * (moment.timetuple().tm_yday - 1 + (moment.hour - 12) / 24)
+    eqtime = 229.18 * (
+        0.000075 + 0.001868 * math.cos(gamma) - 0.032077 * math.sin(gamma)
+        - 0.014615 * math.cos(2 * gamma) - 0.040849 * math.sin(2 * gamma)
+    )
+    declination = (
+        0.006918 - 0.399912 * math.cos(gamma) + 0.070257 * math.sin(gamma)
+        - 0.006758 * math.cos(2 * gamma) + 0.000907 * math.sin(2 * gamma)
+        - 0.002697 * math.cos(3 * gamma) + 0.00148 * math.sin(3 * gamma)
+    )
+    minutes = moment.hour * 60 + moment.minute + moment.second / 60 + eqtime + 4 * longitude
+    hour_angle = math.radians(minutes / 4 - 180)
+    lat = math.radians(latitude)
+
+    cos_zenith = math.sin(lat) * math.sin(declination) + math.cos(lat) * math.cos(declination) * math.cos(hour_angle)
+    if cos_zenith <= 0.01:
+        return 0.0
+    zenith = math.acos(min(cos_zenith, 1.0))
+    sin_zenith = math.sin(zenith)
+    # Azimut du soleil compté depuis le nord, vers l'est
+    azimuth = math.atan2(
+        -math.sin(hour_angle) * math.cos(declination) * math.cos(lat),
+        math.sin(declination) - math.sin(lat) * cos_zenith,
+    )
+
+    air_mass = 1 / (cos_zenith + 0.50572 * (96.07995 - math.degrees(zenith)) ** -1.6364)
+    direct = 1353 * 0.7 ** (air_mass ** 0.678)
+    diffuse = 0.1 * direct * cos_zenith
+
+    power = 0.0
+    for peak_power, orientation, tilt in arrays:
+        tilt = math.radians(tilt)
+        cos_incidence = cos_zenith * math.cos(tilt) + sin_zenith * math.sin(tilt) * math.cos(azimuth - math.radians(orientation))
+        irradiance = direct * max(cos_incidence, 0.0) + diffuse * (1 + math.cos(tilt)) / 2
+        power += peak_power * irradiance / 1000
+    return power
+
+
+def _local_hour(timestamp: float) -> int:
+    return dt_util.as_local(dt_util.utc_from_timestamp(timestamp)).hour
+
+
+def _accumulate(bucket: list, timestamp: float, value: float, weight: float) -> None:
+    """Moyenne pondérée à oubli exponentiel : [somme des valeurs, somme des poids, dernier horodatage]."""
+    if bucket[2]:
+        decay = 0.5 ** (max(timestamp - bucket[2], 0.0) / FORECAST_HALF_LIFE)
+        bucket[0] *= decay
+        bucket[1] *= decay
+    bucket[0] += value
+    bucket[1] += weight
+    bucket[2] = timestamp
+
+
+class BatteryForecastModel:
+    """État appris d'une batterie, par heure locale : facteur de performance solaire et consommation moyenne.
+
+    Chaque nouvel échantillon met à jour les moyennes de son heure (oubli de demi-vie
+    `FORECAST_HALF_LIFE`), sans réapprentissage sur tout l'historique.
+    """
+
+    __slots__ = ("last", "pv", "load", "forecast_at")
+
+    def __init__(self, last=None, pv=None, load=None, forecast_at=0.0):
+        self.last = tuple(last) if last else None
+        self.pv = pv or [[0.0, 0.0, 0.0] for _ in range(24)]
+        self.load = load or [[0.0, 0.0, 0.0] for _ in range(24)]
+        self.forecast_at = forecast_at
+
+    def to_dict(self) -> dict:
+        return {
+            "last": list(self.last) if self.last else None,
+            "pv": [list(bucket) for bucket in self.pv],
+            "load": [list(bucket) for bucket in self.load],
+        }
+
+    def learn(self, samples: list[tuple], latitude: float, longitude: float, arrays: list) -> None:
+        """Intègre les échantillons (horodatage, solaire, batterie, compteur) postérieurs au dernier appris."""
+        previous = self.last
+        for sample in samples:
+            if previous is not None and sample[0] > previous[0]:
+                elapsed = min(sample[0] - previous[0], ENERGY_MAX_GAP)
+                hour = _local_hour(previous[0])
+                solar = (previous[1] + sample[1]) / 2
+                consumption = (previous[1] + previous[3] - previous[2] + sample[1] + sample[3] - sample[2]) / 2
+                clear_sky = clear_sky_power(previous[0] + elapsed / 2, latitude, longitude, arrays)
+                if clear_sky > 0:
+                    _accumulate(self.pv[hour], sample[0], max(solar, 0.0) * elapsed, clear_sky * elapsed)
+                _accumulate(self.load[hour], sample[0], max(consumption, 0.0) * elapsed, elapsed)
+            if previous is None or sample[0] > previous[0]:
+                previous = sample
+        self.last = previous
+
+    def _pv_factor(self, hour: int) -> float:
+        value, weight, _ = self.pv[hour]
+        if weight >= MIN_PV_WEIGHT:
+            return value / weight
+        total_weight = sum(bucket[1] for bucket in self.pv)
+        if total_weight >= MIN_PV_WEIGHT:
+            return sum(bucket[0] for bucket in self.pv) / total_weight
+        return DEFAULT_PV_FACTOR
+
+    def _load(self, hour: int) -> float:
+        value, weight, _ = self.load[hour]
+        if weight >= MIN_LOAD_WEIGHT:
+            return value / weight
+        total_weight = sum(bucket[1] for bucket in self.load)
+        return sum(bucket[0] for bucket in self.load) / total_weight if total_weight else 0.0
+
+    def forecast(self, now: float, latitude: float, longitude: float, arrays: list, battery: dict) -> dict:
+        """Prévision heure par heure : production, consommation, puis SOC simulé (charge du surplus, décharge du déficit)."""
+        soc = battery.get("soc")
+        capacity = battery.get("capacity")
+        max_power = battery.get("max_power")
+        simulate = soc is not None and bool(capacity)
+
+        hourly = []
+        solar_energy = consumption_energy = 0.0
+        soc_min = soc_max = None
+        for index in range(FORECAST_HOURS):
+            start = now + index * 3600
+            hour = _local_hour(start + 1800)
+            clear_sky = sum(
+                clear_sky_power(start + (step + 0.5) * 3600 / STEPS_PER_HOUR, latitude, longitude, arrays)
+                for step in range(STEPS_PER_HOUR)
+            ) / STEPS_PER_HOUR
+            solar = clear_sky * self._pv_factor(hour)
+            consumption = self._load(hour)
+            solar_energy += solar / 1000
+            consumption_energy += consumption / 1000
+            entry = {
+                "datetime": dt_util.utc_from_timestamp(start).isoformat(),
+                "solar_power": round(solar),
+                "consumption": round(consumption),
+            }
+
+            if simulate:
+                # Énergie échangée par la batterie sur l'heure (kWh), bornée par sa puissance et son état de charge
+                power = solar - consumption
+                if max_power:
+                    power = max(-max_power, min(max_power, power))
+                if power > 0:
+                    stored = min(power / 1000 * BATTERY_EFFICIENCY, capacity * (100 - soc) / 100)
+                else:
+                    stored = -min(-power / 1000 / BATTERY_EFFICIENCY, capacity * soc / 100)
+                soc = min(100.0, max(0.0, soc + 100 * stored / capacity))
+                entry["soc"] = round(soc, 1)
+                if soc_min is None or soc < soc_min[0]:
+                    soc_min = (soc, entry["datetime"])
+                if soc_max is None or soc > soc_max[0]:
+                    soc_max = (soc, entry["datetime"])
+            hourly.append(entry)
+
+        self.forecast_at = now
+        return {
+            "computed_at": dt_util.utc_from_timestamp(now).isoformat(),
+            "solar_energy": solar_energy,
+            "consumption_energy": consumption_energy,
+            "soc_min": soc_min,
+            "soc_max": soc_max,
+            "hourly": hourly,
+        }
+
+
+class BeemForecaster:
+    """Prévisions des batteries d'un compte, recalculées hors de la boucle à l'arrivée de nouveaux échantillons.
+
+    Les échantillons reçus depuis le dernier passage sont relevés dans la boucle, puis
+    apprentissage et prévision s'exécutent dans l'executor ; les demandes arrivées
+    pendant un calcul sont regroupées en un seul passage suivant. Une prévision n'est
+    recalculée qu'au plus toutes les `FORECAST_INTERVAL` secondes.
+    """
+
+    def __init__(self, hass: HomeAssistant, coordinator):
+        self.hass = hass
+        self.coordinator = coordinator
+        self.forecasts = {}
+        self._store = Store(hass, STORAGE_VERSION, f"{DOMAIN}_forecast_{slugify(coordinator.api_client.email)}")
+        # Modifiés uniquement dans l'executor
+        self._models = {}
+        # Dans la boucle : dernier horodatage relevé par batterie, demandes en attente, calcul en cours
+        self._consumed = {}
+        self._pending = {}
+        self._task = None
+        self._snapshot = None
+
+    async def async_load(self) -> None:
+        data = await self._store.async_load()
+        if not data:
+            return
+        for battery_id, model in data.get("models", []):
+            self._models[battery_id] = BatteryForecastModel(model.get("last"), model.get("pv"), model.get("load"))
+            if model.get("last"):
+                self._consumed[battery_id] = model["last"][0]
+
+    def _data_to_save(self) -> dict:
+        return {"models": self._snapshot or []}
+
+    @callback
+    def async_schedule(self, battery_ids) -> None:
+        """Relève les nouveaux échantillons des batteries et lance (ou prolonge) le calcul en arrière-plan."""
+        coordinator = self.coordinator
+        for battery_id in battery_ids:
+            battery = coordinator.battery_index.get(battery_id)
+            if battery is None:
+                continue
+            samples = self._new_samples(battery_id)
+            pending = self._pending.get(battery_id)
+            if pending is not None:
+                samples = pending["samples"] + samples
+            self._pending[battery_id] = {
+                "samples": samples,
+                "arrays": solar_arrays(coordinator.solar_equipments.get(battery_id, [])),
+                "battery": {"soc": battery.soc, "capacity": battery.capacity_in_kwh, "max_power": battery.max_power},
+            }
+        if self._pending and self._task is None:
+            self._task = self.hass.async_create_background_task(
+                self._async_run(), f"{DOMAIN} forecast {coordinator.api_client.email}"
+            )
+
+    def _new_samples(self, battery_id) -> list[tuple]:
+        timeseries = self.coordinator.timeseries
+        meter = timeseries.series.get(f"battery_{battery_id}_meterPower")
+        if meter is None:
+            return []
+        after = self._consumed.get(battery_id, float("-inf"))
+        rows = meter.raw.rows_after(after)
+        if not rows:
+            return []
+        solar = self._values_after(timeseries, f"battery_{battery_id}_solarPower", after)
+        battery = self._values_after(timeseries, f"battery_{battery_id}_batteryPower", after)
+        self._consumed[battery_id] = rows[-1][0]
+        return [(timestamp, solar.get(timestamp, 0.0), battery.get(timestamp, 0.0), meter_power) for timestamp, meter_power in rows]
+
+    @staticmethod
+    def _values_after(timeseries, key: str, after: float) -> dict:
+        series = timeseries.series.get(key)
+        return dict(series.raw.rows_after(after)) if series is not None else {}
+
+    async def _async_run(self) -> None:
+        try:
+            while self._pending:
+                pending, self._pending = self._pending, {}
+                results, self._snapshot = await self.hass.async_add_executor_job(
+                    self._compute, pending, self.hass.config.latitude, self.hass.config.longitude, dt_util.utcnow().timestamp()
+                )
+                self._store.async_delay_save(self._data_to_save, SAVE_DELAY)
+                if results:
+                    self.forecasts.update(results)
+                    self.coordinator.async_battery_updated(results.keys(), "forecast")
+        except Exception:
+            _LOGGER.exception("Erreur lors du calcul des prévisions Beem")
+        finally:
+            self._task = None
+
+    def _compute(self, pending: dict, latitude: float, longitude: float, now: float) -> tuple[dict, list]:
+        """Executor : apprentissage des nouveaux échantillons, puis prévision des batteries dont elle a expiré."""
+        results = {}
+        for battery_id, request in pending.items():
+            model = self._models.get(battery_id)
+            if model is None:
+                model = self._models[battery_id] = BatteryForecastModel()
+            model.learn(request["samples"], latitude, longitude, request["arrays"])
+            if now - model.forecast_at >= FORECAST_INTERVAL:
+                results[battery_id] = model.forecast(now, latitude, longitude, request["arrays"], request["battery"])
+        snapshot = [[battery_id, model.to_dict()] for battery_id, model in self._models.items()]
+        return results, snapshot
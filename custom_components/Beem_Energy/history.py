@@ -0,0 +1,167 @@
+"""Historique mensuel des BeemBox (/box/summary) avec cache persistant."""
+
+from datetime import datetime, timedelta
+import asyncio
+import logging
+import time
+
+from homeassistant.core import HomeAssistant
+from homeassistant.helpers.storage import Store
+from homeassistant.util import dt as dt_util, slugify
+
+from .api import BeemApiClient
+from .const import (
+    DOMAIN,
+    MAX_CONCURRENT_REQUESTS,
+    SUMMARY_BACKFILL_REQUESTS_PER_SECOND,
+    SUMMARY_SCAN_INTERVAL,
+)
+from .exceptions import BeemApiError
+
+_LOGGER = logging.getLogger(__name__)
+
+STORAGE_VERSION = 1
+SAVE_DELAY = 10
+
+
+def _month_key(year: int, month: int) -> str:
+    return f"{year:04d}-{month:02d}"
+
+
+def _previous_months(year: int, month: int, count: int) -> list[tuple[int, int]]:
+    months = []
+    for _ in range(count):
+        month -= 1
+        if month == 0:
+            month = 12
+            year -= 1
+        months.append((year, month))
+    return months
+
+
+class BeemRateLimiter:
+    """Espace le démarrage des requêtes (N par seconde au maximum)."""
+
+    def __init__(self, requests_per_second: float):
+        self._spacing = 1 / requests_per_second
+        self._lock = asyncio.Lock()
+        self._next_slot = 0.0
+
+    async def __aenter__(self):
+        async with self._lock:
+            now = time.monotonic()
+            wait = self._next_slot - now
+            self._next_slot = max(now, self._next_slot) + self._spacing
+        if wait > 0:
+            await asyncio.sleep(wait)
+
+    async def __aexit__(self, *exc):
+        return False
+
+
+class BeemSummaryHistory:
+    """Résumés mensuels : mois passés en cache permanent, mois courant rafraîchi périodiquement."""
+
+    def __init__(self, hass: HomeAssistant, api: BeemApiClient):
+        self._api = api
+        self._store = Store(hass, STORAGE_VERSION, f"{DOMAIN}_summary_{slugify(api.email)}")
+        self._months = {}
+        self._loaded = False
+        self._current = None
+        self._current_fetched_at = None
+        # Dernier mois terminé déjà demandé (relevé final mis en cache au changement de mois)
+        self._previous_checked = None
+        self._semaphore = asyncio.Semaphore(MAX_CONCURRENT_REQUESTS)
+        self._rate_limiter = BeemRateLimiter(SUMMARY_BACKFILL_REQUESTS_PER_SECOND)
+
+    @property
+    def current(self) -> list | None:
+        """Dernier résumé connu du mois courant."""
+        return self._current
+
+    @property
+    def months(self) -> dict:
+        """Résumés des mois passés, indexés par `AAAA-MM`."""
+        return self._months
+
+    async def async_load(self) -> None:
+        if self._loaded:
+            return
+        data = await self._store.async_load() or {}
+        self._months = data.get("months", {})
+        self._loaded = True
+
+    async def async_refresh_current(self, now: datetime | None = None, force: bool = False) -> list | None:
+        """Rafraîchit le mois courant si l'intervalle (plus lent que le polling) est écoulé.
+
+        Au changement de mois (ou au premier rafraîchissement), le relevé final du mois
+        terminé est demandé une fois et mis en cache avec les autres mois passés.
+        """
+        await self.async_load()
+        now = now or dt_util.now()
+        due = (
+            self._current_fetched_at is None
+            or now - self._current_fetched_at >= timedelta(seconds=SUMMARY_SCAN_INTERVAL)
+            or (self._current_fetched_at.year, self._current_fetched_at.month) != (now.year, now.month)
+        )
+        if not (force or due):
+            return self._current
+
+        summary = await self._api.get_beembox_summary(now.month, now.year)
+        if summary:
+            self._current = summary
+            self._current_fetched_at = now
+        await self._async_cache_previous_month(now)
+        return self._current
+
+    async def _async_cache_previous_month(self, now: datetime) -> None:
+        year, month = _previous_months(now.year, now.month, 1)[0]
+        key = _month_key(year, month)
+        if key == self._previous_checked or key in self._months:
+            return
+        try:
+            await self.async_get_month(year, month)
+        except BeemApiError as err:
+            # Nouvel essai au prochain rafraîchissement
+            _LOGGER.debug("Relevé final du mois %s indisponible pour l'instant : %s", key, err)
+            return
+        self._previous_checked = key
+
+    async def async_get_month(self, year: int, month: int) -> list | None:
+        """Retourne le résumé d'un mois passé, depuis le cache ou l'API."""
+        await self.async_load()
+        key = _month_key(year, month)
+        if key in self._months:
+            return self._months[key]
+
+        async with self._semaphore, self._rate_limiter:
+            summary = await self._api.get_beembox_summary(month, year)
+
+        # Un mois terminé est immuable : on ne le redemandera plus
+        if summary:
+            self._months[key] = summary
+            self._store.async_delay_save(self._data_to_save, SAVE_DELAY)
+        return summary
+
+    async def async_backfill(self, months: int, now: datetime | None = None) -> int:
+        """Récupère en parallèle (débit limité) les `months` mois précédents absents du cache."""
+        await self.async_load()
+        now = now or dt_util.now()
+        missing = [
+            (year, month)
+            for year, month in _previous_months(now.year, now.month, months)
+            if _month_key(year, month) not in self._months
+        ]
+        if not missing:
+            return 0
+
+        results = await asyncio.gather(
+            *(self.async_get_month(year, month) for year, month in missing),
+            return_exceptions=True,
+        )
+        fetched = sum(1 for result in results if result and not isinstance(result, Exception))
+        _LOGGER.info("Historique Beem : %s/%s mois récupérés pour %s", fetched, len(missing), self._api.email)
+        return fetched
+
+    def _data_to_save(self) -> dict:
+        return {"months": self._months}
@@ -0,0 +1,76 @@
+"""Intégration puissance → énergie pour les compteurs kWh Beem."""
+
+from datetime import datetime, timedelta
+import logging
+
+from homeassistant.util import dt as dt_util
+
+from .const import ENERGY_MAX_GAP
+
+_LOGGER = logging.getLogger(__name__)
+
+METHOD_TRAPEZOIDAL = "trapezoidal"
+METHOD_LEFT = "left"
+METHOD_RIGHT = "right"
+INTEGRATION_METHODS = (METHOD_TRAPEZOIDAL, METHOD_LEFT, METHOD_RIGHT)
+
+
+class EnergyIntegrator:
+    """Accumule l'énergie (kWh) à partir d'échantillons de puissance (W) horodatés.
+
+    Les échantillons sont traités dans l'ordre chronologique : ceux qui sont plus anciens
+    que le dernier échantillon intégré sont ignorés. Un intervalle plus long que
+    `max_gap` (données figées) est plafonné et intégré à la dernière puissance connue.
+    """
+
+    def __init__(self, method: str = METHOD_TRAPEZOIDAL, max_gap: timedelta = timedelta(seconds=ENERGY_MAX_GAP)):
+        if method not in INTEGRATION_METHODS:
+            raise ValueError(f"Méthode d'intégration inconnue : {method}")
+        self.method = method
+        self.max_gap = max_gap
+        self.value = 0.0
+        self.last_time = None
+        self.last_power = None
+
+    def add_sample(self, timestamp: datetime, power: float) -> bool:
+        """Intègre un échantillon. Retourne False s'il est ignoré (doublon ou hors ordre)."""
+        if self.last_time is not None and timestamp <= self.last_time:
+            return False
+
+        if self.last_time is not None and self.last_power is not None:
+            elapsed = timestamp - self.last_time
+            if elapsed > self.max_gap:
+                _LOGGER.debug("Trou de %s dans les données, intégration plafonnée à %s", elapsed, self.max_gap)
+                average = self.last_power
+                elapsed = self.max_gap
+            elif self.method == METHOD_LEFT:
+                average = self.last_power
+            elif self.method == METHOD_RIGHT:
+                average = power
+            else:
+                average = (self.last_power + power) / 2
+            self.value += average * elapsed.total_seconds() / 3600 / 1000
+
+        self.last_time = timestamp
+        self.last_power = power
+        return True
+
+    def add_samples(self, samples) -> int:
+        """Intègre un lot d'échantillons (ex. rattrapage), triés par horodatage."""
+        return sum(self.add_sample(timestamp, power) for timestamp, power in sorted(samples, key=lambda s: s[0]))
+
+    def as_dict(self) -> dict:
+        return {
+            "value": self.value,
+            "last_time": self.last_time.isoformat() if self.last_time else None,
+            "last_power": self.last_power,
+        }
+
+    def restore(self, data: dict) -> None:
+        """Restaure l'accumulateur sauvegardé par `as_dict`."""
+        try:
+            self.value = float(data.get("value") or 0.0)
+        except (TypeError, ValueError):
+            self.value = 0.0
+        self.last_time = dt_util.parse_datetime(data["last_time"]) if data.get("last_time") else None
+        self.last_power = data.get("last_power")
@@ -0,0 +1,199 @@
+"""Mesures de performance du client API et du coordinateur Beem."""
+
+from contextlib import contextmanager
+import heapq
+import logging
+import re
+import time
+
+_LOGGER = logging.getLogger(__name__)
+
+# Bornes supérieures des classes de latence (secondes)
+LATENCY_BUCKETS = (0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# Nombre de cycles les plus lents conservés pour le profilage
+SLOW_CYCLES_KEPT = 5
+
+# Identifiants numériques remplacés dans les chemins, pour regrouper les appels par endpoint
+_ID_PATTERN = re.compile(r"/\d+(?=/|$)")
+
+
+def endpoint_name(method: str, path: str) -> str:
+    """Ex. GET /batteries/123/live-data -> 'GET /batteries/{id}/live-data'."""
+    return f"{method} {_ID_PATTERN.sub('/{id}', path)}"
+
+
+class LatencyHistogram:
+    """Histogramme cumulatif à classes fixes (nombre, somme, maximum)."""
+
+    __slots__ = ("counts", "count", "total", "max")
+
+    def __init__(self):
+        self.counts = [0] * (len(LATENCY_BUCKETS) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def observe(self, value: float) -> None:
+        index = 0
+        while index < len(LATENCY_BUCKETS) and value > LATENCY_BUCKETS[index]:
+            index += 1
+        self.counts[index] += 1
+        self.count += 1
+        self.total += value
+        self.max = max(self.max, value)
+
+    @property
+    def mean(self) -> float | None:
+        return self.total / self.count if self.count else None
+
+    def as_dict(self) -> dict:
+        labels = [f"<={bound}" for bound in LATENCY_BUCKETS] + ["+inf"]
+        return {
+            "count": self.count,
+            "mean": self.mean,
+            "max": self.max,
+            "buckets": dict(zip(labels, self.counts)),
+        }
+
+
+class EndpointMetrics:
+    """Compteurs d'un endpoint : requêtes, réponses inchangées, erreurs par type, nouvelles tentatives, octets reçus, latence."""
+
+    __slots__ = ("requests", "unchanged", "errors", "retries", "bytes", "latency", "statuses")
+
+    def __init__(self):
+        self.requests = 0
+        self.unchanged = 0
+        self.errors = {}
+        self.retries = 0
+        self.bytes = 0
+        self.latency = LatencyHistogram()
+        self.statuses = {}
+
+    def as_dict(self) -> dict:
+        return {
+            "requests": self.requests,
+            "unchanged": self.unchanged,
+            "errors": dict(self.errors),
+            "retries": self.retries,
+            "bytes": self.bytes,
+            "statuses": dict(self.statuses),
+            "latency": self.latency.as_dict(),
+        }
+
+
+class BeemMetrics:
+    """Mesures d'un compte, alimentées par le client API et le coordinateur."""
+
+    def __init__(self):
+        self.endpoints = {}
+        self.cycles = LatencyHistogram()
+        self.last_cycle = None
+        self.slow_cycles = []
+        self.profiling = False
+
+    def _endpoint(self, method: str, path: str) -> EndpointMetrics:
+        name = endpoint_name(method, path)
+        metrics = self.endpoints.get(name)
+        if metrics is None:
+            metrics = self.endpoints[name] = EndpointMetrics()
+        return metrics
+
+    def record_request(self, method: str, path: str, status: int | None, duration: float, size: int = 0) -> None:
+        metrics = self._endpoint(method, path)
+        metrics.requests += 1
+        metrics.bytes += size
+        metrics.latency.observe(duration)
+        if status is not None:
+            metrics.statuses[status] = metrics.statuses.get(status, 0) + 1
+
+    def record_error(self, method: str, path: str, error: Exception) -> None:
+        errors = self._endpoint(method, path).errors
+        name = type(error).__name__
+        errors[name] = errors.get(name, 0) + 1
+
+    def record_unchanged(self, method: str, path: str) -> None:
+        """Réponse identique à la précédente (304 ou même empreinte) : décodage évité."""
+        self._endpoint(method, path).unchanged += 1
+
+    def record_retry(self, method: str, path: str) -> None:
+        self._endpoint(method, path).retries += 1
+
+    @property
+    def total_requests(self) -> int:
+        return sum(m.requests for m in self.endpoints.values())
+
+    @property
+    def total_errors(self) -> int:
+        return sum(sum(m.errors.values()) for m in self.endpoints.values())
+
+    @property
+    def total_retries(self) -> int:
+        return sum(m.retries for m in self.endpoints.values())
+
+    @property
+    def total_bytes(self) -> int:
+        return sum(m.bytes for m in self.endpoints.values())
+
+    @property
+    def mean_latency(self) -> float | None:
+        count = sum(m.latency.count for m in self.endpoints.values())
+        return sum(m.latency.total for m in self.endpoints.values()) / count if count else None
+
+    def start_cycle(self) -> "BeemCycleProfile":
+        return BeemCycleProfile()
+
+    def finish_cycle(self, profile: "BeemCycleProfile") -> None:
+        """Enregistre la durée d'un cycle ; en mode profilage, détaille les cycles les plus lents."""
+        profile.duration = time.perf_counter() - profile.started
+        self.last_cycle = profile
+        self.cycles.observe(profile.duration)
+
+        entry = (profile.duration, profile.started, profile)
+        if len(self.slow_cycles) < SLOW_CYCLES_KEPT:
+            heapq.heappush(self.slow_cycles, entry)
+        elif profile.duration > self.slow_cycles[0][0]:
+            heapq.heapreplace(self.slow_cycles, entry)
+        else:
+            return
+
+        if self.profiling:
+            _LOGGER.info(
+                "Cycle Beem lent (%.3f s, parmi les %d plus lents) : %s",
+                profile.duration,
+                SLOW_CYCLES_KEPT,
+                ", ".join(f"{stage} {duration:.3f} s" for stage, duration in profile.stages.items()),
+            )
+
+    def as_dict(self) -> dict:
+        return {
+            "endpoints": {name: metrics.as_dict() for name, metrics in self.endpoints.items()},
+            "cycles": self.cycles.as_dict(),
+            "last_cycle": self.last_cycle.as_dict() if self.last_cycle else None,
+            "slowest_cycles": [
+                profile.as_dict() for _, _, profile in sorted(self.slow_cycles, key=lambda e: e[0], reverse=True)
+            ],
+        }
+
+
+class BeemCycleProfile:
+    """Durées des étapes d'un cycle de rafraîchissement."""
+
+    __slots__ = ("started", "duration", "stages")
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.duration = None
+        self.stages = {}
+
+    @contextmanager
+    def stage(self, name: str):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.stages[name] = self.stages.get(name, 0.0) + time.perf_counter() - start
+
+    def as_dict(self) -> dict:
+        return {"duration": self.duration, "stages": dict(self.stages)}
@@ -0,0 +1,240 @@
+"""Modèles typés des réponses de l'API Beem (live-data, /devices)."""
+
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Any, Callable, ClassVar
+import logging
+
+from homeassistant.util import dt as dt_util
+
+_LOGGER = logging.getLogger(__name__)
+
+# Écarts de schéma déjà signalés, pour ne les journaliser qu'une fois
+_REPORTED_SCHEMA_ISSUES = set()
+
+
+def _float(value) -> float | None:
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def _int(value) -> int | None:
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def _bool(value) -> bool | None:
+    if value is None:
+        return None
+    if isinstance(value, str):
+        return value.strip().lower() in ("true", "1", "yes")
+    return bool(value)
+
+
+def _str(value) -> str | None:
+    return None if value is None else str(value)
+
+
+def _raw(value):
+    return value
+
+
+def parse_timestamp(value) -> datetime | None:
+    """Convertit une date de l'API (ISO 8601) en datetime UTC."""
+    if not value:
+        return None
+    parsed = dt_util.parse_datetime(str(value))
+    if parsed is not None and parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=dt_util.UTC)
+    return parsed
+
+
+def _report_schema_drift(model: str, data: dict, fields: dict, nested: tuple) -> None:
+    for key in data:
+        if key not in fields and key not in nested and (model, "unknown", key) not in _REPORTED_SCHEMA_ISSUES:
+            _REPORTED_SCHEMA_ISSUES.add((model, "unknown", key))
+            _LOGGER.debug("API Beem : champ inconnu '%s' dans %s", key, model)
+    for key in fields:
+        if key not in data and (model, "missing", key) not in _REPORTED_SCHEMA_ISSUES:
+            _REPORTED_SCHEMA_ISSUES.add((model, "missing", key))
+            _LOGGER.debug("API Beem : champ '%s' absent de %s", key, model)
+
+
+class BeemModel:
+    """Base commune : accès par clé API (`get`, `in`) sur des attributs convertis une seule fois."""
+
+    __slots__ = ()
+
+    # clé API -> (attribut, conversion)
+    FIELDS: ClassVar[dict[str, tuple[str, Callable[[Any], Any]]]] = {}
+    NESTED: ClassVar[tuple[str, ...]] = ()
+
+    @classmethod
+    def _parse_fields(cls, data: dict) -> dict:
+        if not isinstance(data, dict):
+            data = {}
+        _report_schema_drift(cls.__name__, data, cls.FIELDS, cls.NESTED)
+        kwargs = {
+            attr: convert(data[key])
+            for key, (attr, convert) in cls.FIELDS.items()
+            if key in data
+        }
+        kwargs["present"] = frozenset(key for key in data if key in cls.FIELDS)
+        kwargs["extra"] = {key: value for key, value in data.items() if key not in cls.FIELDS and key not in cls.NESTED}
+        return kwargs
+
+    @classmethod
+    def from_dict(cls, data: dict):
+        return cls(**cls._parse_fields(data))
+
+    def get(self, key: str, default=None):
+        spec = self.FIELDS.get(key)
+        if spec is None:
+            return self.extra.get(key, default)
+        value = getattr(self, spec[0])
+        return default if value is None else value
+
+    def set(self, key: str, value) -> None:
+        """Remplace une valeur à partir de sa forme brute (ex. complément venant d'un autre endpoint)."""
+        spec = self.FIELDS.get(key)
+        if spec is None:
+            self.extra[key] = value
+            return
+        setattr(self, spec[0], spec[1](value))
+        self.present = self.present | {key}
+
+    def __contains__(self, key: str) -> bool:
+        return key in self.present or key in self.extra
+
+    def items(self):
+        """Paires (clé API, valeur) présentes dans la réponse."""
+        for key, (attr, _) in self.FIELDS.items():
+            if key in self.present:
+                yield key, getattr(self, attr)
+        yield from self.extra.items()
+
+
+@dataclass(slots=True, eq=False)
+class LiveData(BeemModel):
+    """Réponse de /batteries/{id}/live-data."""
+
+    FIELDS: ClassVar[dict] = {
+        "batteryPower": ("battery_power", _float),
+        "meterPower": ("meter_power", _float),
+        "solarPower": ("solar_power", _float),
+        "activePower": ("active_power", _float),
+        "soc": ("soc", _float),
+        "workingModeLabel": ("working_mode_label", _str),
+        "lastKnownMeasureDate": ("last_known_measure_date", _raw),
+        "numberOfCycles": ("number_of_cycles", _int),
+        "numberOfModules": ("number_of_modules", _int),
+        "globalSoh": ("global_soh", _float),
+        "capacityInKwh": ("capacity_in_kwh", _float),
+        "maxPower": ("max_power", _float),
+        "isBatteryWorkingModeOk": ("is_battery_working_mode_ok", _bool),
+    }
+
+    battery_power: float | None = None
+    meter_power: float | None = None
+    solar_power: float | None = None
+    active_power: float | None = None
+    soc: float | None = None
+    working_mode_label: str | None = None
+    last_known_measure_date: str | None = None
+    number_of_cycles: int | None = None
+    number_of_modules: int | None = None
+    global_soh: float | None = None
+    capacity_in_kwh: float | None = None
+    max_power: float | None = None
+    is_battery_working_mode_ok: bool | None = None
+    measured_at: datetime | None = None
+    present: frozenset = frozenset()
+    extra: dict = field(default_factory=dict)
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "LiveData":
+        kwargs = cls._parse_fields(data)
+        kwargs["measured_at"] = parse_timestamp(kwargs.get("last_known_measure_date"))
+        return cls(**kwargs)
+
+
+@dataclass(slots=True, eq=False)
+class SolarEquipment(BeemModel):
+    """Équipement solaire rattaché à une batterie (/devices)."""
+
+    FIELDS: ClassVar[dict] = {
+        "mpptId": ("mppt_id", _raw),
+        "orientation": ("orientation", _float),
+        "tilt": ("tilt", _float),
+        "peakPower": ("peak_power", _float),
+        "solarPanelsInParallel": ("solar_panels_in_parallel", _int),
+        "solarPanelsInSeries": ("solar_panels_in_series", _int),
+    }
+
+    mppt_id: Any = None
+    orientation: float | None = None
+    tilt: float | None = None
+    peak_power: float | None = None
+    solar_panels_in_parallel: int | None = None
+    solar_panels_in_series: int | None = None
+    present: frozenset = frozenset()
+    extra: dict = field(default_factory=dict)
+
+
+@dataclass(slots=True, eq=False)
+class Battery(BeemModel):
+    """Batterie déclarée dans /devices."""
+
+    FIELDS: ClassVar[dict] = {
+        "id": ("id", _raw),
+    }
+    NESTED: ClassVar[tuple] = ("solarEquipments",)
+
+    id: Any = None
+    solar_equipments: list = field(default_factory=list)
+    present: frozenset = frozenset()
+    extra: dict = field(default_factory=dict)
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "Battery":
+        kwargs = cls._parse_fields(data)
+        equipments = data.get("solarEquipments") if isinstance(data, dict) else None
+        kwargs["solar_equipments"] = [SolarEquipment.from_dict(e) for e in equipments or [] if isinstance(e, dict)]
+        return cls(**kwargs)
+
+
+@dataclass(slots=True, eq=False)
+class BeemBox(BeemModel):
+    """BeemBox / panneau PnP déclaré dans /devices."""
+
+    FIELDS: ClassVar[dict] = {
+        "id": ("id", _raw),
+        "macAddress": ("mac_address", _str),
+        "name": ("name", _str),
+        "serialNumber": ("serial_number", _str),
+        "power": ("power", _float),
+        "wattHour": ("watt_hour", _float),
+        "totalDay": ("total_day", _float),
+        "totalMonth": ("total_month", _float),
+        "lastDbm": ("last_dbm", _float),
+        "lastAlive": ("last_alive", _raw),
+        "lastProduction": ("last_production", _raw),
+    }
+
+    id: Any = None
+    mac_address: str | None = None
+    name: str | None = None
+    serial_number: str | None = None
+    power: float | None = None
+    watt_hour: float | None = None
+    total_day: float | None = None
+    total_month: float | None = None
+    last_dbm: float | None = None
+    last_alive: Any = None
+    last_production: Any = None
+    present: frozenset = frozenset()
+    extra: dict = field(default_factory=dict)
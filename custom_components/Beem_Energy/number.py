@@ -0,0 +1,81 @@
+from homeassistant.components.number import NumberEntity
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.core import HomeAssistant
+from homeassistant.helpers.entity_platform import AddEntitiesCallback
+
+from .const import DOMAIN
+from .control import async_setup_battery_entities
+from .coordinator import device_identifier
+from .sensor import BeemChangeAwareMixin
+
+# clé -> (paramètre API, unité, icône, minimum, maximum, pas) ; maximum None : puissance max de la batterie
+NUMBER_DEFINITIONS = {
+    "min_soc": ("minSoc", "%", "mdi:battery-arrow-down-outline", 0, 100, 1),
+    "max_soc": ("maxSoc", "%", "mdi:battery-arrow-up-outline", 0, 100, 1),
+    "grid_charge_power": ("chargeFromGridMaxPower", "W", "mdi:transmission-tower-import", 0, None, 100),
+}
+
+# Puissance maximale de charge réseau quand la batterie ne publie pas `maxPower` (W)
+DEFAULT_GRID_CHARGE_MAX = 5000
+
+
+async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry, async_add_entities: AddEntitiesCallback):
+    coordinator = hass.data[DOMAIN][entry.entry_id]
+    async_setup_battery_entities(
+        coordinator,
+        entry,
+        async_add_entities,
+        "number",
+        lambda coordinator, battery_id: [BeemControlNumber(coordinator, battery_id, key) for key in NUMBER_DEFINITIONS],
+    )
+
+
+class BeemControlNumber(BeemChangeAwareMixin, NumberEntity):
+    """Limite de charge de la batterie ; les réglages rapprochés sont envoyés en une seule écriture."""
+
+    def __init__(self, coordinator, battery_id, key):
+        parameter, unit, icon, minimum, maximum, step = NUMBER_DEFINITIONS[key]
+        self.coordinator = coordinator
+        self._battery_id = battery_id
+        self._parameter = parameter
+        self._maximum = maximum
+        self._change_keys = (("battery", battery_id, "control"),)
+        self._attr_native_unit_of_measurement = unit
+        self._attr_icon = icon
+        self._attr_native_min_value = minimum
+        self._attr_native_step = step
+        self._attr_unique_id = f"{battery_id}_{key}"
+        self._attr_name = key
+        self._attr_has_entity_name = True
+
+    @property
+    def available(self):
+        return (
+            self.coordinator.last_update_success
+            and self._battery_id in self.coordinator.battery_index
+            and self.coordinator.controller.supported(self._battery_id)
+        )
+
+    @property
+    def native_max_value(self):
+        if self._maximum is not None:
+            return self._maximum
+        battery = self.coordinator.battery_index.get(self._battery_id)
+        return battery.max_power if battery is not None and battery.max_power else DEFAULT_GRID_CHARGE_MAX
+
+    @property
+    def native_value(self):
+        return self.coordinator.controller.value(self._battery_id, self._parameter)
+
+    async def async_set_native_value(self, value: float) -> None:
+        await self.coordinator.controller.async_set(self._battery_id, {self._parameter: int(value)})
+
+    @property
+    def device_info(self):
+        return {
+            "identifiers": {(DOMAIN, device_identifier(("battery", self._battery_id)))},
+            "name": "Beem Battery",
+            "manufacturer": "Beem",
+            "model": "Beem Battery",
+            "configuration_url": "https://beem.energy/",
+        }
@@ -0,0 +1,106 @@
+"""Politique de nouvelle tentative et disjoncteur pour les appels à l'API Beem."""
+
+import logging
+import random
+import time
+from email.utils import parsedate_to_datetime
+
+from .exceptions import BeemCircuitOpenError
+
+_LOGGER = logging.getLogger(__name__)
+
+# Nouvelles tentatives (par requête)
+MAX_ATTEMPTS = 3
+BACKOFF_BASE = 1.0
+BACKOFF_MAX = 30.0
+
+# Disjoncteur
+FAILURE_THRESHOLD = 5
+RECOVERY_TIMEOUT = 120.0
+
+
+def backoff_delay(attempt: int, retry_after: float | None = None) -> float:
+    """Délai avant la tentative suivante : `Retry-After` s'il est fourni, sinon exponentiel avec jitter."""
+    if retry_after is not None:
+        return min(max(retry_after, 0.0), BACKOFF_MAX)
+    return random.uniform(0, min(BACKOFF_MAX, BACKOFF_BASE * 2 ** attempt))
+
+
+def parse_retry_after(value: str | None) -> float | None:
+    """Interprète l'en-tête `Retry-After` (secondes ou date HTTP)."""
+    if not value:
+        return None
+    try:
+        return float(value)
+    except ValueError:
+        pass
+    try:
+        return parsedate_to_datetime(value).timestamp() - time.time()
+    except (TypeError, ValueError):
+        return None
+
+
+class BeemCircuitBreaker:
+    """Coupe les appels après des échecs répétés, puis laisse passer un essai après `recovery_timeout`."""
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, failure_threshold: int = FAILURE_THRESHOLD, recovery_timeout: float = RECOVERY_TIMEOUT):
+        self.failure_threshold = failure_threshold
+        self.recovery_timeout = recovery_timeout
+        self._failures = 0
+        self._opened_at = None
+        self._trial_in_flight = False
+
+    @property
+    def state(self) -> str:
+        if self._opened_at is None:
+            return self.CLOSED
+        if time.monotonic() - self._opened_at >= self.recovery_timeout:
+            return self.HALF_OPEN
+        return self.OPEN
+
+    @property
+    def is_open(self) -> bool:
+        return self.state == self.OPEN
+
+    def before_request(self) -> bool:
+        """Lève `BeemCircuitOpenError` si la requête ne doit pas partir.
+
+        Retourne True si la requête est l'essai de reprise ; l'appelant doit alors le
+        libérer avec `release_trial` quelle que soit l'issue.
+        """
+        state = self.state
+        if state == self.OPEN:
+            raise BeemCircuitOpenError("API Beem indisponible, disjoncteur ouvert")
+        if state == self.HALF_OPEN:
+            if self._trial_in_flight:
+                raise BeemCircuitOpenError("API Beem indisponible, essai de reprise en cours")
+            self._trial_in_flight = True
+            return True
+        return False
+
+    def release_trial(self) -> None:
+        """Libère l'essai de reprise sans conclure (annulation, erreur non classée)."""
+        self._trial_in_flight = False
+
+    def record_success(self) -> None:
+        if self._opened_at is not None:
+            _LOGGER.info("API Beem de nouveau joignable, disjoncteur refermé")
+        self._failures = 0
+        self._opened_at = None
+        self._trial_in_flight = False
+
+    def record_failure(self) -> None:
+        self._failures += 1
+        self._trial_in_flight = False
+        if self._opened_at is not None or self._failures >= self.failure_threshold:
+            if self._opened_at is None:
+                _LOGGER.warning(
+                    "API Beem : %s échecs consécutifs, suspension des appels pendant %.0f s",
+                    self._failures,
+                    self.recovery_timeout,
+                )
+            self._opened_at = time.monotonic()
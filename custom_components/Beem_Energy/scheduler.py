@@ -0,0 +1,145 @@
+"""Planification adaptative des rafraîchissements Beem."""
+
+from datetime import datetime, timedelta
+import logging
+import statistics
+
+from homeassistant.util import dt as dt_util
+
+from .models import parse_timestamp
+from .const import (
+    ACTIVE_SCAN_INTERVAL,
+    DEFAULT_SCAN_INTERVAL,
+    IDLE_SCAN_INTERVAL,
+    MAX_SCAN_INTERVAL,
+    MIN_SCAN_INTERVAL,
+)
+
+_LOGGER = logging.getLogger(__name__)
+
+# Délai laissé au cloud Beem entre la mesure et sa disponibilité via l'API
+MEASURE_LAG = timedelta(seconds=5)
+
+# Seuils d'activité entre deux cycles
+SOC_ACTIVE_DELTA = 1.0
+POWER_ACTIVE_DELTA = 300.0
+POWER_IDLE_DELTA = 50.0
+
+# Nombre d'écarts entre mesures conservés pour estimer leur période
+PERIOD_SAMPLES = 10
+
+
+class BeemPollScheduler:
+    """Calcule l'intervalle du prochain rafraîchissement à partir des données reçues.
+
+    Les rafraîchissements sont alignés sur l'arrivée attendue des nouvelles mesures
+    (`lastKnownMeasureDate`, `lastProduction`, `lastAlive`), espacés la nuit quand la
+    production est nulle et la batterie stable, rapprochés lors des variations rapides
+    de SOC ou de puissance, et ne dépassent jamais le budget de requêtes par heure.
+    """
+
+    def __init__(self, max_requests_per_hour: int):
+        self.max_requests_per_hour = max_requests_per_hour
+        self._previous = {}
+        self._last_measure = None
+        self._measure_deltas = []
+
+    def next_interval(self, batteries: dict, beemboxes: list, requests_per_cycle: int, now: datetime | None = None) -> timedelta:
+        """Retourne l'intervalle avant le prochain cycle."""
+        now = now or dt_util.utcnow()
+        current = self._snapshot(batteries, beemboxes)
+
+        if self._is_active(current):
+            seconds = ACTIVE_SCAN_INTERVAL
+        elif self._is_idle(current):
+            seconds = IDLE_SCAN_INTERVAL
+        else:
+            seconds = DEFAULT_SCAN_INTERVAL
+
+        # Aligner le prochain cycle sur l'arrivée attendue de la prochaine mesure
+        last_measure = self._latest_measure(batteries, beemboxes)
+        self._track_measure(last_measure)
+        if last_measure is not None and seconds != IDLE_SCAN_INTERVAL:
+            period = self.measure_period
+            expected = last_measure + period + MEASURE_LAG
+            while expected <= now:
+                expected += period
+            seconds = max(seconds, (expected - now).total_seconds())
+
+        seconds = max(seconds, self._budget_floor(requests_per_cycle))
+        seconds = min(max(seconds, MIN_SCAN_INTERVAL), MAX_SCAN_INTERVAL)
+
+        self._previous = current
+        _LOGGER.debug("Prochain rafraîchissement Beem dans %.0f s", seconds)
+        return timedelta(seconds=seconds)
+
+    @property
+    def measure_period(self) -> timedelta:
+        """Période estimée entre deux mesures côté cloud (médiane des derniers écarts)."""
+        if not self._measure_deltas:
+            return timedelta(seconds=DEFAULT_SCAN_INTERVAL)
+        return timedelta(seconds=statistics.median(self._measure_deltas))
+
+    def _budget_floor(self, requests_per_cycle: int) -> float:
+        if not self.max_requests_per_hour or self.max_requests_per_hour <= 0:
+            return 0.0
+        return 3600 * max(requests_per_cycle, 1) / self.max_requests_per_hour
+
+    def _track_measure(self, measure: datetime | None) -> None:
+        if measure is None:
+            return
+        if self._last_measure is not None and measure > self._last_measure:
+            delta = (measure - self._last_measure).total_seconds()
+            if delta <= MAX_SCAN_INTERVAL:
+                self._measure_deltas.append(delta)
+                del self._measure_deltas[:-PERIOD_SAMPLES]
+        if self._last_measure is None or measure > self._last_measure:
+            self._last_measure = measure
+
+    @staticmethod
+    def _latest_measure(batteries: dict, beemboxes: list) -> datetime | None:
+        dates = [b.measured_at for b in batteries.values()]
+        for box in beemboxes:
+            dates.append(parse_timestamp(box.last_production or box.last_alive))
+        dates = [d for d in dates if d is not None]
+        return max(dates) if dates else None
+
+    @staticmethod
+    def _snapshot(batteries: dict, beemboxes: list) -> dict:
+        snapshot = {}
+        for battery_id, battery in batteries.items():
+            snapshot[(battery_id, "soc")] = battery.soc
+            snapshot[(battery_id, "batteryPower")] = battery.battery_power
+            snapshot[(battery_id, "solarPower")] = battery.solar_power
+            snapshot[(battery_id, "meterPower")] = battery.meter_power
+        for box in beemboxes:
+            snapshot[(box.mac_address or box.id, "power")] = box.power
+        return snapshot
+
+    def _deltas(self, current: dict, key: str) -> list[float]:
+        deltas = []
+        for (device_id, field), value in current.items():
+            previous = self._previous.get((device_id, field))
+            if field == key and value is not None and previous is not None:
+                deltas.append(abs(value - previous))
+        return deltas
+
+    def _is_active(self, current: dict) -> bool:
+        if any(delta >= SOC_ACTIVE_DELTA for delta in self._deltas(current, "soc")):
+            return True
+        return any(
+            delta >= POWER_ACTIVE_DELTA
+            for key in ("batteryPower", "solarPower", "meterPower", "power")
+            for delta in self._deltas(current, key)
+        )
+
+    def _is_idle(self, current: dict) -> bool:
+        if not self._previous:
+            return False
+        production = [
+            value for (_, field), value in current.items()
+            if field in ("solarPower", "power") and value is not None
+        ]
+        if any(value > 0 for value in production):
+            return False
+        return all(delta < POWER_IDLE_DELTA for delta in self._deltas(current, "batteryPower"))
@@ -0,0 +1,65 @@
+from homeassistant.components.select import SelectEntity
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.core import HomeAssistant
+from homeassistant.helpers.entity_platform import AddEntitiesCallback
+
+from .const import BATTERY_WORKING_MODES, DOMAIN
+from .control import async_setup_battery_entities
+from .coordinator import device_identifier
+from .sensor import BeemChangeAwareMixin
+
+
+async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry, async_add_entities: AddEntitiesCallback):
+    coordinator = hass.data[DOMAIN][entry.entry_id]
+    async_setup_battery_entities(
+        coordinator, entry, async_add_entities, "select", lambda coordinator, battery_id: [BeemWorkingModeSelect(coordinator, battery_id)]
+    )
+
+
+class BeemWorkingModeSelect(BeemChangeAwareMixin, SelectEntity):
+    """Mode de fonctionnement de la batterie ; la valeur demandée s'affiche jusqu'à son écriture."""
+
+    _attr_options = list(BATTERY_WORKING_MODES)
+
+    def __init__(self, coordinator, battery_id):
+        self.coordinator = coordinator
+        self._battery_id = battery_id
+        self._change_keys = (("battery", battery_id, "control"), ("battery", battery_id, "workingModeLabel"))
+        self._attr_icon = "mdi:cog-outline"
+        self._attr_unique_id = f"{battery_id}_working_mode"
+        self._attr_name = "working_mode"
+        self._attr_has_entity_name = True
+
+    @property
+    def available(self):
+        return (
+            self.coordinator.last_update_success
+            and self._battery_id in self.coordinator.battery_index
+            and self.coordinator.controller.supported(self._battery_id)
+        )
+
+    @property
+    def current_option(self):
+        controller = self.coordinator.controller
+        if controller.is_pending(self._battery_id, "mode"):
+            return controller.value(self._battery_id, "mode")
+        # Sinon le mode confirmé par les données live, qui suit aussi les changements faits depuis l'application
+        battery = self.coordinator.battery_index.get(self._battery_id)
+        label = battery.working_mode_label if battery is not None else None
+        if label in BATTERY_WORKING_MODES:
+            return label
+        mode = controller.value(self._battery_id, "mode")
+        return mode if mode in BATTERY_WORKING_MODES else None
+
+    async def async_select_option(self, option: str) -> None:
+        await self.coordinator.controller.async_set(self._battery_id, {"mode": option})
+
+    @property
+    def device_info(self):
+        return {
+            "identifiers": {(DOMAIN, device_identifier(("battery", self._battery_id)))},
+            "name": "Beem Battery",
+            "manufacturer": "Beem",
+            "model": "Beem Battery",
+            "configuration_url": "https://beem.energy/",
+        }
@@ -1,10 +1,17 @@
 from homeassistant.components.sensor import SensorEntity
 from homeassistant.helpers.entity_platform import AddEntitiesCallback
-from homeassistant.core import HomeAssistant
+from homeassistant.core import HomeAssistant, callback
 from homeassistant.config_entries import ConfigEntry
+from homeassistant.helpers.device_registry import DeviceEntryType
 from homeassistant.helpers.entity import EntityCategory
+from homeassistant.helpers.restore_state import RestoreEntity, RestoredExtraData
+from homeassistant.util import dt as dt_util
+from datetime import timedelta
 
-from .const import DOMAIN
+from .const import DOMAIN, ENERGY_INTEGRATION_METHOD, ENERGY_MAX_GAP
+from .analytics import ratios
+from .integration import EnergyIntegrator
+from .coordinator import device_identifier
 
 SENSOR_DEFINITIONS = {
     "batteryPower": ("W", "mdi:home-battery-outline"),
@@ -43,13 +50,151 @@ BEEMBOX_SENSORS = {
     "lastProduction": (None, "mdi:clock-outline"),
 }
 
+# Caractéristiques statiques : entités désactivées par défaut, regroupées en attributs d'une entité principale
+SOLAR_STATIC_ATTRIBUTES = ("mpptId", "orientation", "tilt")
+SOLAR_ATTRIBUTES_SENSOR = "peakPower"
+BEEMBOX_STATIC_ATTRIBUTES = ("serialNumber",)
+BEEMBOX_ATTRIBUTES_SENSOR = "name"
+
+def _round(value, digits):
+    return None if value is None else round(value, digits)
+
+
+# clé -> (unité, icône, state_class, activé par défaut, lecture de la valeur)
+METRIC_SENSORS = {
+    "requests": (None, "mdi:swap-horizontal", "total_increasing", True, lambda c: c.metrics.total_requests),
+    "errors": (None, "mdi:alert-circle-outline", "total_increasing", True, lambda c: c.metrics.total_errors),
+    "retries": (None, "mdi:replay", "total_increasing", False, lambda c: c.metrics.total_retries),
+    "token_refreshes": (None, "mdi:key-change", "total_increasing", False, lambda c: c.api_client.token_manager.refresh_count),
+    "bytes_received": ("B", "mdi:download-network-outline", "total_increasing", False, lambda c: c.metrics.total_bytes),
+    "mean_latency": ("ms", "mdi:timer-outline", "measurement", True, lambda c: _round(c.metrics.mean_latency and c.metrics.mean_latency * 1000, 1)),
+    "cycle_duration": ("s", "mdi:timer-sand", "measurement", True, lambda c: _round(c.metrics.last_cycle and c.metrics.last_cycle.duration, 3)),
+}
+
+# Bilan énergétique tarifé : clé -> (unité, icône, décimales) ; une entité par période, l'heure en cours en attribut
+ANALYTICS_SENSORS = {
+    "self_consumption": ("%", "mdi:home-lightning-bolt-outline", 1),
+    "autarky": ("%", "mdi:home-battery-outline", 1),
+    "round_trip_efficiency": ("%", "mdi:battery-sync-outline", 1),
+    "net_cost": (None, "mdi:cash", 2),
+}
+ANALYTICS_PERIODS = ("day", "month")
+
+# Prévision sur 24 h : clé -> (unité, icône, state_class, lecture de la valeur) ; détail horaire en attribut
+FORECAST_SENSORS = {
+    "forecast_solar_energy": ("kWh", "mdi:solar-power-variant-outline", None, lambda f: round(f["solar_energy"], 2)),
+    "forecast_consumption_energy": ("kWh", "mdi:home-lightning-bolt-outline", None, lambda f: round(f["consumption_energy"], 2)),
+    "forecast_soc_min": ("%", "mdi:battery-arrow-down-outline", "measurement", lambda f: f["soc_min"] and round(f["soc_min"][0], 1)),
+    "forecast_soc_max": ("%", "mdi:battery-arrow-up-outline", "measurement", lambda f: f["soc_max"] and round(f["soc_max"][0], 1)),
+}
+# Champs du détail horaire repris par chaque capteur de prévision
+FORECAST_ATTRIBUTE_FIELDS = {
+    "forecast_solar_energy": ("solar_power",),
+    "forecast_consumption_energy": ("consumption",),
+    "forecast_soc_min": ("soc",),
+    "forecast_soc_max": ("soc",),
+}
+
+def derive_power(value, mode):
+    """Convertit une puissance brute selon le mode (charge/décharge, import/export)."""
+    if value is None:
+        return None
+    if not isinstance(value, float):
+        try:
+            value = float(value)
+        except (ValueError, TypeError):
+            return None
+    if mode is None:
+        return value
+    if mode in ["charging", "meter_pos"]:
+        return value if value > 0 else 0.0
+    elif mode in ["discharging", "meter_neg"]:
+        return value if value < 0 else 0.0
+    return None
+
+
+class BeemChangeAwareMixin:
+    """N'écrit l'état que si une valeur suivie (ou la disponibilité) a changé.
+
+    `_change_keys` : clés de changement du coordinateur, la première portant la valeur
+    principale ; l'entité est abonnée aux mises à jour groupées de son appareil.
+    `_expose_stale` : l'entité publie les attributs `stale`/`stale_since` et est donc
+    réécrite quand les données passent de fraîches à périmées (et inversement).
+    """
+
+    _change_keys = ()
+    _expose_stale = False
+    _last_available = None
+    _last_stale = None
+
+    @callback
+    def _handle_coordinator_update(self):
+        available = self.available
+        stale = self._expose_stale and self.coordinator.stale
+        if (
+            available != self._last_available
+            or stale != self._last_stale
+            or any(self.coordinator.has_changed(key) for key in self._change_keys)
+        ):
+            self._last_available = available
+            self._last_stale = stale
+            self.async_write_ha_state()
+
+    def _stale_attributes(self) -> dict:
+        stale_since = self.coordinator.stale_since
+        return {"stale": self.coordinator.stale, "stale_since": stale_since.isoformat() if stale_since else None}
+
+    async def async_added_to_hass(self):
+        self._last_available = self.available
+        self._last_stale = self._expose_stale and self.coordinator.stale
+        self.async_on_remove(
+            self.coordinator.async_add_device_listener(self._change_keys[0][:-1], self._handle_coordinator_update)
+        )
+
+
 async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry, async_add_entities: AddEntitiesCallback):
     coordinator = hass.data[DOMAIN][entry.entry_id]
-    battery_id = entry.data.get("battery_id")
-
+    pending = False
+
+    @callback
+    def _async_add_new_devices():
+        """Crée les entités des appareils apparus depuis le dernier cycle (sans recharger l'entrée)."""
+        nonlocal pending
+        pending = False
+        sensors = []
+        for device_key in coordinator.device_keys:
+            identifier = device_identifier(device_key)
+            if "sensor" in coordinator.entity_devices.get(identifier, ()):
+                continue
+            device_sensors = _device_sensors(coordinator, device_key)
+            # Batterie sans données live pour l'instant : nouvel essai au prochain cycle
+            if device_sensors is None:
+                pending = True
+                continue
+            coordinator.entity_devices.setdefault(identifier, set()).add("sensor")
+            sensors.extend(device_sensors)
+        if sensors:
+            async_add_entities(sensors)
+
+    @callback
+    def _async_handle_coordinator_update():
+        if coordinator.devices_changed or pending:
+            _async_add_new_devices()
+
+    _async_add_new_devices()
+    async_add_entities([BeemMetricSensor(coordinator, key) for key in METRIC_SENSORS])
+    entry.async_on_unload(coordinator.async_add_listener(_async_handle_coordinator_update))
+
+
+def _device_sensors(coordinator, device_key: tuple) -> list | None:
+    kind, *ids = device_key
     sensors = []
 
-    if battery_id and coordinator.data.get("battery"):
+    if kind == "battery":
+        battery_id = ids[0]
+        if battery_id not in coordinator.battery_index:
+            return None
+
         for sensor_key, (unit, icon) in SENSOR_DEFINITIONS.items():
             sensors.append(BeemSensor(coordinator, sensor_key, battery_id, unit, icon))
 
@@ -58,32 +203,44 @@ async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry, async_add_e
         sensors.append(BeemDerivedSensor(coordinator, battery_id, "meterPower", "meter_pos"))
         sensors.append(BeemDerivedSensor(coordinator, battery_id, "meterPower", "meter_neg"))
 
-        sensors.append(BeemEnergySensor(hass, coordinator, battery_id, "sensor.batterypower_charging", "Battery Energy Charging (kWh)"))
-        sensors.append(BeemEnergySensor(hass, coordinator, battery_id, "sensor.batterypower_discharging", "Battery Energy Discharging (kWh)"))
-        sensors.append(BeemEnergySensor(hass, coordinator, battery_id, "sensor.beem_battery_solarpower", "Battery Solar Energy (kWh)"))
-        sensors.append(BeemEnergySensor(hass, coordinator, battery_id, "sensor.meterpower_meter_pos", "Meter Power Positive (kWh)"))
-        sensors.append(BeemEnergySensor(hass, coordinator, battery_id, "sensor.meterpower_meter_neg", "Meter Power Negative (kWh)"))
-
-        for idx, equipment in enumerate(coordinator.solar_equipments):
-            equipment_id = equipment.get("mpptId", f"solar_{idx}")
-            for key, (unit, icon) in SOLAR_EQUIPMENT_SENSORS.items():
-                if key in equipment:
-                    sensors.append(SolarEquipmentSensor(coordinator, equipment_id, key, unit, idx, icon))
-
-    for box in coordinator.beemboxes:
-        box_id = box.get("macAddress") or box.get("id") or "unknown"
+        sensors.append(BeemEnergySensor(coordinator, battery_id, "batteryPower", "charging", "Battery Energy Charging (kWh)"))
+        sensors.append(BeemEnergySensor(coordinator, battery_id, "batteryPower", "discharging", "Battery Energy Discharging (kWh)"))
+        sensors.append(BeemEnergySensor(coordinator, battery_id, "solarPower", None, "Battery Solar Energy (kWh)"))
+        sensors.append(BeemEnergySensor(coordinator, battery_id, "meterPower", "meter_pos", "Meter Power Positive (kWh)"))
+        sensors.append(BeemEnergySensor(coordinator, battery_id, "meterPower", "meter_neg", "Meter Power Negative (kWh)"))
+
+        for key in ANALYTICS_SENSORS:
+            for period in ANALYTICS_PERIODS:
+                sensors.append(BeemAnalyticsSensor(coordinator, battery_id, key, period))
+
+        for key in FORECAST_SENSORS:
+            sensors.append(BeemForecastSensor(coordinator, battery_id, key))
+
+    elif kind == "solar":
+        battery_id, equipment_id = ids
+        equipment = coordinator.solar_index[(battery_id, equipment_id)]
+        for key, (unit, icon) in SOLAR_EQUIPMENT_SENSORS.items():
+            if key in equipment:
+                sensors.append(SolarEquipmentSensor(coordinator, battery_id, equipment_id, key, unit, icon))
+
+    elif kind == "beembox":
+        box_id = ids[0]
+        box = coordinator.beembox_index[box_id]
         for key, (unit, icon) in BEEMBOX_SENSORS.items():
             if key in box:
                 sensors.append(BeemBoxSensor(coordinator, box_id, key, unit, icon))
 
-    async_add_entities(sensors)
+    return sensors
+
 
+class BeemSensor(BeemChangeAwareMixin, SensorEntity):
+    _expose_stale = True
 
-class BeemSensor(SensorEntity):
     def __init__(self, coordinator, sensor_key, battery_id, unit, icon):
         self.coordinator = coordinator
         self._sensor_key = sensor_key
         self._battery_id = battery_id
+        self._change_keys = (("battery", battery_id, sensor_key),)
         self._attr_native_unit_of_measurement = unit
         self._attr_icon = icon
         self._attr_unique_id = f"{battery_id}_{sensor_key}"
@@ -92,107 +249,133 @@ class BeemSensor(SensorEntity):
 
     @property
     def available(self):
-        return self.coordinator.last_update_success
+        return self.coordinator.last_update_success and self._battery_id in self.coordinator.battery_index
 
     @property
     def native_value(self):
-        battery_data = self.coordinator.data.get("battery", {})
+        battery_data = self.coordinator.battery_index.get(self._battery_id)
+        if battery_data is None:
+            return None
         return battery_data.get(self._sensor_key)
 
+    @property
+    def extra_state_attributes(self):
+        return self._stale_attributes()
+
     @property
     def device_info(self):
         return {
-            "identifiers": {(DOMAIN, str(self._battery_id))},
+            "identifiers": {(DOMAIN, device_identifier(("battery", self._battery_id)))},
             "name": "Beem Battery",
             "manufacturer": "Beem",
             "model": "Beem Battery",
             "configuration_url": "https://beem.energy/",
         }
 
-    async def async_added_to_hass(self):
-        self.async_on_remove(self.coordinator.async_add_listener(self.async_write_ha_state))
 
+class SolarEquipmentSensor(BeemChangeAwareMixin, SensorEntity):
+    _expose_stale = True
 
-class SolarEquipmentSensor(SensorEntity):
-    def __init__(self, coordinator, equipment_id, sensor_key, unit, equipment_index, icon):
+    def __init__(self, coordinator, battery_id, equipment_id, sensor_key, unit, icon):
         self.coordinator = coordinator
+        self._battery_id = battery_id
         self._equipment_id = equipment_id
         self._sensor_key = sensor_key
+        self._change_keys = (("solar", battery_id, equipment_id, sensor_key),)
+        if sensor_key == SOLAR_ATTRIBUTES_SENSOR:
+            self._change_keys += tuple(("solar", battery_id, equipment_id, key) for key in SOLAR_STATIC_ATTRIBUTES)
         self._unit = unit
-        self._equipment_index = equipment_index
         self._attr_native_unit_of_measurement = unit
         self._attr_icon = icon
-        self._attr_unique_id = f"solar_{equipment_id}_{sensor_key}"
+        self._attr_entity_registry_enabled_default = sensor_key not in SOLAR_STATIC_ATTRIBUTES
+        self._attr_unique_id = f"solar_{battery_id}_{equipment_id}_{sensor_key}"
         self._attr_name = f"Solar Equipment {equipment_id} {sensor_key}"
         self._attr_has_entity_name = True
 
     @property
     def available(self):
-        return self.coordinator.last_update_success and len(self.coordinator.solar_equipments) > self._equipment_index
+        return self.coordinator.last_update_success and (self._battery_id, self._equipment_id) in self.coordinator.solar_index
 
     @property
     def native_value(self):
-        try:
-            equipment = self.coordinator.solar_equipments[self._equipment_index]
-            return equipment.get(self._sensor_key)
-        except IndexError:
+        equipment = self.coordinator.solar_index.get((self._battery_id, self._equipment_id))
+        if equipment is None:
             return None
+        return equipment.get(self._sensor_key)
+
+    @property
+    def extra_state_attributes(self):
+        attributes = self._stale_attributes()
+        equipment = self.coordinator.solar_index.get((self._battery_id, self._equipment_id))
+        if self._sensor_key == SOLAR_ATTRIBUTES_SENSOR and equipment is not None:
+            attributes.update((key, equipment.get(key)) for key in SOLAR_STATIC_ATTRIBUTES if key in equipment)
+        return attributes
 
     @property
     def device_info(self):
         return {
-            "identifiers": {(DOMAIN, f"solar_{self._equipment_id}")},
+            "identifiers": {(DOMAIN, device_identifier(("solar", self._battery_id, self._equipment_id)))},
             "name": f"Beem Solar Equipment {self._equipment_id}",
             "manufacturer": "Beem",
             "model": "Solar Equipment",
+            "via_device": (DOMAIN, device_identifier(("battery", self._battery_id))),
             "configuration_url": "https://beem.energy/",
         }
 
-    async def async_added_to_hass(self):
-        self.async_on_remove(self.coordinator.async_add_listener(self.async_write_ha_state))
 
+class BeemBoxSensor(BeemChangeAwareMixin, SensorEntity):
+    _expose_stale = True
 
-class BeemBoxSensor(SensorEntity):
     def __init__(self, coordinator, box_id, sensor_key, unit, icon):
         self.coordinator = coordinator
         self._box_id = box_id
         self._sensor_key = sensor_key
+        self._change_keys = (("beembox", box_id, sensor_key),)
+        if sensor_key == BEEMBOX_ATTRIBUTES_SENSOR:
+            self._change_keys += tuple(("beembox", box_id, key) for key in BEEMBOX_STATIC_ATTRIBUTES)
         self._attr_native_unit_of_measurement = unit
         self._attr_icon = icon
+        self._attr_entity_registry_enabled_default = sensor_key not in BEEMBOX_STATIC_ATTRIBUTES
         self._attr_unique_id = f"beembox_{box_id}_{sensor_key}"
         self._attr_name = f"BeemBox {box_id} {sensor_key}"
         self._attr_has_entity_name = True
 
     @property
     def available(self):
-        return self.coordinator.last_update_success
+        return self.coordinator.last_update_success and self._box_id in self.coordinator.beembox_index
 
     @property
     def native_value(self):
-        for box in self.coordinator.beemboxes:
-            if (box.get("macAddress") or box.get("id")) == self._box_id:
-                return box.get(self._sensor_key)
-        return None
+        box = self.coordinator.beembox_index.get(self._box_id)
+        if box is None:
+            return None
+        return box.get(self._sensor_key)
+
+    @property
+    def extra_state_attributes(self):
+        attributes = self._stale_attributes()
+        box = self.coordinator.beembox_index.get(self._box_id)
+        if self._sensor_key == BEEMBOX_ATTRIBUTES_SENSOR and box is not None:
+            attributes.update((key, box.get(key)) for key in BEEMBOX_STATIC_ATTRIBUTES if key in box)
+        return attributes
 
     @property
     def device_info(self):
         return {
-            "identifiers": {(DOMAIN, f"beembox_{self._box_id}")},
+            "identifiers": {(DOMAIN, device_identifier(("beembox", self._box_id)))},
             "name": f"BeemBox {self._box_id}",
             "manufacturer": "Beem",
             "model": "BeemOn / PnP",
             "configuration_url": "https://beem.energy/",
         }
 
-    async def async_added_to_hass(self):
-        self.async_on_remove(self.coordinator.async_add_listener(self.async_write_ha_state))
-
 
-class BeemDerivedSensor(SensorEntity):
+class BeemDerivedSensor(BeemChangeAwareMixin, SensorEntity):
     def __init__(self, coordinator, battery_id, source_key, mode):
         self.coordinator = coordinator
         self._battery_id = battery_id
         self._source_key = source_key
+        self._change_keys = (("battery", battery_id, source_key),)
         self._mode = mode
         self._attr_name = f"{source_key}_{mode}"
         self._attr_unique_id = f"{battery_id}_{source_key}_{mode}"
@@ -203,43 +386,32 @@ class BeemDerivedSensor(SensorEntity):
 
     @property
     def native_value(self):
-        value = self.coordinator.data.get("battery", {}).get(self._source_key)
-        if value is None:
+        battery_data = self.coordinator.battery_index.get(self._battery_id)
+        if battery_data is None:
             return None
-        try:
-            value = float(value)
-        except (ValueError, TypeError):
-            return None
-        if self._mode in ["charging", "meter_pos"]:
-            return value if value > 0 else 0.0
-        elif self._mode in ["discharging", "meter_neg"]:
-            return value if value < 0 else 0.0
-        return None
+        return derive_power(battery_data.get(self._source_key), self._mode)
 
     @property
     def available(self):
-        return self.coordinator.last_update_success
+        return self.coordinator.last_update_success and self._battery_id in self.coordinator.battery_index
 
     @property
     def device_info(self):
         return {
-            "identifiers": {(DOMAIN, str(self._battery_id))},
+            "identifiers": {(DOMAIN, device_identifier(("battery", self._battery_id)))},
             "name": "Beem Battery",
             "manufacturer": "Beem",
             "model": "Beem Battery",
             "configuration_url": "https://beem.energy/",
         }
 
-    async def async_added_to_hass(self):
-        self.async_on_remove(self.coordinator.async_add_listener(self.async_write_ha_state))
 
-
-class BeemEnergySensor(SensorEntity):
-    def __init__(self, hass, coordinator, battery_id, source_entity_id, name):
-        self.hass = hass
+class BeemEnergySensor(RestoreEntity, SensorEntity):
+    def __init__(self, coordinator, battery_id, source_key, mode, name):
         self.coordinator = coordinator
         self._battery_id = battery_id
-        self._source_entity_id = source_entity_id
+        self._source_key = source_key
+        self._mode = mode
         self._attr_name = name
         self._attr_unique_id = f"{battery_id}_{name.lower().replace(' ', '_')}"
         self._attr_native_unit_of_measurement = "kWh"
@@ -247,38 +419,226 @@ class BeemEnergySensor(SensorEntity):
         self._attr_device_class = "energy"
         self._attr_entity_category = EntityCategory.DIAGNOSTIC
 
-        self._last_updated = None
-        self._integrated_value = 0
+        self._integrator = EnergyIntegrator(ENERGY_INTEGRATION_METHOD, timedelta(seconds=ENERGY_MAX_GAP))
+        self._last_available = True
 
     async def async_added_to_hass(self):
-        self._last_updated = self.hass.helpers.event.dt_util.utcnow()
-        self.async_on_remove(self.coordinator.async_add_listener(self._handle_coordinator_update))
+        await super().async_added_to_hass()
+
+        # Reprise de l'accumulateur après un redémarrage (statistiques total_increasing)
+        last_extra = await self.async_get_last_extra_data()
+        if last_extra is not None:
+            self._integrator.restore(last_extra.as_dict())
+        else:
+            last_state = await self.async_get_last_state()
+            if last_state is not None:
+                self._integrator.restore({"value": last_state.state})
+
+        self.async_on_remove(
+            self.coordinator.async_add_device_listener(("battery", self._battery_id), self._handle_coordinator_update)
+        )
+        self._handle_coordinator_update()
+
+    @property
+    def extra_restore_state_data(self):
+        return RestoredExtraData(self._integrator.as_dict())
+
+    @property
+    def available(self):
+        # Le compteur reste disponible si une mesure manque ; il ne l'est plus si la batterie a disparu
+        return ("battery", self._battery_id) in self.coordinator.device_keys
 
+    @callback
     def _handle_coordinator_update(self):
-        state = self.hass.states.get(self._source_entity_id)
-        if state is None or state.state in (None, "unknown", "unavailable"):
+        available = self.available
+        if available != self._last_available:
+            self._last_available = available
+            self.async_write_ha_state()
+
+        battery_data = self.coordinator.battery_index.get(self._battery_id)
+        if battery_data is None:
             return
-        try:
-            power_watts = float(state.state)
-        except (ValueError, TypeError):
+
+        power_watts = derive_power(battery_data.get(self._source_key), self._mode)
+        if power_watts is None:
             return
-        now = self.hass.helpers.event.dt_util.utcnow()
-        if self._last_updated is not None:
-            elapsed_hours = (now - self._last_updated).total_seconds() / 3600
-            self._integrated_value += (power_watts * elapsed_hours) / 1000
-        self._last_updated = now
-        self.async_write_ha_state()
+
+        # L'horodatage de la mesure côté Beem fait foi ; à défaut, l'heure de réception
+        timestamp = battery_data.measured_at or dt_util.utcnow()
+
+        # Les compteurs sont croissants : la décharge et l'export sont intégrés en valeur absolue
+        if self._integrator.add_sample(timestamp, abs(power_watts)):
+            self.async_write_ha_state()
+
+    @property
+    def native_value(self):
+        return round(self._integrator.value, 2)
+
+    @property
+    def device_info(self):
+        return {
+            "identifiers": {(DOMAIN, device_identifier(("battery", self._battery_id)))},
+            "name": "Beem Battery",
+            "manufacturer": "Beem",
+            "model": "Beem Battery",
+            "configuration_url": "https://beem.energy/",
+        }
+
+
+class BeemAnalyticsSensor(BeemChangeAwareMixin, SensorEntity):
+    """Taux ou coût net du jour ou du mois, calculé une fois par cycle par le coordinateur."""
+
+    def __init__(self, coordinator, battery_id, key, period):
+        unit, icon, digits = ANALYTICS_SENSORS[key]
+        self.coordinator = coordinator
+        self._battery_id = battery_id
+        self._key = key
+        self._period = period
+        self._digits = digits
+        self._change_keys = (("battery", battery_id, "analytics"),)
+        self._attr_icon = icon
+        self._attr_unique_id = f"{battery_id}_{key}_{period}"
+        self._attr_name = f"{key}_{period}"
+        self._attr_has_entity_name = True
+        if key == "net_cost":
+            self._attr_native_unit_of_measurement = coordinator.hass.config.currency
+            self._attr_device_class = "monetary"
+            self._attr_state_class = "total"
+        else:
+            self._attr_native_unit_of_measurement = unit
+            self._attr_state_class = "measurement"
+
+    @property
+    def available(self):
+        return ("battery", self._battery_id) in self.coordinator.device_keys
+
+    def _value(self, period):
+        balance = self.coordinator.analytics.balance(self._battery_id, period)
+        if balance is None:
+            return None
+        return _round(ratios(balance)[self._key], self._digits)
 
     @property
     def native_value(self):
-        return round(self._integrated_value, 2)
+        return self._value(self._period)
+
+    @property
+    def last_reset(self):
+        if self._key != "net_cost":
+            return None
+        start = dt_util.start_of_local_day()
+        return start.replace(day=1) if self._period == "month" else start
+
+    @property
+    def extra_state_attributes(self):
+        attributes = {"current_hour": self._value("hour")}
+        balance = self.coordinator.analytics.balance(self._battery_id, self._period)
+        if balance is not None and self._key == "net_cost":
+            attributes["import_cost"] = round(balance["import_cost"], 2)
+            attributes["export_revenue"] = round(balance["export_revenue"], 2)
+        return attributes
 
     @property
     def device_info(self):
         return {
-            "identifiers": {(DOMAIN, str(self._battery_id))},
+            "identifiers": {(DOMAIN, device_identifier(("battery", self._battery_id)))},
             "name": "Beem Battery",
             "manufacturer": "Beem",
             "model": "Beem Battery",
             "configuration_url": "https://beem.energy/",
         }
+
+
+class BeemForecastSensor(BeemChangeAwareMixin, SensorEntity):
+    """Énergie ou SOC extrême prévus sur 24 h, recalculés en arrière-plan par le prévisionniste."""
+
+    # Le détail horaire change à chaque calcul : inutile de l'enregistrer
+    _unrecorded_attributes = frozenset({"forecast"})
+
+    def __init__(self, coordinator, battery_id, key):
+        unit, icon, state_class, getter = FORECAST_SENSORS[key]
+        self.coordinator = coordinator
+        self._battery_id = battery_id
+        self._key = key
+        self._getter = getter
+        self._change_keys = (("battery", battery_id, "forecast"),)
+        self._attr_native_unit_of_measurement = unit
+        self._attr_icon = icon
+        self._attr_state_class = state_class
+        self._attr_unique_id = f"{battery_id}_{key}"
+        self._attr_name = key
+        self._attr_has_entity_name = True
+
+    @property
+    def available(self):
+        return ("battery", self._battery_id) in self.coordinator.device_keys and self._battery_id in self.coordinator.forecaster.forecasts
+
+    @property
+    def native_value(self):
+        forecast = self.coordinator.forecaster.forecasts.get(self._battery_id)
+        return None if forecast is None else self._getter(forecast)
+
+    @property
+    def extra_state_attributes(self):
+        forecast = self.coordinator.forecaster.forecasts.get(self._battery_id)
+        if forecast is None:
+            return None
+        fields = FORECAST_ATTRIBUTE_FIELDS[self._key]
+        attributes = {
+            "computed_at": forecast["computed_at"],
+            "forecast": [
+                {"datetime": entry["datetime"], **{field: entry[field] for field in fields if field in entry}}
+                for entry in forecast["hourly"]
+            ],
+        }
+        # SOC minimal / maximal : heure à laquelle il est atteint
+        extreme = forecast.get(self._key.removeprefix("forecast_")) if self._key.startswith("forecast_soc") else None
+        if extreme:
+            attributes["at"] = extreme[1]
+        return attributes
+
+    @property
+    def device_info(self):
+        return {
+            "identifiers": {(DOMAIN, device_identifier(("battery", self._battery_id)))},
+            "name": "Beem Battery",
+            "manufacturer": "Beem",
+            "model": "Beem Battery",
+            "configuration_url": "https://beem.energy/",
+        }
+
+
+class BeemMetricSensor(SensorEntity):
+    """Mesure de performance du compte (requêtes, erreurs, latence, durée de cycle)."""
+
+    def __init__(self, coordinator, key):
+        unit, icon, state_class, enabled, getter = METRIC_SENSORS[key]
+        self.coordinator = coordinator
+        self._getter = getter
+        self._email = coordinator.api_client.email
+        self._attr_native_unit_of_measurement = unit
+        self._attr_icon = icon
+        self._attr_state_class = state_class
+        self._attr_entity_registry_enabled_default = enabled
+        self._attr_entity_category = EntityCategory.DIAGNOSTIC
+        self._attr_unique_id = f"account_{self._email}_{key}"
+        self._attr_name = key
+        self._attr_has_entity_name = True
+
+    async def async_added_to_hass(self):
+        self.async_on_remove(self.coordinator.async_add_cycle_listener(self.async_write_ha_state))
+
+    @property
+    def native_value(self):
+        return self._getter(self.coordinator)
+
+    @property
+    def device_info(self):
+        return {
+            "identifiers": {(DOMAIN, f"account_{self._email}")},
+            "name": "Beem Cloud",
+            "manufacturer": "Beem",
+            "model": "API Beem",
+            "entry_type": DeviceEntryType.SERVICE,
+            "configuration_url": "https://beem.energy/",
+        }
@@ -1,28 +1,53 @@
 from homeassistant.helpers.storage import Store
+import asyncio
 import logging
 
 _LOGGER = logging.getLogger(__name__)
 
+DATA_SECURE_STORAGE = "Beem_Energy_secure_storage"
+SAVE_DELAY = 1
+
+
+def get_secure_storage(hass) -> "BeemSecureStorage":
+    """Retourne le stockage partagé par toutes les entrées de cette instance Home Assistant."""
+    storage = hass.data.get(DATA_SECURE_STORAGE)
+    if storage is None:
+        storage = hass.data[DATA_SECURE_STORAGE] = BeemSecureStorage(hass)
+    return storage
+
+
 class BeemSecureStorage:
     def __init__(self, hass):
         self._hass = hass
         self._store = Store(hass, 1, "Beem_Energy_passwords")
+        self._data = None
+        self._lock = asyncio.Lock()
+
+    async def _async_load(self) -> dict:
+        """Charge le fichier une seule fois puis sert la copie en mémoire."""
+        if self._data is None:
+            self._data = await self._store.async_load() or {}
+        return self._data
+
+    def _data_to_save(self) -> dict:
+        return dict(self._data or {})
 
     async def save_password(self, email: str, password: str):
-        data = await self._store.async_load() or {}
-        data[email] = password
-        await self._store.async_save(data)
+        async with self._lock:
+            data = await self._async_load()
+            data[email] = password
+            self._store.async_delay_save(self._data_to_save, SAVE_DELAY)
         _LOGGER.debug("Mot de passe enregistré de façon sécurisée pour %s", email)
 
     async def get_password(self, email: str) -> str | None:
-        data = await self._store.async_load()
-        if data:
-            return data.get(email)
-        return None
+        async with self._lock:
+            data = await self._async_load()
+        return data.get(email)
 
     async def clear_password(self, email: str):
-        data = await self._store.async_load() or {}
-        if email in data:
-            del data[email]
-            await self._store.async_save(data)
-            _LOGGER.debug("Mot de passe supprimé du stockage sécurisé pour %s", email)
+        async with self._lock:
+            data = await self._async_load()
+            if email in data:
+                del data[email]
+                self._store.async_delay_save(self._data_to_save, SAVE_DELAY)
+                _LOGGER.debug("Mot de passe supprimé du stockage sécurisé pour %s", email)
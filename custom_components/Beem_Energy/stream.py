@@ -0,0 +1,105 @@
+"""Flux push des données live Beem, avec repli sur le polling."""
+
+import asyncio
+import logging
+
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.core import HomeAssistant, callback
+
+from .const import DOMAIN, STREAM_UNSUPPORTED_RETRY
+from .exceptions import BeemApiError, BeemCircuitOpenError, BeemResponseError
+from .resilience import backoff_delay
+
+_LOGGER = logging.getLogger(__name__)
+
+# Type des événements portant une mesure live : {"batteryId": ..., "liveData": {...}}
+LIVE_DATA_EVENT = "live-data"
+
+# Statuts indiquant que le serveur ne fournit pas de flux
+UNSUPPORTED_STATUSES = (404, 405, 501)
+
+
+class BeemLiveStream:
+    """Maintient le flux push d'un compte et bascule le coordinateur entre push et polling.
+
+    Le coordinateur passe en mode push au premier événement reçu ; toute coupure
+    (erreur, fermeture, silence prolongé) le ramène aussitôt au polling et le flux est
+    rouvert avec un délai exponentiel. Un serveur sans flux n'est sondé qu'une fois
+    par `STREAM_UNSUPPORTED_RETRY`.
+    """
+
+    def __init__(self, hass: HomeAssistant, coordinator):
+        self.hass = hass
+        self.coordinator = coordinator
+        self.connected = False
+        self.supported = None
+        self.events = 0
+        self.disconnects = 0
+        self._task = None
+
+    @callback
+    def async_start(self, entry: ConfigEntry) -> None:
+        if self._task is None:
+            self._task = entry.async_create_background_task(
+                self.hass, self._async_run(), f"{DOMAIN} live stream {self.coordinator.api_client.email}"
+            )
+
+    @callback
+    def async_stop(self) -> None:
+        """Ferme le flux sans relancer de cycle (arrêt de l'entrée ou option désactivée)."""
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+        self.connected = False
+        self.coordinator.push_active = False
+
+    async def _async_run(self) -> None:
+        api = self.coordinator.api_client
+        failures = 0
+        while True:
+            try:
+                async for event, payload in api.stream_live_data():
+                    if event not in (None, LIVE_DATA_EVENT) or not isinstance(payload, dict):
+                        continue
+                    if not self.connected:
+                        _LOGGER.info("Flux live Beem connecté, passage en mode push")
+                        self.supported = True
+                        self._set_connected(True)
+                    failures = 0
+                    self.events += 1
+                    self.coordinator.async_push_live_data(payload.get("batteryId"), payload.get("liveData"))
+            except BeemResponseError as err:
+                if err.status not in UNSUPPORTED_STATUSES:
+                    failures += 1
+                    delay = self._interrupted(err, backoff_delay(failures))
+                else:
+                    if self.supported is not False:
+                        _LOGGER.info("Pas de flux live fourni par l'API Beem (%s), polling conservé", err)
+                    self.supported = False
+                    self._set_connected(False)
+                    delay = STREAM_UNSUPPORTED_RETRY
+            except BeemCircuitOpenError as err:
+                delay = self._interrupted(err, api.circuit_breaker.recovery_timeout)
+            except BeemApiError as err:
+                failures += 1
+                delay = self._interrupted(err, backoff_delay(failures))
+            except Exception:
+                _LOGGER.exception("Erreur inattendue sur le flux live Beem")
+                failures += 1
+                delay = self._interrupted(None, backoff_delay(failures))
+            await asyncio.sleep(delay)
+
+    def _interrupted(self, err: Exception | None, delay: float) -> float:
+        if self.connected:
+            _LOGGER.warning("Flux live Beem interrompu (%s), retour au polling", err)
+            self.disconnects += 1
+        else:
+            _LOGGER.debug("Flux live Beem indisponible (%s), nouvel essai dans %.0f s", err, delay)
+        self._set_connected(False)
+        return delay
+
+    def _set_connected(self, connected: bool) -> None:
+        if connected == self.connected:
+            return
+        self.connected = connected
+        self.coordinator.async_set_push_active(connected)
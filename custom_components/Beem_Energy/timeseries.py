@@ -0,0 +1,266 @@
+"""Série temporelle locale des mesures Beem (tampons circulaires + agrégats)."""
+
+from array import array
+from bisect import bisect_left, bisect_right
+from datetime import datetime
+import base64
+import json
+import logging
+import os
+import zlib
+
+from homeassistant.core import HomeAssistant
+from homeassistant.util import slugify
+
+from .const import DOMAIN
+
+_LOGGER = logging.getLogger(__name__)
+
+STORAGE_VERSION = 1
+
+# Capacité des tampons : échantillons bruts puis agrégats 5 min / horaires / journaliers
+RAW_CAPACITY = 4320
+TIERS = {
+    300: 7 * 288,
+    3600: 92 * 24,
+    86400: 5 * 366,
+}
+
+# Colonnes des agrégats
+BUCKET_START, BUCKET_COUNT, BUCKET_SUM, BUCKET_MIN, BUCKET_MAX = range(5)
+
+
+class RingBuffer:
+    """Tampon circulaire borné, à colonnes `array('d')`, ordonné par la première colonne.
+
+    Les colonnes grandissent au fil des ajouts jusqu'à `capacity` : une grandeur peu
+    alimentée n'occupe que la mémoire de ses échantillons.
+    """
+
+    __slots__ = ("capacity", "_columns", "_start", "_size")
+
+    def __init__(self, capacity: int, columns: int = 2):
+        self.capacity = capacity
+        self._columns = [array("d") for _ in range(columns)]
+        self._start = 0
+        self._size = 0
+
+    def __len__(self) -> int:
+        return self._size
+
+    def _physical(self, index: int) -> int:
+        return (self._start + index) % self.capacity
+
+    def append(self, *row: float) -> None:
+        if self._size < self.capacity:
+            # Pas encore plein : `_start` vaut 0, la ligne s'ajoute en fin de colonne
+            for column, value in zip(self._columns, row):
+                column.append(value)
+            self._size += 1
+            return
+        position = self._start
+        self._start = (self._start + 1) % self.capacity
+        for column, value in zip(self._columns, row):
+            column[position] = value
+
+    def row(self, index: int) -> tuple:
+        if index < 0:
+            index += self._size
+        position = self._physical(index)
+        return tuple(column[position] for column in self._columns)
+
+    def set_row(self, index: int, *row: float) -> None:
+        if index < 0:
+            index += self._size
+        position = self._physical(index)
+        for column, value in zip(self._columns, row):
+            column[position] = value
+
+    def columns(self) -> list[array]:
+        """Copie des colonnes, de la plus ancienne à la plus récente ligne."""
+        result = []
+        for column in self._columns:
+            end = self._start + self._size
+            if end <= self.capacity:
+                result.append(column[self._start:end])
+            else:
+                result.append(column[self._start:] + column[:end - self.capacity])
+        return result
+
+    def rows_between(self, start: float, end: float) -> list[tuple]:
+        """Lignes dont la première colonne est comprise dans [start, end]."""
+        columns = self.columns()
+        keys = columns[0]
+        lo = bisect_left(keys, start)
+        hi = bisect_right(keys, end)
+        return list(zip(*(column[lo:hi] for column in columns)))
+
+    def rows_after(self, key: float) -> list[tuple]:
+        """Lignes dont la première colonne est strictement supérieure à `key`, sans copier les colonnes."""
+        keys = self._columns[0]
+        lo, hi = 0, self._size
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if keys[self._physical(mid)] <= key:
+                lo = mid + 1
+            else:
+                hi = mid
+        return [self.row(index) for index in range(lo, self._size)]
+
+    @classmethod
+    def from_columns(cls, capacity: int, columns: list[array]) -> "RingBuffer":
+        buffer = cls(capacity, len(columns))
+        if columns:
+            size = min(len(columns[0]), capacity)
+            offset = len(columns[0]) - size
+            buffer._columns = [column[offset:offset + size] for column in columns]
+            buffer._size = size
+        return buffer
+
+
+class TimeSeries:
+    """Une grandeur : échantillons bruts récents et agrégats (moyenne/min/max) par palier."""
+
+    __slots__ = ("raw", "tiers")
+
+    def __init__(self):
+        self.raw = RingBuffer(RAW_CAPACITY, 2)
+        self.tiers = {size: RingBuffer(capacity, 5) for size, capacity in TIERS.items()}
+
+    @property
+    def last_timestamp(self) -> float | None:
+        return self.raw.row(-1)[0] if len(self.raw) else None
+
+    def add(self, timestamp: float, value: float) -> bool:
+        last = self.last_timestamp
+        if last is not None and timestamp <= last:
+            return False
+
+        self.raw.append(timestamp, value)
+        for size, buffer in self.tiers.items():
+            bucket = timestamp - timestamp % size
+            if len(buffer) and buffer.row(-1)[BUCKET_START] == bucket:
+                start, count, total, low, high = buffer.row(-1)
+                buffer.set_row(-1, start, count + 1, total + value, min(low, value), max(high, value))
+            else:
+                buffer.append(bucket, 1, value, value, value)
+        return True
+
+    def query(self, start: float, end: float, resolution: int | None = None) -> list[tuple]:
+        """Retourne des tuples (horodatage, moyenne, min, max) sur [start, end]."""
+        if resolution is None:
+            resolution = self._auto_resolution(start, end)
+
+        if resolution == 0:
+            return [(t, v, v, v) for t, v in self.raw.rows_between(start, end)]
+
+        buffer = self.tiers[resolution]
+        return [
+            (bucket, total / count, low, high)
+            for bucket, count, total, low, high in buffer.rows_between(start - start % resolution, end)
+            if count
+        ]
+
+    def _auto_resolution(self, start: float, end: float) -> int:
+        span = end - start
+        oldest_raw = self.raw.row(0)[0] if len(self.raw) else None
+        if span <= 86400 and oldest_raw is not None and oldest_raw <= start:
+            return 0
+        for size, capacity in TIERS.items():
+            if span <= size * capacity / 4:
+                return size
+        return max(TIERS)
+
+    def snapshot(self) -> dict:
+        """Copie des colonnes (rapide, dans la boucle) ; `encode` la sérialise ensuite hors de la boucle."""
+        return {
+            "raw": self.raw.columns(),
+            "tiers": {size: buffer.columns() for size, buffer in self.tiers.items()},
+        }
+
+    @staticmethod
+    def encode(snapshot: dict) -> dict:
+        return {
+            "raw": [_encode(column) for column in snapshot["raw"]],
+            "tiers": {str(size): [_encode(column) for column in columns] for size, columns in snapshot["tiers"].items()},
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "TimeSeries":
+        series = cls()
+        if data.get("raw"):
+            series.raw = RingBuffer.from_columns(RAW_CAPACITY, [_decode(c) for c in data["raw"]])
+        for size, columns in data.get("tiers", {}).items():
+            size = int(size)
+            if size in TIERS and columns:
+                series.tiers[size] = RingBuffer.from_columns(TIERS[size], [_decode(c) for c in columns])
+        return series
+
+
+def _encode(column: array) -> str:
+    return base64.b64encode(column.tobytes()).decode("ascii")
+
+
+def _decode(text: str) -> array:
+    column = array("d")
+    column.frombytes(base64.b64decode(text))
+    return column
+
+
+class BeemTimeSeriesStore:
+    """Ensemble des séries d'un compte, sauvegardé périodiquement (JSON compressé) hors de la boucle."""
+
+    def __init__(self, hass: HomeAssistant, name: str):
+        self._hass = hass
+        self._path = hass.config.path(".storage", f"{DOMAIN}_timeseries_{slugify(name)}.json.z")
+        self.series = {}
+        self._dirty = False
+
+    def record(self, key: str, timestamp: datetime, value: float | None) -> None:
+        if value is None:
+            return
+        series = self.series.get(key)
+        if series is None:
+            series = self.series[key] = TimeSeries()
+        if series.add(timestamp.timestamp(), float(value)):
+            self._dirty = True
+
+    def query(self, key: str, start: datetime, end: datetime, resolution: int | None = None) -> list[tuple]:
+        series = self.series.get(key)
+        if series is None:
+            return []
+        return series.query(start.timestamp(), end.timestamp(), resolution)
+
+    async def async_load(self) -> None:
+        data = await self._hass.async_add_executor_job(self._read)
+        if not data or data.get("version") != STORAGE_VERSION:
+            return
+        self.series = {key: TimeSeries.from_dict(value) for key, value in data.get("series", {}).items()}
+
+    async def async_flush(self, _now=None) -> None:
+        if not self._dirty:
+            return
+        # Copie cohérente des colonnes dans la boucle ; encodage, compression et écriture dans l'executor
+        snapshot = {key: series.snapshot() for key, series in self.series.items()}
+        self._dirty = False
+        await self._hass.async_add_executor_job(self._write, snapshot)
+
+    def _read(self) -> dict | None:
+        try:
+            with open(self._path, "rb") as file:
+                return json.loads(zlib.decompress(file.read()))
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError, zlib.error) as err:
+            _LOGGER.warning("Série temporelle Beem illisible (%s), elle sera recréée : %s", self._path, err)
+            return None
+
+    def _write(self, snapshot: dict) -> None:
+        payload = json.dumps({
+            "version": STORAGE_VERSION,
+            "series": {key: TimeSeries.encode(columns) for key, columns in snapshot.items()},
+        })
+        temp_path = f"{self._path}.tmp"
+        with open(temp_path, "wb") as file:
+            file.write(zlib.compress(payload.encode("utf-8"), 6))
+        os.replace(temp_path, self._path)
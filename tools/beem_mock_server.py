@@ -0,0 +1,538 @@
+"""Serveur Beem simulé pour tester l'intégration sans le cloud.
+
+Implémente `/user/login`, `/devices`, `/batteries/{id}/live-data`,
+`/batteries/{id}/history`, `/box/summary` et un flux SSE `/live-data/stream` sous le
+préfixe `/beemapp`, avec des données synthétiques (ou rejouées depuis un
+enregistrement) et des pannes injectables : latence, 401, 5xx, 429, réponses lentes.
+Les réponses GET portent un `ETag` et honorent `If-None-Match` (désactivable avec
+`--no-etag` pour simuler un serveur qui n'en fournit pas). Le flux pousse chaque
+nouvelle mesure de chaque batterie (`event: live-data`, données
+`{"batteryId": ..., "liveData": {...}}`) avec un keepalive périodique ; `--no-stream`
+le remplace par un 404, et `POST /_mock/config {"stream": false}` coupe les flux ouverts.
+L'historique (`POST /batteries/{id}/history`, corps `{"from": ..., "to": ...}` en ISO 8601)
+retourne des mesures synthétiques déterministes au format live-data ; `--no-history`
+le remplace par un 404. Les paramètres de pilotage (`GET`/`PATCH
+/batteries/{id}/control-parameters` : `mode`, `minSoc`, `maxSoc`,
+`chargeFromGridMaxPower`) sont appliqués à la simulation et reflétés aussitôt dans
+`workingModeLabel` ; `--no-control` les remplace par un 404.
+
+Utilisation :
+
+    python tools/beem_mock_server.py --batteries 200 --beemboxes 20 --speed 60 --error-rate 0.05
+    BEEM_API_BASE=http://127.0.0.1:8080/beemapp hass -c config
+
+Le format d'enregistrement accepté par `--recording` est un JSON :
+
+    {
+      "devices": {"batteries": [...], "beemboxes": [...]},
+      "liveData": {"<battery_id>": [<réponse live-data>, ...]},
+      "summary": [...]
+    }
+
+Les instantanés `liveData` sont rejoués en boucle, un par `--sample-period` secondes
+simulées. `GET /_mock/stats` retourne les compteurs de requêtes, `POST /_mock/config`
+modifie les paramètres de panne à chaud et `POST /_mock/reset` remet les compteurs à zéro.
+"""
+
+from dataclasses import asdict, dataclass, field
+from datetime import datetime, timedelta, timezone
+import argparse
+import asyncio
+import base64
+import hashlib
+import json
+import math
+import random
+import secrets
+import time
+
+from aiohttp import web
+
+API_PREFIX = "/beemapp"
+
+# Période de scrutation des nouvelles mesures par le flux SSE (secondes réelles)
+STREAM_TICK = 0.5
+
+# Paramètres de pilotage d'une batterie : valeur par défaut et valeurs acceptées
+CONTROL_DEFAULTS = {"mode": "auto", "minSoc": 5, "maxSoc": 100, "chargeFromGridMaxPower": 0}
+CONTROL_MODES = ("auto", "pause", "advanced")
+
+
+@dataclass
+class MockConfig:
+    batteries: int = 1
+    beemboxes: int = 0
+    solar_equipments: int = 2
+    email: str = "demo@beem.energy"
+    password: str = "demo"
+    token_ttl: float = 3600.0
+    speed: float = 1.0
+    sample_period: float = 60.0
+    latency: float = 0.0
+    latency_jitter: float = 0.0
+    slow_rate: float = 0.0
+    slow_delay: float = 5.0
+    unauthorized_rate: float = 0.0
+    error_rate: float = 0.0
+    rate_limit_rate: float = 0.0
+    retry_after: float = 1.0
+    etag: bool = True
+    stream: bool = True
+    stream_keepalive: float = 15.0
+    history: bool = True
+    control: bool = True
+    recording: dict | None = None
+    seed: int | None = None
+
+
+@dataclass
+class MockStats:
+    requests: dict = field(default_factory=dict)
+    injected: dict = field(default_factory=dict)
+    logins: int = 0
+    control_writes: int = 0
+
+    def count(self, bucket: dict, key: str) -> None:
+        bucket[key] = bucket.get(key, 0) + 1
+
+
+def _b64(data: dict) -> str:
+    return base64.urlsafe_b64encode(json.dumps(data).encode()).decode().rstrip("=")
+
+
+class MockBeemState:
+    """État du serveur simulé : équipements, jetons émis, horloge simulée, compteurs."""
+
+    def __init__(self, config: MockConfig):
+        self.config = config
+        self.stats = MockStats()
+        self.random = random.Random(config.seed)
+        self.started = time.monotonic()
+        self.sim_origin = datetime.now(timezone.utc)
+        self.tokens = {}
+        self.soc = {}
+        # Paramètres de pilotage modifiés, par batterie (les autres gardent CONTROL_DEFAULTS)
+        self.control = {}
+        # Une mesure par période : les polls répétés entre deux mesures reçoivent la même réponse
+        self._live_cache = {}
+        self._devices_measure = None
+        self.devices = config.recording.get("devices") if config.recording else self._synthetic_devices()
+        for battery in self.devices.get("batteries", []):
+            self.soc[battery["id"]] = 50.0
+
+    # Horloge simulée (accélérée par `speed`)
+    def sim_now(self) -> datetime:
+        elapsed = (time.monotonic() - self.started) * self.config.speed
+        return self.sim_origin + timedelta(seconds=elapsed)
+
+    def measure_time(self) -> datetime:
+        now = self.sim_now()
+        period = self.config.sample_period
+        return datetime.fromtimestamp(now.timestamp() - now.timestamp() % period, timezone.utc)
+
+    def issue_token(self) -> str:
+        exp = time.time() + self.config.token_ttl
+        token = ".".join((
+            _b64({"alg": "none", "typ": "JWT"}),
+            _b64({"sub": self.config.email, "exp": exp}),
+            secrets.token_urlsafe(8),
+        ))
+        self.tokens[token] = exp
+        self.stats.logins += 1
+        return token
+
+    def token_valid(self, header: str | None) -> bool:
+        if not header or not header.startswith("Bearer "):
+            return False
+        exp = self.tokens.get(header[len("Bearer "):])
+        return exp is not None and exp > time.time()
+
+    def _synthetic_devices(self) -> dict:
+        batteries = []
+        for index in range(self.config.batteries):
+            battery_id = 1000 + index
+            batteries.append({
+                "id": battery_id,
+                "serialNumber": f"BEEM-BAT-{battery_id}",
+                "solarEquipments": [
+                    {
+                        "mpptId": f"{battery_id}-{mppt}",
+                        "orientation": 180 + 15 * mppt,
+                        "tilt": 30,
+                        "peakPower": 1500,
+                        "solarPanelsInParallel": 1,
+                        "solarPanelsInSeries": 4,
+                    }
+                    for mppt in range(self.config.solar_equipments)
+                ],
+            })
+        beemboxes = [
+            {
+                "id": 5000 + index,
+                "macAddress": f"AA:BB:CC:00:{index // 256:02X}:{index % 256:02X}",
+                "name": f"BeemBox {index}",
+                "serialNumber": f"BEEM-BOX-{index}",
+                "power": 0,
+                "wattHour": 0,
+                "totalDay": 0,
+                "totalMonth": 0,
+                "lastDbm": -60,
+            }
+            for index in range(self.config.beemboxes)
+        ]
+        return {"batteries": batteries, "beemboxes": beemboxes}
+
+    @staticmethod
+    def solar_factor(moment: datetime) -> float:
+        hour = moment.hour + moment.minute / 60
+        return max(0.0, math.sin(math.pi * (hour - 6) / 12)) if 6 <= hour <= 18 else 0.0
+
+    def live_data(self, battery_id: int) -> dict | None:
+        recording = self.config.recording
+        if recording:
+            snapshots = recording.get("liveData", {}).get(str(battery_id))
+            if not snapshots:
+                return None
+            elapsed = (self.sim_now() - self.sim_origin).total_seconds()
+            snapshot = dict(snapshots[int(elapsed // self.config.sample_period) % len(snapshots)])
+            snapshot["lastKnownMeasureDate"] = self.measure_time().isoformat()
+            if battery_id in self.control:
+                snapshot["workingModeLabel"] = self.control_parameters(battery_id)["mode"]
+            return snapshot
+
+        if battery_id not in self.soc:
+            return None
+
+        measured = self.measure_time()
+        cached = self._live_cache.get(battery_id)
+        if cached is not None and cached[0] == measured:
+            return cached[1]
+        solar = round(3000 * self.solar_factor(measured) * (0.9 + 0.2 * self.random.random()))
+        consumption = round(350 + 250 * self.random.random())
+        surplus = solar - consumption
+        soc = self.soc[battery_id]
+        control = self.control_parameters(battery_id)
+        battery_power = max(-2500, min(2500, surplus))
+        if control["mode"] == "pause":
+            battery_power = 0
+        elif control["mode"] == "advanced" and control["chargeFromGridMaxPower"]:
+            battery_power = min(2500, control["chargeFromGridMaxPower"])
+        if (battery_power > 0 and soc >= control["maxSoc"]) or (battery_power < 0 and soc <= control["minSoc"]):
+            battery_power = 0
+        self.soc[battery_id] = max(5.0, min(100.0, soc + battery_power * self.config.sample_period / 3600 / 50))
+        meter = consumption - solar + battery_power
+
+        snapshot = {
+            "batteryPower": battery_power,
+            "meterPower": meter,
+            "solarPower": solar,
+            "activePower": battery_power,
+            "soc": round(self.soc[battery_id], 1),
+            "workingModeLabel": control["mode"],
+            "lastKnownMeasureDate": measured.isoformat(),
+            "numberOfCycles": 120,
+            "numberOfModules": 2,
+            "globalSoh": 99,
+            "capacityInKwh": 5.0,
+            "maxPower": 2500,
+            "isBatteryWorkingModeOk": True,
+        }
+        self._live_cache[battery_id] = (measured, snapshot)
+        return snapshot
+
+    def control_parameters(self, battery_id: int) -> dict:
+        return {**CONTROL_DEFAULTS, **self.control.get(battery_id, {})}
+
+    def apply_control(self, battery_id: int, changes: dict) -> str | None:
+        """Applique des paramètres de pilotage ; retourne un message d'erreur s'ils sont invalides."""
+        if not isinstance(changes, dict) or not changes:
+            return "Empty body"
+        for key, value in changes.items():
+            if key not in CONTROL_DEFAULTS:
+                return f"Unknown parameter {key}"
+            if key == "mode" and value not in CONTROL_MODES:
+                return f"Invalid mode {value}"
+            if key != "mode" and (not isinstance(value, int) or isinstance(value, bool) or value < 0):
+                return f"Invalid value for {key}"
+        parameters = {**self.control_parameters(battery_id), **changes}
+        if parameters["minSoc"] > parameters["maxSoc"] or parameters["maxSoc"] > 100:
+            return "Invalid SOC limits"
+        self.control[battery_id] = parameters
+        # La mesure en cours reflète aussitôt le nouveau mode
+        cached = self._live_cache.get(battery_id)
+        if cached is not None:
+            self._live_cache[battery_id] = (cached[0], {**cached[1], "workingModeLabel": parameters["mode"]})
+        return None
+
+    def history(self, battery_id: int, start: datetime, end: datetime) -> list[dict]:
+        """Mesures passées sur [start, end[, une par période ; identiques d'un appel à l'autre."""
+        period = self.config.sample_period
+        end = min(end, self.sim_now())
+        moment = start.timestamp() - start.timestamp() % period
+        if moment < start.timestamp():
+            moment += period
+        samples = []
+        while moment < end.timestamp():
+            measured = datetime.fromtimestamp(moment, timezone.utc)
+            # Bruit déterministe : dépend seulement de la batterie et de l'horodatage
+            noise = (int(moment) * 2654435761 + battery_id) % 1000 / 1000
+            solar = round(3000 * self.solar_factor(measured) * (0.9 + 0.2 * noise))
+            consumption = round(350 + 250 * noise)
+            battery_power = max(-2500, min(2500, solar - consumption))
+            samples.append({
+                "batteryPower": battery_power,
+                "meterPower": consumption - solar + battery_power,
+                "solarPower": solar,
+                "soc": 50.0,
+                "lastKnownMeasureDate": measured.isoformat(),
+            })
+            moment += period
+        return samples
+
+    def devices_payload(self) -> dict:
+        now = self.measure_time()
+        if now == self._devices_measure:
+            return self.devices
+        self._devices_measure = now
+        factor = self.solar_factor(now)
+        for box in self.devices.get("beemboxes", []):
+            box["power"] = round(400 * factor * (0.9 + 0.2 * self.random.random()))
+            box["lastAlive"] = now.isoformat()
+            if box["power"]:
+                box["lastProduction"] = now.isoformat()
+        return self.devices
+
+    def summary(self, month: int, year: int) -> list:
+        if self.config.recording and "summary" in self.config.recording:
+            return self.config.recording["summary"]
+        return [
+            {
+                "macAddress": box.get("macAddress"),
+                "month": month,
+                "year": year,
+                "totalDay": 1200 + index,
+                "totalMonth": 36000 + index,
+            }
+            for index, box in enumerate(self.devices.get("beemboxes", []))
+        ]
+
+
+@web.middleware
+async def fault_injection(request: web.Request, handler):
+    state: MockBeemState = request.app["state"]
+    config = state.config
+    endpoint = request.match_info.route.resource.canonical if request.match_info.route.resource else request.path
+    if endpoint.startswith("/_mock"):
+        return await handler(request)
+
+    state.stats.count(state.stats.requests, endpoint)
+    rng = state.random
+
+    delay = config.latency + rng.uniform(0, config.latency_jitter)
+    if config.slow_rate and rng.random() < config.slow_rate:
+        state.stats.count(state.stats.injected, "slow")
+        delay += config.slow_delay
+    if delay:
+        await asyncio.sleep(delay)
+
+    if config.error_rate and rng.random() < config.error_rate:
+        state.stats.count(state.stats.injected, "5xx")
+        return web.json_response({"message": "Internal Server Error"}, status=rng.choice((500, 502, 503)))
+    if config.rate_limit_rate and rng.random() < config.rate_limit_rate:
+        state.stats.count(state.stats.injected, "429")
+        return web.json_response(
+            {"message": "Too Many Requests"},
+            status=429,
+            headers={"Retry-After": str(config.retry_after)},
+        )
+    if endpoint != f"{API_PREFIX}/user/login":
+        if config.unauthorized_rate and rng.random() < config.unauthorized_rate:
+            state.stats.count(state.stats.injected, "401")
+            return web.json_response({"message": "Unauthorized"}, status=401)
+        if not state.token_valid(request.headers.get("Authorization")):
+            return web.json_response({"message": "Unauthorized"}, status=401)
+
+    return await handler(request)
+
+
+def json_response(request: web.Request, data) -> web.Response:
+    """Réponse JSON avec ETag ; 304 si le client présente l'ETag courant."""
+    body = json.dumps(data).encode()
+    if not request.app["state"].config.etag:
+        return web.Response(body=body, content_type="application/json")
+    etag = f'"{hashlib.sha1(body).hexdigest()[:16]}"'
+    if request.headers.get("If-None-Match") == etag:
+        return web.Response(status=304, headers={"ETag": etag})
+    return web.Response(body=body, content_type="application/json", headers={"ETag": etag})
+
+
+async def handle_login(request: web.Request) -> web.Response:
+    state: MockBeemState = request.app["state"]
+    body = await request.json()
+    if body.get("email") != state.config.email or body.get("password") != state.config.password:
+        return web.json_response({"message": "Invalid credentials"}, status=401)
+    return web.json_response({"accessToken": state.issue_token()}, status=201)
+
+
+async def handle_devices(request: web.Request) -> web.Response:
+    return json_response(request, request.app["state"].devices_payload())
+
+
+async def handle_live_data(request: web.Request) -> web.Response:
+    state: MockBeemState = request.app["state"]
+    try:
+        battery_id = int(request.match_info["battery_id"])
+    except ValueError:
+        return web.json_response({"message": "Not Found"}, status=404)
+    data = state.live_data(battery_id)
+    if data is None:
+        return web.json_response({"message": "Not Found"}, status=404)
+    return json_response(request, data)
+
+
+async def handle_live_stream(request: web.Request) -> web.StreamResponse:
+    state: MockBeemState = request.app["state"]
+    if not state.config.stream:
+        return web.json_response({"message": "Not Found"}, status=404)
+
+    response = web.StreamResponse(headers={"Content-Type": "text/event-stream", "Cache-Control": "no-cache"})
+    await response.prepare(request)
+    authorization = request.headers.get("Authorization")
+    sent = {}
+    last_write = time.monotonic()
+    try:
+        # Flux fermé quand il est désactivé à chaud ou que le jeton expire
+        while state.config.stream and state.token_valid(authorization):
+            measured = state.measure_time()
+            for battery in state.devices.get("batteries", []):
+                battery_id = battery["id"]
+                if sent.get(battery_id) == measured:
+                    continue
+                data = state.live_data(battery_id)
+                if data is None:
+                    continue
+                event = json.dumps({"batteryId": battery_id, "liveData": data})
+                await response.write(f"event: live-data\ndata: {event}\n\n".encode())
+                sent[battery_id] = measured
+                last_write = time.monotonic()
+            if time.monotonic() - last_write >= state.config.stream_keepalive:
+                await response.write(b": keepalive\n\n")
+                last_write = time.monotonic()
+            await asyncio.sleep(STREAM_TICK)
+    except ConnectionResetError:
+        pass
+    return response
+
+
+async def handle_history(request: web.Request) -> web.Response:
+    state: MockBeemState = request.app["state"]
+    if not state.config.history:
+        return web.json_response({"message": "Not Found"}, status=404)
+    try:
+        battery_id = int(request.match_info["battery_id"])
+        body = await request.json()
+        start = datetime.fromisoformat(body["from"])
+        end = datetime.fromisoformat(body["to"])
+    except (KeyError, TypeError, ValueError):
+        return web.json_response({"message": "Bad Request"}, status=400)
+    if battery_id not in state.soc:
+        return web.json_response({"message": "Not Found"}, status=404)
+    return web.json_response(state.history(battery_id, start, end))
+
+
+async def handle_control(request: web.Request) -> web.Response:
+    state: MockBeemState = request.app["state"]
+    if not state.config.control:
+        return web.json_response({"message": "Not Found"}, status=404)
+    try:
+        battery_id = int(request.match_info["battery_id"])
+    except ValueError:
+        return web.json_response({"message": "Not Found"}, status=404)
+    if battery_id not in state.soc:
+        return web.json_response({"message": "Not Found"}, status=404)
+    if request.method == "PATCH":
+        try:
+            changes = await request.json()
+        except ValueError:
+            changes = None
+        error = state.apply_control(battery_id, changes)
+        if error:
+            return web.json_response({"message": error}, status=400)
+        state.stats.control_writes += 1
+        return web.json_response(state.control_parameters(battery_id))
+    return json_response(request, state.control_parameters(battery_id))
+
+
+async def handle_summary(request: web.Request) -> web.Response:
+    body = await request.json()
+    now = request.app["state"].sim_now()
+    return web.json_response(request.app["state"].summary(body.get("month", now.month), body.get("year", now.year)))
+
+
+async def handle_stats(request: web.Request) -> web.Response:
+    state: MockBeemState = request.app["state"]
+    return web.json_response(asdict(state.stats))
+
+
+async def handle_reset(request: web.Request) -> web.Response:
+    request.app["state"].stats = MockStats()
+    return web.json_response({"ok": True})
+
+
+async def handle_config(request: web.Request) -> web.Response:
+    state: MockBeemState = request.app["state"]
+    changes = await request.json()
+    for key, value in changes.items():
+        if key in MockConfig.__dataclass_fields__ and key not in ("recording", "batteries", "beemboxes", "solar_equipments"):
+            setattr(state.config, key, value)
+    config = asdict(state.config)
+    config.pop("recording")
+    return web.json_response(config)
+
+
+def create_app(config: MockConfig | None = None) -> web.Application:
+    """Construit l'application aiohttp du serveur simulé (réutilisable dans les tests et benchmarks)."""
+    app = web.Application(middlewares=[fault_injection])
+    app["state"] = MockBeemState(config or MockConfig())
+    app.router.add_post(f"{API_PREFIX}/user/login", handle_login)
+    app.router.add_get(f"{API_PREFIX}/devices", handle_devices)
+    app.router.add_get(f"{API_PREFIX}/batteries/{{battery_id}}/live-data", handle_live_data)
+    app.router.add_get(f"{API_PREFIX}/live-data/stream", handle_live_stream)
+    app.router.add_post(f"{API_PREFIX}/batteries/{{battery_id}}/history", handle_history)
+    app.router.add_get(f"{API_PREFIX}/batteries/{{battery_id}}/control-parameters", handle_control)
+    app.router.add_patch(f"{API_PREFIX}/batteries/{{battery_id}}/control-parameters", handle_control)
+    app.router.add_post(f"{API_PREFIX}/box/summary", handle_summary)
+    app.router.add_get("/_mock/stats", handle_stats)
+    app.router.add_post("/_mock/reset", handle_reset)
+    app.router.add_post("/_mock/config", handle_config)
+    return app
+
+
+def _parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--recording", help="Fichier JSON de réponses enregistrées à rejouer")
+    for name, default in asdict(MockConfig()).items():
+        if name == "recording":
+            continue
+        if isinstance(default, bool):
+            parser.add_argument(f"--{name.replace('_', '-')}", action=argparse.BooleanOptionalAction, default=default)
+            continue
+        parser.add_argument(f"--{name.replace('_', '-')}", type=type(default) if default is not None else int, default=default)
+    return parser.parse_args()
+
+
+def main() -> None:
+    args = _parse_args()
+    options = {name: getattr(args, name) for name in MockConfig.__dataclass_fields__ if name != "recording"}
+    if args.recording:
+        with open(args.recording, encoding="utf-8") as file:
+            options["recording"] = json.load(file)
+    app = create_app(MockConfig(**options))
+    print(f"Serveur Beem simulé : BEEM_API_BASE=http://{args.host}:{args.port}{API_PREFIX}")
+    web.run_app(app, host=args.host, port=args.port, print=None)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,327 @@
+"""Benchmarks du chemin critique polling → parsing → mise à jour des entités.
+
+Lance le serveur Beem simulé (`beem_mock_server.py`) en local, une instance
+Home Assistant minimale et le vrai `BeemCoordinator` avec les entités de
+`sensor.py`, puis mesure pour chaque taille de flotte :
+
+- la latence d'un cycle (p50/p99), dont la part « mise à jour des entités » ;
+- le nombre de requêtes HTTP par cycle et de listeners du coordinateur ;
+- le temps de décodage JSON des réponses /devices et live-data ;
+- le nombre d'écritures d'état par cycle ;
+- la mémoire par équipement (tracemalloc).
+
+Un scénario vérifie le repli sur les dernières données connues (`stale`) quand le
+disjoncteur s'ouvre sur un compte sans BeemBox, puis sa refermeture après l'essai de
+reprise, et un dernier benchmark intègre une journée d'échantillons synthétiques avec
+`EnergyIntegrator`. Les résultats sont écrits en JSON (stdout ou `--output`).
+
+Prérequis : `pip install homeassistant aiohttp`.
+
+    python tools/benchmark.py --sizes 1 10 100 1000 --cycles 20 --output bench.json
+"""
+
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+import argparse
+import asyncio
+import json
+import logging
+import math
+import platform
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+import types
+
+from aiohttp.test_utils import TestServer
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT / "custom_components"))
+sys.path.insert(0, str(ROOT / "tools"))
+
+from homeassistant.core import HomeAssistant  # noqa: E402
+from homeassistant.helpers import device_registry as dr, entity_registry as er, restore_state  # noqa: E402
+from homeassistant.helpers.entity import DATA_ENTITY_SOURCE, Entity  # noqa: E402
+from homeassistant.helpers.entity_platform import EntityPlatform  # noqa: E402
+
+import beem_mock_server as mock  # noqa: E402
+from Beem_Energy import api as beem_api, sensor  # noqa: E402
+from Beem_Energy.api import BeemApiClient  # noqa: E402
+from Beem_Energy.const import DOMAIN  # noqa: E402
+from Beem_Energy.coordinator import BeemCoordinator  # noqa: E402
+from Beem_Energy.integration import INTEGRATION_METHODS, EnergyIntegrator  # noqa: E402
+
+_LOGGER = logging.getLogger(__name__)
+
+
+def _percentiles(values: list[float]) -> dict:
+    if not values:
+        return {}
+    if len(values) == 1:
+        return {"p50": values[0], "p99": values[0], "mean": values[0]}
+    quantiles = statistics.quantiles(values, n=100, method="inclusive")
+    return {"p50": quantiles[49], "p99": quantiles[98], "mean": statistics.fmean(values)}
+
+
+class TimedCoordinator(BeemCoordinator):
+    """Coordinateur instrumenté : sépare le temps de récupération du temps de notification."""
+
+    fetch_times: list
+    notify_times: list
+
+    async def _async_update_data(self):
+        start = time.perf_counter()
+        try:
+            return await super()._async_update_data()
+        finally:
+            self.fetch_times.append(time.perf_counter() - start)
+
+    def async_update_listeners(self) -> None:
+        start = time.perf_counter()
+        super().async_update_listeners()
+        self.notify_times.append(time.perf_counter() - start)
+
+
+async def _create_hass(config_dir: str) -> HomeAssistant:
+    hass = HomeAssistant(config_dir)
+    hass.data[DATA_ENTITY_SOURCE] = {}
+    await asyncio.gather(dr.async_load(hass), er.async_load(hass), restore_state.async_load(hass))
+    return hass
+
+
+async def _measure_json_decode(api: BeemApiClient, battery_ids: list, repeats: int) -> dict:
+    session = api._get_session()
+    headers = {"Authorization": f"Bearer {api.token}"}
+    async with session.get(f"{api.base_url}/devices", headers=headers) as resp:
+        devices_raw = await resp.read()
+    live_raw = b"{}"
+    if battery_ids:
+        async with session.get(f"{api.base_url}/batteries/{battery_ids[0]}/live-data", headers=headers) as resp:
+            live_raw = await resp.read()
+
+    start = time.perf_counter()
+    for _ in range(repeats):
+        json.loads(devices_raw)
+    devices_time = (time.perf_counter() - start) / repeats
+
+    start = time.perf_counter()
+    for _ in range(repeats):
+        json.loads(live_raw)
+    live_time = (time.perf_counter() - start) / repeats
+
+    return {
+        "devices_bytes": len(devices_raw),
+        "devices_decode_s": devices_time,
+        "live_data_bytes": len(live_raw),
+        "live_data_decode_s": live_time,
+        "per_cycle_decode_s": devices_time + live_time * len(battery_ids),
+    }
+
+
+async def bench_fleet(size: int, cycles: int, config_dir: str) -> dict:
+    """Mesure un cycle complet pour `size` batteries et `size` BeemBox."""
+    server = TestServer(mock.create_app(mock.MockConfig(batteries=size, beemboxes=size, seed=size)))
+    await server.start_server()
+    hass = await _create_hass(config_dir)
+
+    tracemalloc.start()
+    baseline = tracemalloc.take_snapshot()
+
+    api = BeemApiClient(mock.MockConfig.email, mock.MockConfig.password, hass=hass, base_url=str(server.make_url(mock.API_PREFIX)))
+    coordinator = TimedCoordinator(hass, api, max_requests_per_hour=10**9)
+    coordinator.fetch_times = []
+    coordinator.notify_times = []
+    await coordinator.async_refresh()
+    if not coordinator.last_update_success:
+        raise RuntimeError(f"Premier cycle en échec : {coordinator.last_exception}")
+
+    unload_callbacks = []
+    entry = types.SimpleNamespace(entry_id="benchmark", data={}, options={}, async_on_unload=unload_callbacks.append)
+    hass.data.setdefault(DOMAIN, {})[entry.entry_id] = coordinator
+    entities = []
+    await sensor.async_setup_entry(hass, entry, entities.extend)
+    entity_platform = EntityPlatform(
+        hass=hass,
+        logger=_LOGGER,
+        domain="sensor",
+        platform_name=DOMAIN,
+        platform=None,
+        scan_interval=timedelta(seconds=60),
+        entity_namespace=None,
+    )
+    await entity_platform.async_add_entities(entities)
+
+    snapshot = tracemalloc.take_snapshot()
+    memory = sum(stat.size_diff for stat in snapshot.compare_to(baseline, "filename"))
+    tracemalloc.stop()
+
+    state_writes = 0
+    original_write = Entity._async_write_ha_state
+
+    def counting_write(entity):
+        nonlocal state_writes
+        state_writes += 1
+        original_write(entity)
+
+    Entity._async_write_ha_state = counting_write
+    server.app["state"].stats = mock.MockStats()
+    coordinator.fetch_times.clear()
+    coordinator.notify_times.clear()
+
+    cycle_times = []
+    mock_state = server.app["state"]
+    for _ in range(cycles):
+        # Chaque cycle reçoit une nouvelle mesure (pire cas : toutes les entités dynamiques changent)
+        mock_state.sim_origin += timedelta(seconds=mock_state.config.sample_period)
+        start = time.perf_counter()
+        await coordinator.async_refresh()
+        cycle_times.append(time.perf_counter() - start)
+    Entity._async_write_ha_state = original_write
+
+    requests = sum(mock_state.stats.requests.values())
+    listeners = len(coordinator._listeners)
+    decode = await _measure_json_decode(api, coordinator.battery_ids, repeats=50)
+
+    for unload in unload_callbacks:
+        unload()
+    await coordinator.async_shutdown()
+    await api.async_close()
+    await hass.async_stop(force=True)
+    await server.close()
+
+    devices = size * 2 + sum(len(e) for e in coordinator.solar_equipments.values())
+    return {
+        "batteries": size,
+        "beemboxes": size,
+        "devices": devices,
+        "entities": len(entities),
+        "entities_enabled": sum(1 for entity in entities if entity.hass is not None),
+        "coordinator_listeners": listeners,
+        "cycles": cycles,
+        "cycle_s": _percentiles(cycle_times),
+        "fetch_s": _percentiles(coordinator.fetch_times),
+        "entity_update_s": _percentiles(coordinator.notify_times),
+        "requests_per_cycle": requests / cycles,
+        "state_writes_per_cycle": state_writes / cycles,
+        "json": decode,
+        "memory_bytes": memory,
+        "memory_per_device_bytes": memory / devices if devices else None,
+    }
+
+
+async def bench_circuit_breaker(config_dir: str, max_cycles: int = 10) -> dict:
+    """Compte à batteries seules : fermé -> ouvert (données précédentes servies) -> essai de reprise -> fermé."""
+    server = TestServer(mock.create_app(mock.MockConfig(batteries=2, beemboxes=0, seed=0)))
+    await server.start_server()
+    hass = await _create_hass(config_dir)
+    api = BeemApiClient(mock.MockConfig.email, mock.MockConfig.password, hass=hass, base_url=str(server.make_url(mock.API_PREFIX)))
+    coordinator = BeemCoordinator(hass, api, max_requests_per_hour=10**9)
+    await coordinator.async_refresh()
+    if not coordinator.last_update_success:
+        raise RuntimeError(f"Premier cycle en échec : {coordinator.last_exception}")
+
+    # Panne totale ; nouvelles tentatives sans attente pour ouvrir le disjoncteur rapidement
+    server.app["state"].config.error_rate = 1.0
+    backoff_delay = beem_api.backoff_delay
+    beem_api.backoff_delay = lambda attempt, retry_after=None: 0.0
+    cycles = []
+    try:
+        for _ in range(max_cycles):
+            await coordinator.async_refresh()
+            stale = bool(coordinator.last_update_success and coordinator.data.get("stale"))
+            cycles.append({"success": coordinator.last_update_success, "stale": stale, "breaker": api.circuit_breaker.state})
+            if stale:
+                break
+    finally:
+        beem_api.backoff_delay = backoff_delay
+
+    # Fin de la panne ; délai de reprise écoulé sans attendre : l'essai doit refermer le disjoncteur
+    server.app["state"].config.error_rate = 0.0
+    api.circuit_breaker.recovery_timeout = 0
+    recovery = []
+    for _ in range(3):
+        breaker = api.circuit_breaker.state
+        await coordinator.async_refresh()
+        recovery.append(
+            {
+                "breaker_before": breaker,
+                "success": coordinator.last_update_success,
+                "stale": coordinator.stale,
+                "batteries": len(coordinator.battery_index),
+                "breaker": api.circuit_breaker.state,
+            }
+        )
+
+    await coordinator.async_shutdown()
+    await api.async_close()
+    await hass.async_stop(force=True)
+    await server.close()
+    return {
+        "cycles_until_stale": len(cycles) if cycles and cycles[-1]["stale"] else None,
+        "cycles": cycles,
+        "recovered": all(cycle["breaker"] == "closed" and not cycle["stale"] for cycle in recovery),
+        "recovery": recovery,
+    }
+
+
+def bench_energy_integration(sample_period: int = 10) -> dict:
+    """Intègre une journée de puissance solaire synthétique (sinusoïde 3 kW) avec chaque méthode."""
+    origin = datetime(2024, 6, 21, tzinfo=timezone.utc)
+    samples = []
+    for index in range(86400 // sample_period + 1):
+        hour = index * sample_period / 3600
+        power = 3000 * max(0.0, math.sin(math.pi * (hour - 6) / 12)) if 6 <= hour <= 18 else 0.0
+        samples.append((origin + timedelta(seconds=index * sample_period), power))
+    expected_kwh = 3000 * 12 * 2 / math.pi / 1000
+
+    results = {"samples": len(samples), "expected_kwh": expected_kwh, "methods": {}}
+    for method in INTEGRATION_METHODS:
+        integrator = EnergyIntegrator(method)
+        start = time.perf_counter()
+        for timestamp, power in samples:
+            integrator.add_sample(timestamp, power)
+        elapsed = time.perf_counter() - start
+        results["methods"][method] = {
+            "kwh": integrator.value,
+            "error_pct": (integrator.value - expected_kwh) / expected_kwh * 100,
+            "duration_s": elapsed,
+            "per_sample_us": elapsed / len(samples) * 1e6,
+        }
+    return results
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmarks Beem Energy")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1, 10, 100, 1000])
+    parser.add_argument("--cycles", type=int, default=20)
+    parser.add_argument("--output", help="Fichier JSON de sortie (stdout par défaut)")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.ERROR)
+
+    results = {
+        "meta": {
+            "timestamp": datetime.now(timezone.utc).isoformat(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+        },
+        "fleet": [],
+        "energy_integration": bench_energy_integration(),
+    }
+    for size in args.sizes:
+        with tempfile.TemporaryDirectory() as config_dir:
+            results["fleet"].append(await bench_fleet(size, args.cycles, config_dir))
+    with tempfile.TemporaryDirectory() as config_dir:
+        results["circuit_breaker"] = await bench_circuit_breaker(config_dir)
+
+    output = json.dumps(results, indent=2)
+    if args.output:
+        Path(args.output).write_text(output, encoding="utf-8")
+    else:
+        print(output)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())